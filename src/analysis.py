@@ -1,57 +1,322 @@
+import sys
+import threading
+from collections.abc import Iterable
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
 import plotly.graph_objects as go
 import polars as pl
 
 from src.utils.plotting import colours, template
-from src.wave_analysis import calculate_wave_statistics_for_gauges
+from src.wave_analysis import calculate_wave_statistics_for_matrix
 
+from . import cache
+from .compression import read_output
 from .config import Config
+from .export import FIGURE_FILES, ImageExporter, stale_images
+from .gauges import (
+    GAUGE_COLUMNS,
+    gauge_matrix,
+    load_matrix,
+    parse_gauge,
+    read_gauges,
+    read_store,
+    write_store,
+)
+from .geometry import get_geometry
+from .monitor import DirectoryWatcher, FileTail
+
+#########
+# types #
+#########
+
+
+class StreamingAnalysis:
+    """
+    Analysis of a simulation overlapping with its SWASH run.
+
+    While SWASH runs, the cross-section diagram (which only depends on the
+    input files) is rendered and the gauge outputs are parsed as rows are
+    appended. The final analysis
+    (`analyze_simulation` with `stream`) then only has to assemble the parsed
+    data instead of reading every output again.
+
+    Gauge rows of a spin-up run in `prefix_dir` (see hot-starting) are read
+    first, as they are prepended to the outputs once the run succeeds. SWASH
+    may run in another directory than the simulation's (`swash_dir`, see
+    scratch runs), its outputs being moved there once it finished.
+
+    Usage:
+        with StreamingAnalysis(config, simulation_dir) as stream:
+            ...  # run SWASH
+        analyze_simulation(simulation_dir, config, stream=stream)
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        simulation_dir: Path,
+        *,
+        prefix_dir: Path | None = None,
+        swash_dir: Path | None = None,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.config = config
+        self.simulation_dir = simulation_dir
+        self.diagram_ready = False
+        if swash_dir is None:
+            swash_dir = simulation_dir / "swash"
+        self._swash_dir = swash_dir
+        self._names = [
+            f"wg{i+1:02d}.txt"
+            for i in range(len(config.numeric.wave_gauge_positions))
+        ]
+        self._prefix_dir = prefix_dir
+        self._paths = {
+            name: simulation_dir / "swash" / name for name in self._names
+        }
+        self._tails = {
+            name: FileTail(swash_dir / name) for name in self._names
+        }
+        self._partial = {name: b"" for name in self._names}
+        self._rows: dict[str, list[np.ndarray]] = {
+            name: [] for name in self._names
+        }
+        self._bytes_read = {name: 0 for name in self._names}
+        self._watcher = DirectoryWatcher(
+            swash_dir,
+            set(self._names),
+            poll_interval=poll_interval,
+            use_inotify=use_inotify,
+        )
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> "StreamingAnalysis":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop following the outputs, after reading what was written."""
+        self._stop.set()
+        self._watcher.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        else:
+            self._close()
+
+    def __enter__(self) -> "StreamingAnalysis":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def rows(self) -> list[np.ndarray]:
+        """
+        Rows of GAUGE_COLUMNS of each gauge, as read from the final outputs.
+
+        The parsed rows are checked against the outputs on disk (decompressed
+        if compressed after the run): a gauge output cut after the run (e.g.
+        once converged) keeps the rows it still holds, and one that grew
+        beyond what was parsed is read again.
+
+        Returns
+        -------
+        list[np.ndarray]
+            Rows of each gauge
+        """
+        return [self._gauge_rows(name) for name in self._names]
+
+    def data(self, timestep: float) -> pl.DataFrame:
+        """
+        Gauge data, as read by `_read_simulaton_data` from the final outputs.
+
+        Parameters
+        ----------
+        timestep : float
+            Time step between rows (s)
+
+        Returns
+        -------
+        pl.DataFrame
+            Columns timestep, water_level, x_velocity and position
+        """
+        return _gauge_data(
+            gauge_matrix(self.rows()),
+            self.config.numeric.wave_gauge_positions,
+            timestep,
+        )
+
+    def _gauge_rows(self, name: str) -> np.ndarray:
+        with self._lock:
+            rows = (
+                np.concatenate(self._rows[name])
+                if self._rows[name]
+                else np.empty((0, len(GAUGE_COLUMNS)))
+            )
+            bytes_read = self._bytes_read[name] - len(self._partial[name])
+        path = self._paths[name]
+        if path.exists():
+            size = path.stat().st_size
+            if size == bytes_read:
+                return rows
+            with open(path, "rb") as f:
+                content = f.read()
+        else:
+            # compressed once SWASH finished
+            content = read_output(path)
+            size = len(content)
+            if size == bytes_read:
+                return rows
+        if size < bytes_read:
+            return rows[: content.count(b"\n")]
+        return parse_gauge(content)
+
+    def _run(self) -> None:
+        try:
+            self._plot_diagram()
+            if self._prefix_dir is not None:
+                for name in self._names:
+                    self._feed(name, read_output(self._prefix_dir / name))
+            self._read(self._names)
+            while not self._stop.is_set():
+                self._read(self._watcher.wait(timeout=1.0))
+            self._read(self._names)
+        except Exception as e:
+            print(f"Streaming analysis failed: {e}", file=sys.stderr)
+        finally:
+            self._close()
+
+    def _plot_diagram(self) -> None:
+        try:
+            _plot_swash_data(self.config, self.simulation_dir)
+            self.diagram_ready = True
+        except Exception as e:
+            print(f"Cross-section diagram failed: {e}", file=sys.stderr)
+
+    def _read(self, names: Iterable[str]) -> None:
+        for name in names:
+            self._feed(name, self._tails[name].read())
+
+    def _feed(self, name: str, chunk: bytes) -> None:
+        if not chunk:
+            return
+        data = self._partial[name] + chunk
+        end = data.rfind(b"\n") + 1
+        rows = parse_gauge(data[:end])
+        with self._lock:
+            self._partial[name] = data[end:]
+            self._bytes_read[name] += len(chunk)
+            if len(rows):
+                self._rows[name].append(rows)
+
+    def _close(self) -> None:
+        for tail in self._tails.values():
+            tail.close()
+        self._watcher.close()
+
 
 ############
 # external #
 ############
 
 
-def analyze_simulation(simulation_dir: Path, config: Config) -> dict:
+def analyze_simulation(
+    simulation_dir: Path,
+    config: Config,
+    *,
+    stream: StreamingAnalysis | None = None,
+    force: bool = False,
+    exporter: ImageExporter | None = None,
+) -> dict:
     """
     Analyze simulation results and generate plots.
 
+    Only the products whose inputs or analysis code changed since they were
+    last computed are computed again (see `cache.analysis_inputs`), unless
+    `force` is set. The figures are saved as Plotly JSON (as read by the
+    dashboard) and only exported to PNG by `exporter`, in the background.
+
     Parameters
     ----------
     simulation_dir : Path
         Directory containing simulation results
     config : Config
         Configuration object for the simulation
+    stream : StreamingAnalysis | None, default None
+        Streaming analysis that followed the run, whose parsed data and
+        cross-section diagram are used instead of reading the outputs again
+    force : bool, default False
+        Compute every product again
+    exporter : ImageExporter | None, default None
+        Renderer pool exporting the figures whose image is out of date, no
+        image being exported without it
 
     Returns
     -------
     dict
-        Analysis results with plot file paths
+        Analysis results with figure file paths and the computed products
     """
     timestep = _find_timestep(simulation_dir)
-    data = _read_simulaton_data(config, timestep, simulation_dir)
-    _plot_water_levels_and_x_velocities(data, config, timestep, simulation_dir)
-    _plot_swash_data(config, simulation_dir)
+    positions = config.numeric.wave_gauge_positions
+    analysis_dir = simulation_dir / "analysis"
+    analysis_dir.mkdir(exist_ok=True)
+
+    inputs = cache.analysis_inputs(config, simulation_dir)
+    manifest = cache.read_analysis_manifest(analysis_dir)
+    stale = (
+        list(inputs)
+        if force
+        else cache.stale_analysis_products(analysis_dir, manifest, inputs)
+    )
+
+    if stream is not None:
+        rows = stream.rows()
+        write_store(
+            simulation_dir / "swash",
+            rows,
+            positions=positions,
+            timestep=timestep,
+        )
+        matrix = gauge_matrix(rows)
+    elif "wave_statistics" in stale or "time_series" in stale:
+        matrix = _read_gauge_matrix(config, timestep, simulation_dir)
+    if "time_series" in stale:
+        data = _gauge_data(matrix, positions, timestep)
+        _plot_water_levels_and_x_velocities(
+            data, config, timestep, simulation_dir
+        )
+    if "diagram" in stale and (stream is None or not stream.diagram_ready):
+        _plot_swash_data(config, simulation_dir)
 
     # Calculate wave statistics
-    wave_stats = calculate_wave_statistics_for_gauges(data, timestep)
+    statistics_file = analysis_dir / "wave_statistics.csv"
+    if "wave_statistics" in stale:
+        wave_stats = calculate_wave_statistics_for_matrix(
+            matrix[0], positions, timestep
+        )
+        wave_stats.write_csv(statistics_file)
+    else:
+        wave_stats = pl.read_csv(statistics_file)
 
-    # Save wave statistics to CSV
-    analysis_dir = simulation_dir / "analysis"
-    analysis_dir.mkdir(exist_ok=True)
-    wave_stats.write_csv(analysis_dir / "wave_statistics.csv")
+    cache.record_analysis(
+        analysis_dir, manifest, {product: inputs[product] for product in stale}
+    )
+
+    if exporter is not None:
+        exporter.submit(stale_images(analysis_dir))
 
-    plot_file = simulation_dir / "analysis" / "water_levels_and_x_velocity.png"
-    swash_plot_file = simulation_dir / "analysis" / "swash_diagram.png"
+    plot_file, swash_plot_file = (analysis_dir / file for file in FIGURE_FILES)
     return {
         "plot_file": str(plot_file) if plot_file.exists() else "",
         "swash_plot_file": (
             str(swash_plot_file) if swash_plot_file.exists() else ""
         ),
         "wave_stats": wave_stats.to_dicts(),
+        "updated": stale,
     }
 
 
@@ -73,27 +338,55 @@ def _find_timestep(path: Path) -> float:
 def _read_simulaton_data(
     config: Config, timestep: float, path: Path
 ) -> pl.DataFrame:
-    path = path / "swash"
-    data = pl.concat(
+    return _gauge_data(
+        _read_gauge_matrix(config, timestep, path),
+        config.numeric.wave_gauge_positions,
+        timestep,
+    )
+
+
+def _read_gauge_matrix(
+    config: Config, timestep: float, path: Path
+) -> np.ndarray:
+    """
+    Gauge matrix of a run (see `gauge_matrix`), memory-mapped from its store
+    or else parsed from its outputs (then stored for the next analyses).
+    """
+    swash_dir = path / "swash"
+    positions = config.numeric.wave_gauge_positions
+    matrix = load_matrix(swash_dir, positions)
+    if matrix is not None:
+        return matrix
+    rows = read_store(swash_dir, positions)
+    if rows is None:
+        rows = read_gauges(
+            [swash_dir / f"wg{i+1:02d}.txt" for i in range(len(positions))]
+        )
+    if rows:
+        write_store(swash_dir, rows, positions=positions, timestep=timestep)
+    return gauge_matrix(rows)
+
+
+def _gauge_data(
+    matrix: np.ndarray, positions: list[float], timestep: float
+) -> pl.DataFrame:
+    """Gauge matrix as columns timestep, GAUGE_COLUMNS and position."""
+    time = np.arange(matrix.shape[1]) * timestep
+    return pl.concat(
         [
-            pl.from_pandas(
-                pd.read_csv(
-                    path / f"wg{i+1:02d}.txt",
-                    sep=r"\s+",
-                    header=None,
-                    names=["water_level", "x_velocity", "y_velocity"],
-                )
-            )
-            .with_row_index(name="timestep")
-            .with_columns(
-                pl.col("timestep") * timestep,
-                pl.lit(position).alias("position"),
+            pl.DataFrame(
+                {
+                    "timestep": time,
+                    **{
+                        column: matrix[j, :, i]
+                        for j, column in enumerate(GAUGE_COLUMNS)
+                    },
+                    "position": np.full(len(time), position),
+                }
             )
-            for i, position in enumerate(config.numeric.wave_gauge_positions)
+            for i, position in enumerate(positions)
         ]
     )
-    data.write_csv(path / "data.csv")
-    return data
 
 
 def _plot_water_levels_and_x_velocities(
@@ -240,13 +533,12 @@ def _plot_water_levels_and_x_velocities(
 
     fig = go.Figure(traces, layout)
 
-    fig.write_image(path / "water_levels_and_x_velocity.png")
     fig.write_json(path / "water_levels_and_x_velocity.json")
 
 
 def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     """
-    Create a combined cross-section diagram from SWASH data files.
+    Create a combined cross-section diagram of the simulation inputs.
 
     Parameters
     ----------
@@ -255,26 +547,20 @@ def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     simulation_dir : Path
         Directory containing simulation results
     """
-    swash_dir = simulation_dir / "swash"
     analysis_dir = simulation_dir / "analysis"
     analysis_dir.mkdir(exist_ok=True)
 
-    # Create x-coordinates based on grid configuration
-    x = np.linspace(0, config.grid.length, config.grid.nx_cells + 1)
-
-    # Read data files
-    def read_data_file(filename: str) -> np.ndarray:
-        """Read a SWASH data file and return as numpy array"""
-        file_path = swash_dir / filename
-        if file_path.exists():
-            return np.loadtxt(file_path)
-        else:
-            return np.zeros(len(x))
-
-    bathymetry = read_data_file("bathymetry.txt")
-    structure_height = read_data_file("structure_height.txt")
-    porosity = read_data_file("porosity.txt")
-    vegetation_density = read_data_file("vegetation_density.txt")
+    # Same arrays as the SWASH input files (see `geometry.get_geometry`)
+    geometry = get_geometry(config)
+    x = geometry.x
+    bed = geometry.bed
+    structure_height = geometry.structure
+    porosity = geometry.porosity
+    vegetation_density = (
+        geometry.vegetation_density(config.vegetation)
+        if config.vegetation.enable
+        else np.zeros_like(x)
+    )
 
     # Create the plot
     fig = go.Figure()
@@ -283,7 +569,7 @@ def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     fig.add_trace(
         go.Scatter(
             x=x,
-            y=-bathymetry,
+            y=bed,
             mode="lines",
             fill="tozeroy",
             name="Seafloor",
@@ -294,7 +580,7 @@ def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     )
 
     # Add structure height above seafloor
-    structure_top = -bathymetry + structure_height
+    structure_top = bed + structure_height
     fig.add_trace(
         go.Scatter(
             x=x,
@@ -340,7 +626,7 @@ def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     if np.any(porosity > 0):
         structure_mask = structure_height > 0
         porosity_x = x[structure_mask]
-        porosity_y = (-bathymetry + structure_height / 2)[
+        porosity_y = (bed + structure_height / 2)[
             structure_mask
         ]  # Middle of structure
         porosity_values = porosity[structure_mask]
@@ -377,5 +663,4 @@ def _plot_swash_data(config: Config, simulation_dir: Path) -> None:
     )
 
     # Save the plot
-    fig.write_image(analysis_dir / "swash_diagram.png")
     fig.write_json(analysis_dir / "swash_diagram.json")
@@ -0,0 +1,601 @@
+import os
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import tqdm
+
+from . import cache
+from .compression import Compression
+from .config import Config
+from .export import ImageExporter, stale_images
+from .resources import ResourceUsage
+from .simulation import prepare_inputs, run_simulation, spinup_config
+from .utils.paths import root_dir
+from .utils.print import done_print, error_print, format_bytes, load_print
+
+#########
+# types #
+#########
+
+
+@dataclass(frozen=True)
+class PreparedRun:
+    """SWASH directory whose inputs were generated by `prepare_batch`."""
+
+    name: str
+    # "prepared" if the inputs were written, "complete" if the directory
+    # already holds a complete run of them
+    state: Literal["prepared", "complete"]
+    swash_dir: Path
+    # SWASH directory of the spin-up to run first, whose hotstart file must
+    # be copied in `swash_dir` (see `simulation.spinup_config`)
+    spinup_dir: Path | None = None
+
+
+@dataclass(frozen=True)
+class AnalyzedRun:
+    """Simulation directory whose analysis was attempted by `analyze_batch`."""
+
+    name: str
+    # "analyzed" if products were computed, "skipped" if they were all up to
+    # date, "failed" if there are no results or the analysis raised
+    state: Literal["analyzed", "skipped", "failed"]
+    simulation_dir: Path
+    # computed products, or why the analysis failed
+    detail: str = ""
+
+
+############
+# external #
+############
+
+
+def run_batch(
+    configs: list[Config],
+    *,
+    jobs: int,
+    force: bool = False,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+    exporter: ImageExporter | None = None,
+) -> dict[str, bool]:
+    """
+    Run several simulations concurrently with a bounded pool of workers.
+
+    Each worker launches one SWASH process in its own simulation directory and
+    runs the analysis as soon as its simulation finishes. A single progress
+    bar aggregates the simulated time of every run instead of each run
+    showing its own bar. Configurations with the same physics hash are only
+    simulated once, the others reuse the shared results.
+
+    Parameters
+    ----------
+    configs : list[Config]
+        Configurations to simulate
+    jobs : int
+        Maximum number of SWASH processes running at the same time
+    force : bool, default False
+        Run SWASH even if a complete run with the same inputs exists
+    scratch : Path | None, default None
+        Directory to run SWASH in before publishing the results (see
+        `run_simulation`)
+    compression : Compression, default "none"
+        Compression of the bulky outputs once each run finished
+    exporter : ImageExporter | None, default None
+        Renderer pool exporting the figures of the analyses to PNG
+
+    Returns
+    -------
+    dict[str, bool]
+        Whether each simulation succeeded, keyed by simulation directory name
+        (configuration name and hash)
+    """
+    # configs sharing a name and hash would write to the same directory
+    configs = list({_key(config): config for config in configs}.values())
+    jobs = max(1, min(jobs, len(configs)))
+    load_print(
+        f"Running {len(configs)} simulations with {jobs} parallel jobs...",
+        end="\n",
+    )
+
+    # configs with the same physics share their results, so only one of them
+    # is simulated and the others reuse its run once it is done
+    primaries: dict[str, Config] = {}
+    followers: dict[str, list[Config]] = {}
+    for config in configs:
+        if config.physics_hash in primaries:
+            followers.setdefault(config.physics_hash, []).append(config)
+        else:
+            primaries[config.physics_hash] = config
+
+    progress = _BatchProgress(configs)
+    results: dict[str, bool] = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {
+            executor.submit(
+                _run_one,
+                config,
+                progress,
+                force,
+                scratch,
+                compression,
+                exporter,
+            ): config
+            for config in primaries.values()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                config = pending.pop(future)
+                try:
+                    results[_key(config)] = future.result()
+                except Exception as e:
+                    error_print(f"Simulation {config.name} failed: {e}")
+                    results[_key(config)] = False
+                progress.finish(config, results[_key(config)])
+
+                for follower in followers.pop(config.physics_hash, []):
+                    if results[_key(config)]:
+                        future_ = executor.submit(
+                            _run_one,
+                            follower,
+                            progress,
+                            False,
+                            scratch,
+                            compression,
+                            exporter,
+                        )
+                        pending[future_] = follower
+                    else:
+                        results[_key(follower)] = False
+                        progress.finish(follower, False)
+
+    progress.close()
+    _print_resources(configs)
+
+    n_failed = sum(not success for success in results.values())
+    if n_failed:
+        error_print(
+            f"{len(results) - n_failed}/{len(results)} simulations"
+            " completed successfully"
+        )
+        for name, success in sorted(results.items()):
+            if not success:
+                error_print(name, indent=2)
+    else:
+        done_print(f"All {len(results)} simulations completed successfully")
+    return results
+
+
+def prepare_batch(
+    configs: list[Config],
+    *,
+    jobs: int,
+    simulations_dir: Path | None = None,
+    template_dir: Path | None = None,
+) -> list[PreparedRun]:
+    """
+    Generate the SWASH inputs of many configurations without running them.
+
+    Each SWASH directory gets the files `run_simulation` would write before
+    executing SWASH (see `simulation.prepare_inputs`), e.g. to run them on a
+    cluster. Configurations with the same physics share their directory, so
+    it is only written once, as are the spin-ups shared by hot-started
+    configurations. The work is split between `jobs` processes, each
+    compiling the INPUT template and computing the grid once for all its
+    configurations.
+
+    Parameters
+    ----------
+    configs : list[Config]
+        Configurations to prepare
+    jobs : int
+        Number of processes generating inputs in parallel
+    simulations_dir : Path | None, default None
+        Directory containing all simulations (default: simulations/)
+    template_dir : Path | None, default None
+        Directory of the INPUT template (default: templates/)
+
+    Returns
+    -------
+    list[PreparedRun]
+        Prepared directories, in the order of the configurations
+    """
+    simulations_dir = simulations_dir or root_dir / "simulations"
+    template_dir = template_dir or root_dir / "templates"
+
+    # (config, SWASH directory, whether it writes a hotstart) to write once
+    tasks: dict[Path, tuple[Config, Path, bool]] = {}
+    runs = []
+    for config in configs:
+        spinup_swash_dir = None
+        spinup = spinup_config(config)
+        if spinup is not None:
+            spinup_swash_dir = (
+                cache.spinup_dir(spinup, simulations_dir) / "swash"
+            )
+            tasks.setdefault(
+                spinup_swash_dir, (spinup, spinup_swash_dir, True)
+            )
+        swash_dir = (
+            cache.link_simulation_dir(config, simulations_dir) / "swash"
+        )
+        store_dir = swash_dir.resolve()
+        tasks.setdefault(store_dir, (config, swash_dir, False))
+        runs.append((config, swash_dir, store_dir, spinup_swash_dir))
+
+    jobs = max(1, min(jobs, len(tasks)))
+    load_print(
+        f"Preparing {len(tasks)} input directories with {jobs} parallel"
+        " jobs...",
+    )
+    args = [(*task, template_dir) for task in tasks.values()]
+    if jobs == 1:
+        written = list(map(_prepare_one, args))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = list(
+                executor.map(
+                    _prepare_one,
+                    args,
+                    chunksize=max(1, len(args) // (4 * jobs)),
+                )
+            )
+    states = dict(zip(tasks, written))
+
+    prepared = [
+        PreparedRun(
+            name=config.name,
+            state="prepared" if states[store_dir] else "complete",
+            swash_dir=swash_dir,
+            spinup_dir=spinup_swash_dir,
+        )
+        for config, swash_dir, store_dir, spinup_swash_dir in runs
+    ]
+    done_print(f"Prepared the inputs of {len(prepared)} simulations")
+    return prepared
+
+
+def analyze_batch(
+    configs: list[Config],
+    *,
+    jobs: int,
+    force: bool = False,
+    exporter: ImageExporter | None = None,
+    simulations_dir: Path | None = None,
+) -> list[AnalyzedRun]:
+    """
+    Analyze many simulations with a pool of `jobs` processes.
+
+    A run without results or whose analysis raises is reported as failed
+    without stopping the others (if a process dies, e.g. killed for lack of
+    memory, the runs left to the pool are reported as failed too). A single
+    progress bar counts the analyzed, skipped and failed
+    runs. Configurations sharing their results (see
+    `cache.link_simulation_dir`) are analyzed one after the other by the
+    same process, so that their analysis directory is never written
+    concurrently. The figures are exported by `exporter` in this process as
+    the analyses finish.
+
+    Parameters
+    ----------
+    configs : list[Config]
+        Configurations whose simulation to analyze
+    jobs : int
+        Number of processes analyzing simulations in parallel
+    force : bool, default False
+        Compute every analysis product again, even if up to date
+    exporter : ImageExporter | None, default None
+        Renderer pool exporting the figures of the analyses to PNG
+    simulations_dir : Path | None, default None
+        Directory containing all simulations (default: simulations/)
+
+    Returns
+    -------
+    list[AnalyzedRun]
+        Outcome of each analysis, in the order of the configurations
+    """
+    simulations_dir = simulations_dir or root_dir / "simulations"
+    configs = list(
+        {f"{config.name}_{config.hash}": config for config in configs}.values()
+    )
+
+    # runs sharing a directory, analyzed one after the other
+    tasks: dict[Path, list[tuple[Config, Path, bool]]] = {}
+    for config in configs:
+        simulation_dir = simulations_dir / f"{config.name}_{config.hash}"
+        tasks.setdefault(simulation_dir.resolve(), []).append(
+            (config, simulation_dir, force)
+        )
+
+    jobs = max(1, min(jobs, len(tasks)))
+    load_print(
+        f"Analyzing {len(configs)} simulations with {jobs} parallel jobs...",
+        end="\n",
+    )
+    progress = _AnalysisProgress(len(configs))
+    results: dict[str, AnalyzedRun] = {}
+
+    def collect(runs: list[AnalyzedRun]) -> None:
+        for run in runs:
+            results[run.simulation_dir.name] = run
+            progress.finish(run)
+            if run.state == "failed":
+                error_print(f"Analysis of {run.name} failed: {run.detail}")
+            elif exporter is not None:
+                exporter.submit(stale_images(run.simulation_dir / "analysis"))
+
+    if jobs == 1:
+        for task in tasks.values():
+            collect(_analyze_many(task))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            pending = {
+                executor.submit(_analyze_many, task): task
+                for task in tasks.values()
+            }
+            for future in as_completed(pending):
+                try:
+                    runs = future.result()
+                except Exception as e:
+                    # e.g. a worker killed by the out-of-memory killer
+                    runs = [
+                        AnalyzedRun(
+                            config.name, "failed", simulation_dir, str(e)
+                        )
+                        for config, simulation_dir, _ in pending[future]
+                    ]
+                collect(runs)
+    progress.close()
+
+    analyzed = [results[_key(config)] for config in configs]
+    n_failed = sum(run.state == "failed" for run in analyzed)
+    if n_failed:
+        error_print(
+            f"{len(analyzed) - n_failed}/{len(analyzed)} analyses"
+            " completed successfully"
+        )
+    else:
+        done_print(f"All {len(analyzed)} analyses completed successfully")
+    return analyzed
+
+
+def physical_cores() -> int:
+    """
+    Number of physical CPU cores on this machine.
+
+    Hyper-threads are not counted since SWASH runs are compute-bound and gain
+    little from sharing a core. Falls back to the number of logical CPUs if
+    the topology can't be read.
+
+    Returns
+    -------
+    int
+        Number of physical cores (at least 1)
+    """
+    cores = set()
+    physical_id = core_id = None
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key = key.strip()
+                if key == "physical id":
+                    physical_id = value.strip()
+                elif key == "core id":
+                    core_id = value.strip()
+                elif not key and core_id is not None:
+                    cores.add((physical_id, core_id))
+                    physical_id = core_id = None
+        if core_id is not None:
+            cores.add((physical_id, core_id))
+    except OSError:
+        pass
+    return len(cores) or os.cpu_count() or 1
+
+
+############
+# internal #
+############
+
+
+class _BatchProgress:
+    """Thread-safe aggregated progress over the simulated time of all runs."""
+
+    def __init__(self, configs: list[Config]) -> None:
+        self._lock = threading.Lock()
+        self._times: dict[str, float] = {}
+        self._running = 0
+        self._done = 0
+        self._failed = 0
+        self._bar = tqdm.tqdm(
+            total=int(sum(config.simulation_duration for config in configs)),
+            desc="[*] SWASH Progress",
+            unit="s",
+            bar_format="{l_bar}{bar}| {n}/{total} simulated s [{elapsed}<{remaining}]{postfix}",
+            leave=False,
+            position=0,
+            dynamic_ncols=True,
+        )
+        self._update_postfix()
+
+    def start(self, config: Config) -> None:
+        with self._lock:
+            self._times[_key(config)] = 0.0
+            self._running += 1
+            self._update_postfix()
+
+    def update(self, config: Config, sim_time: float) -> None:
+        with self._lock:
+            self._times[_key(config)] = min(
+                sim_time, config.simulation_duration
+            )
+            self._bar.n = int(sum(self._times.values()))
+            self._bar.refresh()
+
+    def finish(self, config: Config, success: bool) -> None:
+        with self._lock:
+            self._times[_key(config)] = config.simulation_duration
+            self._running = max(0, self._running - 1)
+            if success:
+                self._done += 1
+            else:
+                self._failed += 1
+            self._bar.n = int(sum(self._times.values()))
+            self._update_postfix()
+
+    def close(self) -> None:
+        self._bar.close()
+
+    def _update_postfix(self) -> None:
+        self._bar.set_postfix_str(
+            f"running {self._running}, done {self._done},"
+            f" failed {self._failed}"
+        )
+
+
+class _AnalysisProgress:
+    """Progress over the analyzed, skipped and failed runs of a batch."""
+
+    def __init__(self, n_runs: int) -> None:
+        self._counts = {"analyzed": 0, "skipped": 0, "failed": 0}
+        self._bar = tqdm.tqdm(
+            total=n_runs,
+            desc="[*] Analysis Progress",
+            unit="run",
+            leave=False,
+            position=0,
+            dynamic_ncols=True,
+        )
+        self._update_postfix()
+
+    def finish(self, run: AnalyzedRun) -> None:
+        self._counts[run.state] += 1
+        self._bar.update(1)
+        self._update_postfix()
+
+    def close(self) -> None:
+        self._bar.close()
+
+    def _update_postfix(self) -> None:
+        self._bar.set_postfix_str(
+            ", ".join(f"{state} {n}" for state, n in self._counts.items())
+        )
+
+
+def _key(config: Config) -> str:
+    return f"{config.name}_{config.hash}"
+
+
+def _print_resources(configs: list[Config]) -> None:
+    """Print the resources used by each run, and their totals."""
+    rows = []
+    for config in configs:
+        swash_dir = (
+            root_dir / "simulations" / f"{config.name}_{config.hash}" / "swash"
+        )
+        usage = ResourceUsage.from_dict(
+            cache.read_manifest(swash_dir).get("resources", {})
+        )
+        if usage is not None:
+            rows.append((config.name, usage))
+    if not rows:
+        return
+
+    name_width = max(4, *(len(name) for name, _ in rows))
+    print(
+        f"{'name':<{name_width}}  {'wall':>8}  {'cpu':>8}  {'peak rss':>10}"
+        f"  {'written':>10}  {'sim s/s':>7}"
+    )
+    for name, usage in rows:
+        print(
+            f"{name:<{name_width}}  {usage.wall_time:>7.1f}s"
+            f"  {usage.user_time + usage.system_time:>7.1f}s"
+            f"  {format_bytes(usage.peak_rss):>10}"
+            f"  {format_bytes(usage.bytes_written):>10}"
+            f"  {usage.speed:>7.2f}"
+        )
+    print(
+        f"{'total':<{name_width}}"
+        f"  {sum(usage.wall_time for _, usage in rows):>7.1f}s"
+        f"  {sum(u.user_time + u.system_time for _, u in rows):>7.1f}s"
+        f"  {format_bytes(max(usage.peak_rss for _, usage in rows)):>10}"
+        f"  {format_bytes(sum(usage.bytes_written for _, usage in rows)):>10}"
+    )
+
+
+def _run_one(
+    config: Config,
+    progress: _BatchProgress,
+    force: bool,
+    scratch: Path | None,
+    compression: Compression,
+    exporter: ImageExporter | None,
+) -> bool:
+    progress.start(config)
+    return run_simulation(
+        config,
+        force=force,
+        echo=False,
+        scratch=scratch,
+        compression=compression,
+        exporter=exporter,
+        on_progress=lambda sim_time: progress.update(config, sim_time),
+    )
+
+
+def _analyze_many(
+    task: list[tuple[Config, Path, bool]],
+) -> list[AnalyzedRun]:
+    return [
+        _analyze_one(config, simulation_dir, force)
+        for config, simulation_dir, force in task
+    ]
+
+
+def _analyze_one(
+    config: Config, simulation_dir: Path, force: bool
+) -> AnalyzedRun:
+    """Analyze a simulation, reporting its failure instead of raising."""
+    if not (simulation_dir / "swash").exists():
+        return AnalyzedRun(
+            config.name, "failed", simulation_dir, "no simulation results"
+        )
+    try:
+        from .analysis import analyze_simulation
+
+        results = analyze_simulation(simulation_dir, config, force=force)
+    except Exception as e:
+        return AnalyzedRun(config.name, "failed", simulation_dir, str(e))
+    if "error" in results:
+        return AnalyzedRun(
+            config.name, "failed", simulation_dir, str(results["error"])
+        )
+    updated = results.get("updated")
+    if updated == []:
+        return AnalyzedRun(
+            config.name, "skipped", simulation_dir, "up to date"
+        )
+    return AnalyzedRun(
+        config.name, "analyzed", simulation_dir, ", ".join(updated or [])
+    )
+
+
+def _prepare_one(args: tuple[Config, Path, bool, Path]) -> bool:
+    config, swash_dir, write_hotstart, template_dir = args
+    return prepare_inputs(
+        config,
+        swash_dir,
+        template_dir=template_dir,
+        write_hotstart=write_hotstart,
+    )
@@ -0,0 +1,689 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import UTC, datetime
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from . import utils
+from .compression import find_output, output_exists
+from .config import Config
+
+#########
+# types #
+#########
+
+MANIFEST_FILE = "run.json"
+
+# manifest of the input files of a run, with what each was generated from
+INPUT_MANIFEST_FILE = "inputs.json"
+
+# directory of `simulations/` holding the results, one per physics hash
+STORE_DIR = ".store"
+
+# prefix of the store entries holding spin-ups shared by hot-started runs
+SPINUP_PREFIX = "spinup_"
+
+# prefix of the directories holding outputs published from a scratch
+# directory, which the `swash` directory of the result links to
+PUBLISHED_PREFIX = ".swash-"
+
+# manifest of `analysis/`, with what each analysis product was computed from
+ANALYSIS_MANIFEST_FILE = "analysis.json"
+
+# analysis products, with the files that must exist for each to be up to date
+ANALYSIS_PRODUCTS = {
+    "wave_statistics": ["wave_statistics.csv"],
+    "time_series": ["water_levels_and_x_velocity.json"],
+    "diagram": ["swash_diagram.json"],
+}
+
+# modules whose code computes the analysis products (see `analysis_version`)
+ANALYSIS_SOURCES = [
+    "analysis.py",
+    "gauges.py",
+    "geometry.py",
+    "wave_analysis.py",
+    "utils/plotting.py",
+]
+
+############
+# external #
+############
+
+
+def compute_run_key(
+    config: Config, rendered_input: str, template_path: Path
+) -> str:
+    """
+    Compute the cache key identifying a SWASH run.
+
+    The key combines the physics hash of the configuration, the rendered INPUT
+    file and the digest of the template it was rendered from, so that a change
+    to either the configuration or the template invalidates previous results.
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    rendered_input : str
+        Content of the rendered SWASH INPUT file
+    template_path : Path
+        Path to the INPUT template
+
+    Returns
+    -------
+    str
+        Cache key for the run
+    """
+    hash_ = hashlib.sha256()
+    hash_.update(config.physics_hash.encode())
+    hash_.update(file_digest(template_path).encode())
+    hash_.update(rendered_input.encode())
+    return hash_.hexdigest()[:16]
+
+
+def link_simulation_dir(config: Config, simulations_dir: Path) -> Path:
+    """
+    Get the simulation directory of a configuration, backed by the store.
+
+    Results are stored once per physics hash in `<simulations_dir>/.store/`
+    and `<simulations_dir>/<name>_<hash>` is a symbolic link to them, so
+    configurations with the same physics under different names share a single
+    run. A pre-existing real directory is moved into the store if the store
+    doesn't have these results yet, and is otherwise left untouched.
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    simulations_dir : Path
+        Directory containing all simulations
+
+    Returns
+    -------
+    Path
+        Simulation directory (`<simulations_dir>/<name>_<hash>`)
+    """
+    link = simulations_dir / f"{config.name}_{config.hash}"
+    target = simulations_dir / STORE_DIR / config.physics_hash
+
+    if link.is_symlink():
+        if link.resolve() == target.resolve():
+            target.mkdir(parents=True, exist_ok=True)
+            return link
+        link.unlink()
+    elif link.exists():
+        if target.exists():
+            return link
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(link, target)
+
+    target.mkdir(parents=True, exist_ok=True)
+    try:
+        link.symlink_to(Path(STORE_DIR) / config.physics_hash)
+    except FileExistsError:
+        # created concurrently by another worker
+        pass
+    return link
+
+
+def spinup_dir(spinup: Config, simulations_dir: Path) -> Path:
+    """
+    Directory holding a spin-up run shared by hot-started configurations.
+
+    Parameters
+    ----------
+    spinup : Config
+        Configuration of the spin-up (see `simulation.spinup_config`)
+    simulations_dir : Path
+        Directory containing all simulations
+
+    Returns
+    -------
+    Path
+        Spin-up directory (`<simulations_dir>/.store/spinup_<physics hash>`)
+    """
+    return (
+        simulations_dir / STORE_DIR / f"{SPINUP_PREFIX}{spinup.physics_hash}"
+    )
+
+
+def file_digest(path: Path) -> str:
+    """
+    Compute the sha256 digest of a file, or an empty string if it's missing.
+
+    Parameters
+    ----------
+    path : Path
+        File to digest
+
+    Returns
+    -------
+    str
+        Hex digest of the file content
+    """
+    if not path.exists():
+        return ""
+    hash_ = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+def read_manifest(swash_dir: Path) -> dict[str, Any]:
+    """
+    Read the run manifest of a simulation.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+
+    Returns
+    -------
+    dict[str, Any]
+        Manifest content, empty if there is no valid manifest
+    """
+    path = swash_dir / MANIFEST_FILE
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def write_manifest(swash_dir: Path, manifest: dict[str, Any]) -> None:
+    """
+    Atomically write the run manifest of a simulation.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+    manifest : dict[str, Any]
+        Manifest content
+    """
+    path = swash_dir / MANIFEST_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def update_manifest(swash_dir: Path, values: dict[str, Any]) -> None:
+    """
+    Add or replace entries of the run manifest of a simulation.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+    values : dict[str, Any]
+        Entries to write
+    """
+    write_manifest(swash_dir, {**read_manifest(swash_dir), **values})
+
+
+def clear_manifest(swash_dir: Path) -> None:
+    """
+    Remove the run manifest so that an interrupted run is never considered
+    complete.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+    """
+    (swash_dir / MANIFEST_FILE).unlink(missing_ok=True)
+
+
+def read_input_manifest(swash_dir: Path) -> dict[str, Any]:
+    """
+    Read the manifest of the input files of a simulation.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+
+    Returns
+    -------
+    dict[str, Any]
+        Entry of each input file (see `record_inputs`), empty if there is no
+        valid manifest
+    """
+    try:
+        with open(swash_dir / INPUT_MANIFEST_FILE) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def is_input_current(
+    swash_dir: Path,
+    manifest: dict[str, Any],
+    name: str,
+    sources: dict[str, str],
+) -> bool:
+    """
+    Check whether an input file was generated from the given sources.
+
+    The file must have been recorded with the same sources (e.g. the hashes
+    of the configuration sections it derives from) and left untouched since,
+    which is checked with its modification time.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+    manifest : dict[str, Any]
+        Input manifest (see `read_input_manifest`)
+    name : str
+        Name of the input file
+    sources : dict[str, str]
+        Hashes of what the file is generated from
+
+    Returns
+    -------
+    bool
+        Whether the file can be kept as is
+    """
+    entry = manifest.get(name)
+    if not isinstance(entry, dict) or entry.get("sources") != sources:
+        return False
+    try:
+        return (swash_dir / name).stat().st_mtime_ns == entry.get("mtime_ns")
+    except OSError:
+        return False
+
+
+def record_inputs(
+    swash_dir: Path,
+    manifest: dict[str, Any],
+    inputs: dict[str, dict[str, str]],
+) -> None:
+    """
+    Record the sources of newly written input files in the input manifest.
+
+    The manifest is updated in place and atomically written. Files that
+    don't exist aren't recorded.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the simulation
+    manifest : dict[str, Any]
+        Input manifest (see `read_input_manifest`)
+    inputs : dict[str, dict[str, str]]
+        Hashes of what each written file was generated from, by file name
+    """
+    for name, sources in inputs.items():
+        try:
+            mtime_ns = (swash_dir / name).stat().st_mtime_ns
+        except OSError:
+            manifest.pop(name, None)
+            continue
+        manifest[name] = {"sources": sources, "mtime_ns": mtime_ns}
+    path = swash_dir / INPUT_MANIFEST_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def publish_run(run_dir: Path, swash_dir: Path) -> None:
+    """
+    Move the outputs of a run done in a scratch directory into `swash_dir`.
+
+    The outputs are first moved next to `swash_dir` (on the same filesystem)
+    and `swash_dir`, a symbolic link to the published outputs, is then
+    switched to them with a single atomic rename, so that readers see either
+    the previous results or the complete new ones, never partially written
+    files. A `swash_dir` that is a real directory (written in place) is moved
+    aside first.
+
+    Parameters
+    ----------
+    run_dir : Path
+        Directory the run was done in, left empty
+    swash_dir : Path
+        SWASH directory of the simulation
+    """
+    parent = swash_dir.parent
+    published = Path(tempfile.mkdtemp(prefix=PUBLISHED_PREFIX, dir=parent))
+    published.chmod(0o755)
+    for path in run_dir.iterdir():
+        shutil.move(path, published / path.name)
+
+    previous = None
+    if swash_dir.is_symlink():
+        previous = swash_dir.resolve()
+    elif swash_dir.exists():
+        previous = parent / f"{published.name}.old"
+        os.replace(swash_dir, previous)
+
+    link = parent / f"{published.name}.link"
+    link.symlink_to(published.name)
+    os.replace(link, swash_dir)
+
+    # never follow a link out of the result directory
+    if previous is not None and previous.resolve().parent == parent.resolve():
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def stale_publications(result_dir: Path) -> list[Path]:
+    """
+    Published outputs of a result its `swash` directory doesn't link to.
+
+    They are left behind by publications interrupted before completing (see
+    `publish_run`), along with their temporary links.
+
+    Parameters
+    ----------
+    result_dir : Path
+        Result directory of the store
+
+    Returns
+    -------
+    list[Path]
+        Directories that can be removed
+    """
+    swash_dir = result_dir / "swash"
+    current = swash_dir.resolve() if swash_dir.is_symlink() else None
+    return [
+        path
+        for path in sorted(result_dir.glob(f"{PUBLISHED_PREFIX}*"))
+        if path.is_symlink() or path.resolve() != current
+    ]
+
+
+def record_run(
+    config: Config, swash_dir: Path, *, run_key: str, success: bool
+) -> None:
+    """
+    Complete the manifest of a finished SWASH run.
+
+    Entries recorded during the run (e.g. the SWASH exit code) are kept. The
+    configuration is recorded too, so that past runs can be used to estimate
+    the cost of new ones (see `estimate`).
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    swash_dir : Path
+        SWASH directory of the simulation
+    run_key : str
+        Cache key of the run (see `compute_run_key`)
+    success : bool
+        Whether SWASH completed without errors
+    """
+    update_manifest(
+        swash_dir,
+        {
+            "run_key": run_key,
+            "physics_hash": config.physics_hash,
+            "config": config.model_dump(),
+            "status": "completed" if success else "failed",
+            "outputs": expected_outputs(
+                config, truncated="truncation" in read_manifest(swash_dir)
+            ),
+            "finished_at": datetime.now(UTC).isoformat(),
+        },
+    )
+
+
+def expected_outputs(config: Config, truncated: bool = False) -> list[str]:
+    """
+    Files a complete SWASH run of the configuration must have produced.
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    truncated : bool, default False
+        Whether the run was stopped once converged, in which case SWASH didn't
+        write its normal end marker
+
+    Returns
+    -------
+    list[str]
+        File names relative to the SWASH directory
+    """
+    return [
+        "PRINT",
+        *([] if truncated else ["norm_end"]),
+        *(
+            f"wg{i+1:02d}.txt"
+            for i in range(len(config.numeric.wave_gauge_positions))
+        ),
+    ]
+
+
+def is_run_complete(config: Config, swash_dir: Path, run_key: str) -> bool:
+    """
+    Check whether the SWASH directory already holds a complete run.
+
+    A run is complete if its manifest records a successful run with the same
+    cache key and every expected output file is still present (compressed or
+    not).
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    swash_dir : Path
+        SWASH directory of the simulation
+    run_key : str
+        Cache key of the run (see `compute_run_key`)
+
+    Returns
+    -------
+    bool
+        Whether the run can be reused
+    """
+    manifest = read_manifest(swash_dir)
+    outputs = expected_outputs(config, truncated="truncation" in manifest)
+    return (
+        manifest.get("status") == "completed"
+        and manifest.get("run_key") == run_key
+        and all(output_exists(swash_dir / file) for file in outputs)
+    )
+
+
+def analysis_version() -> str:
+    """
+    Version of the analysis code, the digest of `ANALYSIS_SOURCES`.
+
+    Any change to the code computing the analysis products makes the
+    products computed before it out of date.
+
+    Returns
+    -------
+    str
+        Version key of the analysis
+    """
+    return _analysis_version(Path(__file__).parent)
+
+
+def analysis_inputs(
+    config: Config, simulation_dir: Path
+) -> dict[str, dict[str, str]]:
+    """
+    Compute the digests of what each analysis product is computed from.
+
+    The gauge products (wave statistics and time series) depend on the gauge
+    outputs, the INPUT file (holding the output time step) and the gauge
+    positions, the time series also showing the breakwater. The diagram only
+    depends on the geometry, the vegetation and the water level. Every
+    product also depends on the analysis version (see `analysis_version`).
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+    simulation_dir : Path
+        Simulation directory (containing `swash/` and `analysis/`)
+
+    Returns
+    -------
+    dict[str, dict[str, str]]
+        Digests of the inputs, by product (see `ANALYSIS_PRODUCTS`)
+    """
+    swash_dir = simulation_dir / "swash"
+    gauges = hashlib.sha256()
+    for file in expected_outputs(config):
+        if file.startswith("wg"):
+            path = find_output(swash_dir / file)
+            if path is not None:
+                gauges.update(file_digest(path).encode())
+            gauges.update(b"\0")
+    version = analysis_version()
+    gauge_inputs = {
+        "version": version,
+        "gauges": gauges.hexdigest(),
+        "input": file_digest(swash_dir / "INPUT"),
+        "positions": utils.validators.hash_dict(
+            {"positions": config.numeric.wave_gauge_positions}
+        ),
+    }
+    return {
+        "wave_statistics": gauge_inputs,
+        "time_series": {**gauge_inputs, "breakwater": config.breakwater.hash},
+        "diagram": {
+            "version": version,
+            "grid": config.grid.hash,
+            "breakwater": config.breakwater.hash,
+            "bathymetry": config.bathymetry.hash,
+            "vegetation": config.vegetation.hash,
+            "water": config.water.hash,
+        },
+    }
+
+
+def read_analysis_manifest(analysis_dir: Path) -> dict[str, Any]:
+    """
+    Read the manifest of the analysis products of a simulation.
+
+    Parameters
+    ----------
+    analysis_dir : Path
+        Analysis directory of the simulation
+
+    Returns
+    -------
+    dict[str, Any]
+        Inputs of each product (see `record_analysis`), empty if there is no
+        valid manifest
+    """
+    try:
+        with open(analysis_dir / ANALYSIS_MANIFEST_FILE) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def stale_analysis_products(
+    analysis_dir: Path,
+    manifest: dict[str, Any],
+    inputs: dict[str, dict[str, str]],
+) -> list[str]:
+    """
+    Find the analysis products that must be computed again.
+
+    A product is up to date if it was recorded with the same inputs (analysis
+    version included) and its files still exist.
+
+    Parameters
+    ----------
+    analysis_dir : Path
+        Analysis directory of the simulation
+    manifest : dict[str, Any]
+        Analysis manifest (see `read_analysis_manifest`)
+    inputs : dict[str, dict[str, str]]
+        Current inputs of each product (see `analysis_inputs`)
+
+    Returns
+    -------
+    list[str]
+        Out of date products, in the order of `ANALYSIS_PRODUCTS`
+    """
+    return [
+        product
+        for product, files in ANALYSIS_PRODUCTS.items()
+        if manifest.get(product) != inputs.get(product)
+        or not all((analysis_dir / file).exists() for file in files)
+    ]
+
+
+def record_analysis(
+    analysis_dir: Path,
+    manifest: dict[str, Any],
+    inputs: dict[str, dict[str, str]],
+) -> None:
+    """
+    Record the inputs of newly computed analysis products in the manifest.
+
+    The manifest is updated in place and atomically written.
+
+    Parameters
+    ----------
+    analysis_dir : Path
+        Analysis directory of the simulation
+    manifest : dict[str, Any]
+        Analysis manifest (see `read_analysis_manifest`)
+    inputs : dict[str, dict[str, str]]
+        Inputs of each computed product
+    """
+    manifest.update(inputs)
+    path = analysis_dir / ANALYSIS_MANIFEST_FILE
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_analysis_complete(simulation_dir: Path, config: Config) -> bool:
+    """
+    Check whether the analysis products are up to date with the SWASH run.
+
+    Parameters
+    ----------
+    simulation_dir : Path
+        Simulation directory (containing `swash/` and `analysis/`)
+    config : Config
+        Configuration of the simulation
+
+    Returns
+    -------
+    bool
+        Whether no analysis product is out of date (see
+        `stale_analysis_products`)
+    """
+    analysis_dir = simulation_dir / "analysis"
+    return not stale_analysis_products(
+        analysis_dir,
+        read_analysis_manifest(analysis_dir),
+        analysis_inputs(config, simulation_dir),
+    )
+
+
+############
+# internal #
+############
+
+
+@cache
+def _analysis_version(source_dir: Path) -> str:
+    hash_ = hashlib.sha256()
+    for source in ANALYSIS_SOURCES:
+        hash_.update(file_digest(source_dir / source).encode())
+    return hash_.hexdigest()[:16]
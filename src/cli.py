@@ -1,6 +1,8 @@
 import glob
 import itertools
 import shutil
+import time
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
 
 import typer
@@ -8,8 +10,20 @@ import typer
 from src.dashboard import run_server
 from src.utils.print import done_print, error_print, load_print
 
+from .batch import analyze_batch, physical_cores, prepare_batch, run_batch
+from .cache import STORE_DIR, spinup_dir, stale_publications
+from .compression import COMPRESSIONS, check_compression
 from .config import Config, read_config, write_config
-from .simulation import run_simulation
+from .estimate import (
+    POLICIES,
+    CostModel,
+    estimate_makespan,
+    fit_cost_model,
+    schedule,
+)
+from .export import FIGURE_FILES, ImageExporter, stale_images
+from .jobs import STATES, get_queue, run_worker
+from .simulation import run_simulation, spinup_config
 from .utils.paths import root_dir
 
 ############
@@ -56,6 +70,23 @@ def _init_cli() -> typer.Typer:
     cli.command("cc", hidden=True)(_clean)
     cli.command("analyze")(_analyze)
     cli.command("a", hidden=True)(_analyze)
+    cli.command("estimate")(_estimate)
+    cli.command("e", hidden=True)(_estimate)
+    cli.command("prepare")(_prepare)
+    cli.command("p", hidden=True)(_prepare)
+    cli.command("export")(_export)
+    cli.command("x", hidden=True)(_export)
+
+    queue_cli = typer.Typer(
+        help="Persistent queue of simulations, resumable after a crash.",
+        no_args_is_help=True,
+    )
+    queue_cli.command("add")(_queue_add)
+    queue_cli.command("ls")(_queue_ls)
+    queue_cli.command("resume")(_queue_resume)
+    queue_cli.command("retry")(_queue_retry)
+    cli.add_typer(queue_cli, name="queue")
+    cli.add_typer(queue_cli, name="q", hidden=True)
     return cli
 
 
@@ -88,15 +119,204 @@ def _run(
         ...,
         help="Files or directories containing the experiment configuration",
     ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of simulations to run in parallel (default: number of physical cores)",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Run SWASH even if a complete run with the same inputs exists",
+    ),
+    policy: str = typer.Option(
+        "name",
+        "--policy",
+        "-p",
+        help=f"Order of the runs ({', '.join(POLICIES)}), see `swg estimate`",
+    ),
+    budget: float | None = typer.Option(
+        None,
+        "--budget",
+        "-b",
+        help="Core-hours available, for the budget policy",
+    ),
+    scratch: Path | None = typer.Option(
+        None,
+        "--scratch",
+        "-s",
+        help="Run SWASH in this directory (e.g. /dev/shm) and publish the results once finished",
+    ),
+    compression: str = typer.Option(
+        "none",
+        "--compress",
+        "-z",
+        help=f"Compression of PRINT and the gauge outputs once finished ({', '.join(COMPRESSIONS)})",
+    ),
+    images: bool = typer.Option(
+        True,
+        "--images/--no-images",
+        help="Export the analysis figures to PNG in the background (the dashboard only needs their JSON)",
+    ),
 ) -> None:
     """
     (r) Runs the experiment.
     """
+    configs_ = []
+    for config_ in _expand_paths(configs):
+        path = Path(config_)
+        config = read_config(path)
+        write_config(config, path)
+        configs_.append(config)
+
+    _check_compression(compression)
+    configs_, skipped = _schedule(configs_, policy=policy, budget=budget)
+    for config in skipped:
+        error_print(f"Skipping {config.name}, over the budget")
+
+    if jobs is None:
+        jobs = physical_cores()
+
+    with _image_exporter(images) as exporter:
+        if jobs <= 1 or len(configs_) <= 1:
+            for config in configs_:
+                run_simulation(
+                    config,
+                    force=force,
+                    scratch=scratch,
+                    compression=compression,
+                    exporter=exporter,
+                )
+        else:
+            run_batch(
+                configs_,
+                jobs=jobs,
+                force=force,
+                scratch=scratch,
+                compression=compression,
+                exporter=exporter,
+            )
+
+
+def _estimate(
+    configs: list[str] = typer.Argument(
+        ...,
+        help="Files or directories containing the experiment configuration",
+    ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of simulations run in parallel (default: number of physical cores)",
+    ),
+    policy: str = typer.Option(
+        "name",
+        "--policy",
+        "-p",
+        help=f"Order of the runs ({', '.join(POLICIES)})",
+    ),
+    budget: float | None = typer.Option(
+        None,
+        "--budget",
+        "-b",
+        help="Core-hours available, for the budget policy",
+    ),
+) -> None:
+    """
+    (e) Estimates the wall time of running the experiment.
+
+    The cost of each run is predicted by a model fitted on the timings of the
+    runs recorded in simulations/.
+    """
+    configs_ = [read_config(Path(config)) for config in _expand_paths(configs)]
+    if not configs_:
+        error_print("No configurations found.")
+        raise typer.Exit(1)
+    if jobs is None:
+        jobs = physical_cores()
+
+    model = fit_cost_model(root_dir / "simulations")
+    scheduled, skipped = _schedule(
+        configs_, policy=policy, budget=budget, model=model
+    )
+
+    # configs sharing their physics are only simulated once
+    costs, seen = [], set()
+    for config in scheduled:
+        costs.append(
+            0.0 if config.physics_hash in seen else model.predict(config)
+        )
+        seen.add(config.physics_hash)
+
+    name_width = max(4, *(len(config.name) for config in configs_))
+    print(f"{'name':<{name_width}}  {'simulated':>9}  {'estimate':>9}  note")
+    for config, cost in zip(scheduled, costs):
+        note = "" if cost else "shares a run"
+        print(
+            f"{config.name:<{name_width}}  {config.simulation_duration:>8g}s"
+            f"  {_format_duration(cost):>9}  {note}"
+        )
+    for config in skipped:
+        print(
+            f"{config.name:<{name_width}}  {config.simulation_duration:>8g}s"
+            f"  {_format_duration(model.predict(config)):>9}  over budget"
+        )
+
+    n_runs = (
+        f"fitted on {model.n_runs} recorded runs"
+        if model.n_runs
+        else "no recorded runs yet, using the default cost"
+    )
+    done_print(
+        f"{sum(costs) / 3600:.2f} core-hours,"
+        f" about {_format_duration(estimate_makespan(costs, jobs))}"
+        f" with {jobs} parallel jobs ({n_runs})"
+    )
+
+
+def _prepare(
+    configs: list[str] = typer.Argument(
+        ...,
+        help="Files or directories containing the experiment configuration",
+    ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of processes generating inputs in parallel (default: number of physical cores)",
+    ),
+) -> None:
+    """
+    (p) Generates the SWASH inputs of the experiment without running it.
+
+    Prints the SWASH directory of each configuration, e.g. to submit them to
+    a cluster. Hot-started configurations need their spin-up to run first
+    and its hotstart file copied in their directory.
+    """
+    configs_ = []
     for config_ in _expand_paths(configs):
         path = Path(config_)
         config = read_config(path)
         write_config(config, path)
-        run_simulation(config)
+        configs_.append(config)
+    if not configs_:
+        error_print("No configurations found.")
+        raise typer.Exit(1)
+    if jobs is None:
+        jobs = physical_cores()
+
+    prepared = prepare_batch(configs_, jobs=jobs)
+
+    name_width = max(4, *(len(run.name) for run in prepared))
+    print(f"{'name':<{name_width}}  {'state':<8}  {'swash':<40}  spin-up")
+    for run in prepared:
+        print(
+            f"{run.name:<{name_width}}  {run.state:<8}"
+            f"  {str(_relative(run.swash_dir)):<40}"
+            f"  {'' if run.spinup_dir is None else _relative(run.spinup_dir)}"
+        )
 
 
 def _run_dashboard() -> None:
@@ -124,7 +344,10 @@ def _clean(
     (cc) Clean up simulation directories that don't have corresponding configs.
 
     This command removes simulation directories in the simulations/ folder that
-    don't correspond to any configuration file in the config/ directory.
+    don't correspond to any configuration file in the config/ directory, as
+    well as stored results that no simulation directory links to anymore,
+    spin-ups no configuration hot-starts from and outputs left behind by
+    interrupted runs in a scratch directory.
     """
     config_dir = root_dir / "config"
     simulations_dir = root_dir / "simulations"
@@ -133,20 +356,26 @@ def _clean(
         done_print("No simulations directory found, nothing to clean.")
         return
 
-    # Get all config names and their hashes
+    # Get all config names and their hashes, and the spin-ups they use
     config_hashes = {}
+    spinup_dirs = set()
     if config_dir.exists():
         for config_file in config_dir.glob("*.yml"):
             try:
                 config = read_config(config_file)
                 config_hashes[config.name] = config.hash
+                spinup = spinup_config(config)
+                if spinup is not None:
+                    spinup_dirs.add(spinup_dir(spinup, simulations_dir).name)
             except Exception as e:
                 error_print(f"Error reading config {config_file}: {e}")
 
     # Find orphaned simulation directories
     orphaned_dirs = []
     for sim_dir in simulations_dir.iterdir():
-        if not sim_dir.is_dir():
+        if sim_dir.name == STORE_DIR or not (
+            sim_dir.is_dir() or sim_dir.is_symlink()
+        ):
             continue
 
         # Parse directory name (format: <name>_<hash>)
@@ -161,6 +390,29 @@ def _clean(
         if name not in config_hashes or config_hashes[name] != dir_hash:
             orphaned_dirs.append(sim_dir)
 
+    # Find stored results no remaining simulation directory links to
+    store_dir = simulations_dir / STORE_DIR
+    if store_dir.exists():
+        linked = {
+            sim_dir.resolve()
+            for sim_dir in simulations_dir.iterdir()
+            if sim_dir.is_symlink() and sim_dir not in orphaned_dirs
+        }
+        orphaned_dirs.extend(
+            result_dir
+            for result_dir in sorted(store_dir.iterdir())
+            if result_dir.is_dir()
+            and result_dir.resolve() not in linked
+            and result_dir.name not in spinup_dirs
+        )
+        # and outputs left behind by interrupted scratch runs
+        orphaned_dirs.extend(
+            path
+            for result_dir in sorted(store_dir.iterdir())
+            if result_dir.is_dir() and result_dir not in orphaned_dirs
+            for path in stale_publications(result_dir)
+        )
+
     if not orphaned_dirs:
         done_print("No orphaned simulation directories found.")
         return
@@ -185,7 +437,10 @@ def _clean(
     deleted_count = 0
     for dir_path in orphaned_dirs:
         try:
-            shutil.rmtree(dir_path)
+            if dir_path.is_symlink():
+                dir_path.unlink()
+            else:
+                shutil.rmtree(dir_path)
             deleted_count += 1
         except Exception as e:
             error_print(f"Error deleting {dir_path}: {e}")
@@ -198,46 +453,334 @@ def _analyze(
         ...,
         help="Files or directories containing the experiment configuration to analyze",
     ),
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of processes analyzing simulations in parallel (default: number of physical cores)",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Compute every analysis product again, even if up to date",
+    ),
+    images: bool = typer.Option(
+        True,
+        "--images/--no-images",
+        help="Export the analysis figures to PNG in the background (the dashboard only needs their JSON)",
+    ),
 ) -> None:
     """
     (a) Analyze completed simulations and generate wave energy plots.
+
+    Only the analysis products whose inputs (gauge outputs, configuration) or
+    analysis code changed since they were computed are computed again. With
+    several simulations, they are analyzed in parallel and a summary of the
+    analyzed, skipped (up to date) and failed runs is printed.
     """
+    configs_ = [
+        read_config(Path(config_)) for config_ in _expand_paths(configs)
+    ]
+    if jobs is None:
+        jobs = physical_cores()
+
+    if jobs > 1 and len(configs_) > 1:
+        with _image_exporter(images) as exporter:
+            analyzed = analyze_batch(
+                configs_,
+                jobs=jobs,
+                force=force,
+                exporter=exporter,
+                simulations_dir=root_dir / "simulations",
+            )
+        name_width = max(4, *(len(run.name) for run in analyzed))
+        print(f"{'name':<{name_width}}  {'state':<8}  details")
+        for run in analyzed:
+            print(f"{run.name:<{name_width}}  {run.state:<8}  {run.detail}")
+        return
+
     from .analysis import analyze_simulation
 
+    with _image_exporter(images) as exporter:
+        for config in configs_:
+            # Find simulation directory
+            simulation_dir = (
+                root_dir / "simulations" / f"{config.name}_{config.hash}"
+            )
+
+            if not simulation_dir.exists():
+                error_print(
+                    f"Simulation directory not found: {simulation_dir}"
+                )
+                continue
+
+            swash_dir = simulation_dir / "swash"
+            if not swash_dir.exists():
+                error_print(f"SWASH output directory not found: {swash_dir}")
+                continue
+
+            load_print(f"Analyzing simulation {config.name}...")
+            try:
+                analysis_results = analyze_simulation(
+                    simulation_dir, config, force=force, exporter=exporter
+                )
+
+                if "error" in analysis_results:
+                    error_print(
+                        f"Analysis failed: {analysis_results['error']}"
+                    )
+                elif analysis_results.get("updated") == []:
+                    done_print(f"Analysis of {config.name} is up to date")
+                else:
+                    plot_file = analysis_results.get("plot_file", "")
+                    if plot_file:
+                        done_print(
+                            "Analysis complete - wave envelope plot saved to analysis/"
+                        )
+                    else:
+                        done_print("Analysis complete")
+            except Exception as e:
+                error_print(f"Analysis failed: {e}")
+
+
+def _export(
+    configs: list[str] = typer.Argument(
+        ...,
+        help="Files or directories containing the experiment configuration",
+    ),
+    jobs: int = typer.Option(
+        1,
+        "--jobs",
+        "-j",
+        help="Number of renderer processes exporting images in parallel",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Export every figure again, even if its image is up to date",
+    ),
+) -> None:
+    """
+    (x) Exports the analysis figures of the experiment to PNG.
+
+    Only figures without an image or newer than it are exported, e.g. after
+    running or analysing with `--no-images`.
+    """
+    figures = []
+    for config_ in _expand_paths(configs):
+        config = read_config(Path(config_))
+        analysis_dir = (
+            root_dir
+            / "simulations"
+            / f"{config.name}_{config.hash}"
+            / "analysis"
+        )
+        if force:
+            figures.extend(
+                analysis_dir / file
+                for file in FIGURE_FILES
+                if (analysis_dir / file).exists()
+            )
+        else:
+            figures.extend(stale_images(analysis_dir))
+    if not figures:
+        done_print("All images are up to date.")
+        return
+
+    load_print(f"Exporting {len(figures)} images...")
+    with ImageExporter(workers=jobs) as exporter:
+        exporter.submit(figures)
+    if exporter.failed:
+        error_print(
+            f"{len(exporter.failed)}/{len(figures)} images failed to export"
+        )
+        raise typer.Exit(1)
+    done_print(f"Exported {len(exporter.exported)} images.")
+
+
+def _queue_add(
+    configs: list[str] = typer.Argument(
+        ...,
+        help="Files or directories containing the experiment configuration",
+    ),
+) -> None:
+    """
+    Add simulations to the queue.
+    """
+    queue = get_queue()
+    n_added = 0
     for config_ in _expand_paths(configs):
         path = Path(config_)
         config = read_config(path)
+        write_config(config, path)
+        if queue.add(config, path) is None:
+            load_print(f"{config.name} is already queued", end="\n")
+        else:
+            n_added += 1
+    done_print(f"Added {n_added} simulations to the queue.")
+
+
+def _queue_ls(
+    state: str | None = typer.Option(
+        None,
+        "--state",
+        "-s",
+        help=f"Only list jobs in this state ({', '.join(STATES)})",
+    ),
+) -> None:
+    """
+    List the simulations of the queue.
+    """
+    if state is not None and state not in STATES:
+        error_print(f"Unknown state {state}, must be one of {STATES}")
+        raise typer.Exit(1)
 
-        # Find simulation directory
-        simulation_dir = (
-            root_dir / "simulations" / f"{config.name}_{config.hash}"
+    jobs = get_queue().jobs(state)
+    if not jobs:
+        done_print("No simulations in the queue.")
+        return
+
+    name_width = max(4, *(len(job.name) for job in jobs))
+    print(
+        f"{'id':>4}  {'name':<{name_width}}  {'state':<7}  {'tries':>5}"
+        f"  {'duration':>9}  {'exit':>4}  {'queued at':<16}  error"
+    )
+    for job in jobs:
+        duration = "" if job.duration is None else f"{job.duration:.1f}s"
+        exit_code = "" if job.exit_code is None else str(job.exit_code)
+        queued_at = time.strftime(
+            "%Y-%m-%d %H:%M", time.localtime(job.queued_at)
+        )
+        print(
+            f"{job.id:>4}  {job.name:<{name_width}}  {job.state:<7}"
+            f"  {job.attempts:>5}  {duration:>9}  {exit_code:>4}"
+            f"  {queued_at:<16}  {job.error or ''}"
         )
 
-        if not simulation_dir.exists():
-            error_print(f"Simulation directory not found: {simulation_dir}")
-            continue
+    counts = {state_: 0 for state_ in STATES}
+    for job in jobs:
+        counts[job.state] += 1
+    print(", ".join(f"{n} {state_}" for state_, n in counts.items()))
 
-        swash_dir = simulation_dir / "swash"
-        if not swash_dir.exists():
-            error_print(f"SWASH output directory not found: {swash_dir}")
-            continue
 
-        load_print(f"Analyzing simulation {config.name}...")
-        try:
-            analysis_results = analyze_simulation(simulation_dir, config)
+def _queue_resume(
+    jobs: int | None = typer.Option(
+        None,
+        "--jobs",
+        "-j",
+        help="Number of simulations to run in parallel (default: number of physical cores)",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Run SWASH even if a complete run with the same inputs exists",
+    ),
+    scratch: Path | None = typer.Option(
+        None,
+        "--scratch",
+        "-s",
+        help="Run SWASH in this directory (e.g. /dev/shm) and publish the results once finished",
+    ),
+    compression: str = typer.Option(
+        "none",
+        "--compress",
+        "-z",
+        help=f"Compression of PRINT and the gauge outputs once finished ({', '.join(COMPRESSIONS)})",
+    ),
+    images: bool = typer.Option(
+        True,
+        "--images/--no-images",
+        help="Export the analysis figures to PNG in the background (the dashboard only needs their JSON)",
+    ),
+) -> None:
+    """
+    Run the queued simulations until the queue is empty.
 
-            if "error" in analysis_results:
-                error_print(f"Analysis failed: {analysis_results['error']}")
-            else:
-                plot_file = analysis_results.get("plot_file", "")
-                if plot_file:
-                    done_print(
-                        "Analysis complete - wave envelope plot saved to analysis/"
-                    )
-                else:
-                    done_print("Analysis complete")
-        except Exception as e:
-            error_print(f"Analysis failed: {e}")
+    Simulations left running by a crashed or interrupted worker are queued
+    again first. Several workers can run at the same time on this machine,
+    the queue database being on a local filesystem.
+    """
+    if jobs is None:
+        jobs = physical_cores()
+    _check_compression(compression)
+    with _image_exporter(images) as exporter:
+        run_worker(
+            get_queue(),
+            jobs=jobs,
+            force=force,
+            scratch=scratch,
+            compression=compression,
+            exporter=exporter,
+        )
+
+
+def _queue_retry(
+    names: list[str] = typer.Argument(
+        None,
+        help="Names of the configurations to retry (default: all failed)",
+    ),
+) -> None:
+    """
+    Queue failed simulations again.
+    """
+    n_retried = get_queue().retry(names)
+    done_print(
+        f"Queued {n_retried} failed simulations again,"
+        " run `swg queue resume` to run them."
+    )
+
+
+def _schedule(
+    configs: list[Config],
+    *,
+    policy: str,
+    budget: float | None,
+    model: CostModel | None = None,
+) -> tuple[list[Config], list[Config]]:
+    """Order configurations by policy, exiting on an invalid policy."""
+    if policy == "name" and budget is None:
+        return configs, []
+    if model is None:
+        model = fit_cost_model(root_dir / "simulations")
+    try:
+        return schedule(configs, model, policy=policy, budget=budget)
+    except ValueError as e:
+        error_print(str(e))
+        raise typer.Exit(1)
+
+
+def _check_compression(compression: str) -> None:
+    """Exit if the compression can't be used."""
+    try:
+        check_compression(compression)
+    except ValueError as e:
+        error_print(str(e))
+        raise typer.Exit(1)
+
+
+def _image_exporter(
+    images: bool,
+) -> AbstractContextManager[ImageExporter | None]:
+    """Renderer pool exporting the figures of analyses, if any."""
+    return ImageExporter() if images else nullcontext()
+
+
+def _relative(path: Path) -> Path:
+    """Path relative to the project root, if under it."""
+    try:
+        return path.relative_to(root_dir)
+    except ValueError:
+        return path
+
+
+def _format_duration(seconds: float) -> str:
+    """Format a duration as h:mm:ss."""
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
 
 
 def _expand_paths(paths: list[str]) -> list[Path]:
@@ -0,0 +1,218 @@
+import gzip
+import os
+import shutil
+from pathlib import Path
+from typing import IO, Any, Literal
+
+#########
+# types #
+#########
+
+Compression = Literal["none", "gzip", "zstd"]
+COMPRESSIONS: tuple[str, ...] = ("none", "gzip", "zstd")
+
+# suffix appended to the name of compressed files
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# compression levels balancing speed and size for SWASH text outputs
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 10
+
+############
+# external #
+############
+
+
+def check_compression(compression: str) -> None:
+    """
+    Check that a compression can be used.
+
+    Parameters
+    ----------
+    compression : str
+        Compression name
+
+    Raises
+    ------
+    ValueError
+        If the compression is unknown or zstd isn't installed
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"Unknown compression {compression}, expected one of"
+            f" {', '.join(COMPRESSIONS)}"
+        )
+    if compression == "zstd":
+        _zstandard()
+
+
+def find_output(path: Path) -> Path | None:
+    """
+    Find an output file, compressed or not.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed file
+
+    Returns
+    -------
+    Path | None
+        Existing file (the uncompressed one first), None if there is none
+    """
+    for candidate in _variants(path):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def output_exists(path: Path) -> bool:
+    """
+    Check whether an output file exists, compressed or not.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed file
+
+    Returns
+    -------
+    bool
+        Whether it exists
+    """
+    return find_output(path) is not None
+
+
+def open_output(path: Path, mode: Literal["rb", "r"] = "rb") -> IO[Any]:
+    """
+    Open an output file for reading, decompressing it on the fly.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed file
+    mode : Literal["rb", "r"], default "rb"
+        Binary or text mode
+
+    Returns
+    -------
+    IO[Any]
+        File object reading the uncompressed content
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file doesn't exist, compressed or not
+    """
+    found = find_output(path)
+    if found is None:
+        raise FileNotFoundError(f"No such file: {path}")
+    text_mode = "rt" if mode == "r" else "rb"
+    if found.name.endswith(SUFFIXES["gzip"]):
+        return gzip.open(found, text_mode)
+    if found.name.endswith(SUFFIXES["zstd"]):
+        return _zstandard().open(found, text_mode)
+    return open(found, mode)
+
+
+def read_output(path: Path) -> bytes:
+    """
+    Read the uncompressed content of an output file.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed file
+
+    Returns
+    -------
+    bytes
+        Content
+    """
+    with open_output(path) as f:
+        return f.read()
+
+
+def remove_output(path: Path) -> None:
+    """
+    Remove an output file and its compressed variants.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed file
+    """
+    for candidate in _variants(path):
+        candidate.unlink(missing_ok=True)
+
+
+def compress_file(path: Path, compression: Compression) -> Path:
+    """
+    Compress a file in place, streaming it without loading it in memory.
+
+    The compressed file replaces the original atomically.
+
+    Parameters
+    ----------
+    path : Path
+        File to compress
+    compression : Compression
+        Compression to use, nothing is done with "none"
+
+    Returns
+    -------
+    Path
+        Path of the compressed file
+    """
+    if compression == "none":
+        return path
+    target = _compressed_path(path, compression)
+    tmp_path = target.with_name(f"{target.name}.tmp")
+    with (
+        open(path, "rb") as f,
+        _open_compressed(tmp_path, compression) as out,
+    ):
+        shutil.copyfileobj(f, out, 1 << 20)
+    os.replace(tmp_path, target)
+    for candidate in _variants(path):
+        if candidate != target:
+            candidate.unlink(missing_ok=True)
+    return target
+
+
+############
+# internal #
+############
+
+
+def _compressed_path(path: Path, compression: Compression) -> Path:
+    suffix = SUFFIXES.get(compression, "")
+    return path.with_name(f"{path.name}{suffix}")
+
+
+def _open_compressed(path: Path, compression: Compression) -> IO[bytes]:
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=_GZIP_LEVEL)
+    if compression == "zstd":
+        zstandard = _zstandard()
+        return zstandard.open(
+            path, "wb", cctx=zstandard.ZstdCompressor(level=_ZSTD_LEVEL)
+        )
+    return open(path, "wb")
+
+
+def _variants(path: Path) -> list[Path]:
+    return [path] + [
+        path.with_name(f"{path.name}{suffix}") for suffix in SUFFIXES.values()
+    ]
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ValueError(
+            "zstd compression requires the zstandard package"
+            " (pip install zstandard)"
+        ) from e
+    return zstandard
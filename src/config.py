@@ -1,3 +1,5 @@
+import hashlib
+import math
 from pathlib import Path
 from typing import Literal
 
@@ -5,6 +7,7 @@ import pydantic
 import ruamel.yaml
 
 from src import utils
+from src.utils.paths import root_dir
 
 #########
 # types #
@@ -99,6 +102,93 @@ class BreakwaterConfig(pydantic.BaseModel):
     _hash_config = utils.validators.hash_config()
 
 
+class BedSegment(pydantic.BaseModel):
+    """Straight stretch of the bed, continuing from the previous one."""
+
+    length: float = pydantic.Field(
+        gt=0.0, description="Cross-shore length of the stretch (m)"
+    )
+    slope: float = pydantic.Field(
+        default=0.0,
+        description="Rise of the bed per metre shoreward (V:H, 0 for a berm)",
+    )
+
+
+class StructureConfig(pydantic.BaseModel):
+    """Rubble-mound structure, in addition to the breakwater."""
+
+    start_position: float = pydantic.Field(
+        description="Position of the seaward toe (m)"
+    )
+    crest_height: float = pydantic.Field(
+        description="Height of the crest above the bed (m)"
+    )
+    crest_length: float = pydantic.Field(
+        default=0.0, description="Length of the crest (m)"
+    )
+    slope: float = pydantic.Field(
+        default=2.0, ge=0.0, description="Slope of the sides (H:V ratio)"
+    )
+    porosity: float = pydantic.Field(
+        default=0.4, ge=0.0, le=1.0, description="Porosity (0-1)"
+    )
+
+
+class BathymetryConfig(pydantic.BaseModel):
+    hash: str = pydantic.Field(
+        default="",
+        description="Hash of the configuration (automatically generated)",
+    )
+
+    # bed profile, from the wave maker (or the end of the survey) shoreward,
+    # flat past the last segment
+    segments: list[BedSegment] = pydantic.Field(
+        default=[],
+        description="Straight stretches of the bed (flat floor if empty)",
+    )
+    survey: str | None = pydantic.Field(
+        default=None,
+        description="CSV file of surveyed bed levels (x, z columns in m), relative to the project",
+    )
+    survey_hash: str = pydantic.Field(
+        default="",
+        description="Hash of the survey file (automatically generated)",
+    )
+
+    structures: list[StructureConfig] = pydantic.Field(
+        default=[],
+        description="Porous structures in addition to the breakwater",
+    )
+
+    @pydantic.model_validator(mode="after")
+    def _hash_survey(self) -> "BathymetryConfig":
+        if self.survey is not None:
+            path = self.survey_path
+            if not path.exists():
+                raise ValueError(f"Survey file {path} doesn't exist")
+            self.survey_hash = hashlib.sha256(path.read_bytes()).hexdigest()[
+                :8
+            ]
+        else:
+            self.survey_hash = ""
+        return self
+
+    _hash_config = utils.validators.hash_config()
+
+    @property
+    def survey_path(self) -> Path:
+        """Path of the survey file (see `survey`)."""
+        path = Path(self.survey or "")
+        return path if path.is_absolute() else root_dir / path
+
+    @property
+    def flat(self) -> bool:
+        """Whether the bed is the flat floor of the flume, without structures."""
+        return (
+            not self.segments and self.survey is None and not self.structures
+        )
+
+
 class VegetationType(pydantic.BaseModel):
     """Configuration for a single vegetation type."""
 
@@ -175,6 +265,32 @@ class NumericConfig(pydantic.BaseModel):
         description="X-positions of wave gauges (m)",
     )
 
+    # start from a spun-up wave field shared with the configurations only
+    # differing downstream (breakwater and vegetation)
+    hotstart: bool = pydantic.Field(
+        default=False,
+        description="Start from a spin-up run shared by configurations with the same waves",
+    )
+
+    # stop the simulation early once the wave statistics have converged
+    convergence_tolerance: float | None = pydantic.Field(
+        default=None,
+        gt=0.0,
+        description="Stop once Hs and mean period at every gauge vary by less than this fraction (disabled if null)",
+    )
+    convergence_waves: int = pydantic.Field(
+        default=10,
+        ge=1,
+        description="Number of consecutive waves the convergence tolerance must hold for",
+    )
+
+    # format of the grid files read by SWASH (bathymetry, porosity and
+    # vegetation), which doesn't change the values it reads
+    input_format: Literal["free", "unformatted"] = pydantic.Field(
+        default="free",
+        description="Format of the grid input files: free (text) or unformatted (binary, faster for large grids)",
+    )
+
     # Fixed numerical parameters (not configurable)
     @property
     def time_step(self) -> float:
@@ -186,7 +302,15 @@ class NumericConfig(pydantic.BaseModel):
         """Fixed output interval (s)"""
         return 0.1
 
-    _hash_config = utils.validators.hash_config()
+    # fields added after the first experiments, only hashed once changed
+    _hash_config = utils.validators.hash_config(
+        ignore_default=[
+            "hotstart",
+            "convergence_tolerance",
+            "convergence_waves",
+            "input_format",
+        ]
+    )
 
 
 class Config(pydantic.BaseModel):
@@ -211,17 +335,91 @@ class Config(pydantic.BaseModel):
         default_factory=VegetationConfig,
         description="Vegetation configuration",
     )
+    bathymetry: BathymetryConfig = pydantic.Field(
+        default_factory=BathymetryConfig,
+        description="Bed profile and additional structures",
+    )
     numeric: NumericConfig = pydantic.Field(
         default_factory=NumericConfig, description="Numerical parameters"
     )
 
-    _hash_config = utils.validators.hash_config()
+    # sections and fields added after the first experiments, only hashed once
+    # changed so that their simulations keep their directory
+    _hash_config = utils.validators.hash_config(
+        ignore_default=[
+            "bathymetry",
+            "numeric.hotstart",
+            "numeric.convergence_tolerance",
+            "numeric.convergence_waves",
+            "numeric.input_format",
+        ]
+    )
 
     @property
     def simulation_duration(self) -> float:
         """Calculate total simulation duration based on number of waves and period."""
         return self.numeric.n_waves * self.water.wave_period
 
+    @property
+    def spinup_duration(self) -> float:
+        """Duration of the spin-up shared by hot-started configurations (s).
+
+        It is the whole number of wave periods before the first waves can
+        reach the breakwater, bounded by the shallow water celerity
+        sqrt(g (h + H)), so that everything downstream of the breakwater toe
+        is still water and the spun-up state doesn't depend on the breakwater
+        or the vegetation. It is 0 if hot-starting isn't possible, which
+        includes beds that aren't flat (see `BathymetryConfig.flat`).
+        """
+        if not (
+            self.numeric.hotstart
+            and self.breakwater.enable
+            and self.bathymetry.flat
+        ):
+            return 0.0
+        celerity = math.sqrt(
+            9.81 * (self.water.water_level + self.water.wave_height)
+        )
+        travel_time = self.breakwater.breakwater_start_position / celerity
+        n_waves = min(
+            math.floor(travel_time / self.water.wave_period),
+            self.numeric.n_waves - 1,
+        )
+        return max(0, n_waves) * self.water.wave_period
+
+    @property
+    def physics_hash(self) -> str:
+        """Hash of the parameters that affect the simulation results.
+
+        Unlike `hash`, it ignores the name of the experiment and the
+        parameters of disabled sections, so configurations describing the same
+        physics share the same hash (and the same simulation results).
+        """
+        physics = self.model_dump(exclude={"name", "hash"})
+        if not self.breakwater.enable:
+            physics["breakwater"] = {
+                "enable": False,
+                # the other structures use the breakwater's stones
+                **(
+                    {"armour_dn50": self.breakwater.armour_dn50}
+                    if self.bathymetry.structures
+                    else {}
+                ),
+            }
+        if self.bathymetry.flat:
+            del physics["bathymetry"]
+        else:
+            del physics["bathymetry"]["survey"]
+        if not (self.breakwater.enable and self.vegetation.enable):
+            physics["vegetation"] = {"enable": False}
+        elif self.vegetation.other_type is None:
+            del physics["vegetation"]["distribution"]
+            del physics["vegetation"]["type_fraction"]
+        if self.numeric.convergence_tolerance is None:
+            del physics["numeric"]["convergence_waves"]
+        del physics["numeric"]["input_format"]
+        return utils.validators.hash_dict(physics, length=16)
+
     @property
     def breakwater_end_position(self) -> float:
         """Calculate breakwater end position based on start position, crest width, and slope."""
@@ -300,6 +498,9 @@ def _add_comments(config: Config) -> ruamel.yaml.CommentedMap:
     config_.yaml_add_eol_comment(
         "configuration for the vegetation on the breakwater", "vegetation"
     )
+    config_.yaml_add_eol_comment(
+        "bed profile and additional structures", "bathymetry"
+    )
     config_.yaml_add_eol_comment(
         "configuration for the numerical parameters",
         "numeric",
@@ -322,6 +523,11 @@ def _add_comments(config: Config) -> ruamel.yaml.CommentedMap:
     )
     _add_field_comments(config.vegetation, config_["vegetation"])
 
+    config_["bathymetry"] = ruamel.yaml.CommentedMap(
+        config.bathymetry.model_dump()
+    )
+    _add_field_comments(config.bathymetry, config_["bathymetry"])
+
     config_["numeric"] = ruamel.yaml.CommentedMap(config.numeric.model_dump())
     _add_field_comments(config.numeric, config_["numeric"])
 
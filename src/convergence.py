@@ -0,0 +1,262 @@
+import sys
+import threading
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .gauges import parse_gauge
+from .monitor import DirectoryWatcher, FileTail
+from .wave_analysis import RunningWaveStatistics, ZeroCrossingEstimator
+
+#########
+# types #
+#########
+
+
+@dataclass(frozen=True)
+class ConvergenceResult:
+    """Point at which a SWASH run was stopped after converging."""
+
+    simulation_time: float  # simulated time of the last kept sample (s)
+    n_samples: int  # number of samples kept in every gauge output
+    tolerance: float
+    n_waves: int  # consecutive waves the tolerance held for
+    significant_wave_heights: list[float]  # per gauge (m)
+    mean_periods: list[float]  # per gauge (s)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "simulation_time": round(self.simulation_time, 3),
+            "n_samples": self.n_samples,
+            "tolerance": self.tolerance,
+            "n_waves": self.n_waves,
+            "significant_wave_heights": [
+                round(h, 6) for h in self.significant_wave_heights
+            ],
+            "mean_periods": [round(t, 6) for t in self.mean_periods],
+        }
+
+
+class GaugeConvergence:
+    """
+    Convergence of the wave statistics of a single gauge.
+
+    The significant wave height and mean period are estimated again after each
+    wave. The gauge has converged once the estimates of the last `n_waves`
+    waves all stay within `tolerance` (relative) of the current one.
+
+    Parameters
+    ----------
+    timestep : float
+        Time step between samples (s)
+    tolerance : float
+        Relative tolerance on Hs and the mean period
+    n_waves : int
+        Number of consecutive waves the tolerance must hold for
+    """
+
+    def __init__(
+        self, timestep: float, tolerance: float, n_waves: int
+    ) -> None:
+        self.tolerance = tolerance
+        self.estimator = ZeroCrossingEstimator(timestep)
+        self.statistics = RunningWaveStatistics()
+        self._history: deque[tuple[float, float]] = deque(maxlen=n_waves + 1)
+        self._partial = b""
+
+    @property
+    def n_samples(self) -> int:
+        return self.estimator.n_samples
+
+    @property
+    def estimate(self) -> tuple[float, float]:
+        """Latest significant wave height and mean period."""
+        return self._history[-1] if self._history else (0.0, 0.0)
+
+    @property
+    def converged(self) -> bool:
+        if len(self._history) < self._history.maxlen:  # type: ignore
+            return False
+        h_sig, t_mean = self._history[-1]
+        if h_sig <= 0 or t_mean <= 0:
+            return False
+        return all(
+            abs(h - h_sig) <= self.tolerance * h_sig
+            and abs(t - t_mean) <= self.tolerance * t_mean
+            for h, t in self._history
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        """Analyse bytes appended to the gauge output (a SWASH TABLE)."""
+        data = self._partial + chunk
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+        if not end:
+            return
+        n_waves = self.estimator.n_waves
+        self.estimator.update(parse_gauge(data[:end])[:, 0])
+        for height, period in zip(
+            self.estimator.wave_heights[n_waves:],
+            self.estimator.wave_periods[n_waves:],
+        ):
+            self.statistics.add(height, period)
+            self._history.append(
+                (
+                    self.statistics.significant_wave_height,
+                    self.statistics.mean_period,
+                )
+            )
+
+
+class ConvergenceMonitor:
+    """Stop a running SWASH simulation once its wave statistics converged.
+
+    The gauge outputs (`wgNN.txt`) are followed while SWASH writes them and
+    analysed incrementally with a zero-crossing estimator. Once every gauge
+    converged (see `GaugeConvergence`), the callbacks registered with
+    `on_converged` are called (from the monitoring thread) with the
+    truncation point, e.g. to terminate the process.
+
+    Usage:
+        with ConvergenceMonitor(swash_dir, ...) as monitor:
+            monitor.on_converged(lambda result: process.terminate())
+            process.wait()
+        if monitor.result is not None:
+            ...
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        n_gauges: int,
+        timestep: float,
+        start_time: float,
+        tolerance: float,
+        n_waves: int,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.timestep = timestep
+        self.start_time = start_time
+        self.tolerance = tolerance
+        self.n_waves = n_waves
+        self.result: ConvergenceResult | None = None
+        self._names = [f"wg{i+1:02d}.txt" for i in range(n_gauges)]
+        self._gauges = {
+            name: GaugeConvergence(timestep, tolerance, n_waves)
+            for name in self._names
+        }
+        self._tails = {
+            name: FileTail(directory / name) for name in self._names
+        }
+        self._watcher = DirectoryWatcher(
+            directory,
+            set(self._names),
+            poll_interval=poll_interval,
+            use_inotify=use_inotify,
+        )
+        self._callbacks: list[Callable[[ConvergenceResult], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def on_converged(
+        self, callback: Callable[[ConvergenceResult], None]
+    ) -> None:
+        """Call `callback` with the truncation point once converged."""
+        self._callbacks.append(callback)
+
+    def start(self) -> "ConvergenceMonitor":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # the thread closes the watcher once every gauge converged
+        if self._thread is not None and self._thread.is_alive():
+            self._watcher.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        else:
+            self._close()
+
+    def __enter__(self) -> "ConvergenceMonitor":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set() and self.result is None:
+                changed = self._watcher.wait(timeout=1.0)
+                for name in changed:
+                    self._gauges[name].feed(self._tails[name].read())
+                if changed and self._check():
+                    break
+        finally:
+            self._close()
+
+    def _check(self) -> bool:
+        """Record the truncation point and notify once every gauge converged."""
+        if not all(gauge.converged for gauge in self._gauges.values()):
+            return False
+        # the samples written to every gauge output at this point
+        n_samples = min(gauge.n_samples for gauge in self._gauges.values())
+        estimates = [self._gauges[name].estimate for name in self._names]
+        self.result = ConvergenceResult(
+            simulation_time=self.start_time + (n_samples - 1) * self.timestep,
+            n_samples=n_samples,
+            tolerance=self.tolerance,
+            n_waves=self.n_waves,
+            significant_wave_heights=[h for h, _ in estimates],
+            mean_periods=[t for _, t in estimates],
+        )
+        for callback in self._callbacks:
+            try:
+                callback(self.result)
+            except Exception as e:
+                print(f"Convergence callback failed: {e}", file=sys.stderr)
+        return True
+
+    def _close(self) -> None:
+        for tail in self._tails.values():
+            tail.close()
+        self._watcher.close()
+
+
+############
+# external #
+############
+
+
+def truncate_outputs(directory: Path, n_gauges: int, n_samples: int) -> None:
+    """
+    Cut the gauge outputs of a stopped run to the same number of samples.
+
+    SWASH keeps writing until it is terminated, so the outputs go a bit past
+    the truncation point (and may end with a partial line).
+
+    Parameters
+    ----------
+    directory : Path
+        SWASH directory of the run
+    n_gauges : int
+        Number of gauges
+    n_samples : int
+        Number of samples to keep
+    """
+    for i in range(n_gauges):
+        path = directory / f"wg{i+1:02d}.txt"
+        with open(path, "rb+") as f:
+            size = 0
+            for _ in range(n_samples):
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                size += len(line)
+            f.truncate(size)
@@ -2,6 +2,7 @@ import traceback
 from pathlib import Path
 from typing import List
 
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.routing import Route
@@ -13,6 +14,9 @@ from src.wavelength import compute_wavelength
 
 CONFIG_DIR = Path("config")
 
+# progress of the simulations started from the dashboard, keyed by config name
+_progress: dict[str, dict] = {}
+
 
 async def list_configs(request: Request) -> JSONResponse:
     """List all available configurations."""
@@ -165,9 +169,19 @@ async def simulate_config(request: Request) -> JSONResponse:
         )
 
     try:
-        # Load config and run simulation
+        # Load config and run simulation outside of the event loop, so that
+        # its progress can be queried while it runs
         cfg = config_module.read_config(config_path)
-        run_simulation(cfg)
+        _progress[name] = {
+            "running": True,
+            "simulation_time": 0.0,
+            "total": cfg.simulation_duration,
+        }
+
+        def on_progress(simulation_time: float) -> None:
+            _progress[name]["simulation_time"] = simulation_time
+
+        await run_in_threadpool(run_simulation, cfg, on_progress=on_progress)
 
         return JSONResponse(
             {
@@ -179,6 +193,18 @@ async def simulate_config(request: Request) -> JSONResponse:
         print(f"Error running simulation for {name}: {e}")
         traceback.print_exc()
         return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        if name in _progress:
+            _progress[name]["running"] = False
+
+
+async def get_simulation_progress(request: Request) -> JSONResponse:
+    """Get the progress of the simulation of a configuration."""
+    name = request.path_params["name"]
+    progress = _progress.get(
+        name, {"running": False, "simulation_time": 0.0, "total": 0.0}
+    )
+    return JSONResponse(progress)
 
 
 async def calculate_wavelength(request: Request) -> JSONResponse:
@@ -271,6 +297,7 @@ def get_api_routes() -> List[Route]:
         Route("/configs/{name}", update_config, methods=["PUT"]),
         Route("/configs/{name}", delete_config, methods=["DELETE"]),
         Route("/simulate/{name}", simulate_config, methods=["POST"]),
+        Route("/simulate/{name}", get_simulation_progress, methods=["GET"]),
         Route("/analysis/{name}", get_analysis_results, methods=["GET"]),
         Route("/wavelength", calculate_wavelength, methods=["POST"]),
     ]
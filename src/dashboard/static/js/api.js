@@ -61,6 +61,10 @@ export async function runSimulation(name) {
   });
 }
 
+export async function getSimulationProgress(name) {
+  return await apiCall(`/simulate/${name}`);
+}
+
 export async function getAnalysisResults(name) {
   return await apiCall(`/analysis/${name}`);
 }
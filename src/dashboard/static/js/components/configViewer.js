@@ -172,6 +172,7 @@ export function createConfigViewer(container, configStore, editable = false) {
     <h3>Numerical Parameters</h3>
     ${createField('Number of Waves', config.numeric.n_waves, 'numeric.n_waves')}
     ${createArrayField('Wave Gauge Positions (m)', config.numeric.wave_gauge_positions, 'numeric.wave_gauge_positions')}
+    ${createCheckbox('Hot-start from Shared Spin-up', config.numeric.hotstart, 'numeric.hotstart')}
   </section>
 </div>
 `;
@@ -242,6 +243,7 @@ export function createConfigViewer(container, configStore, editable = false) {
     updateField('numeric.n_waves', config.numeric.n_waves);
     // Time step and output interval are fixed - no need to update
     updateField('numeric.wave_gauge_positions', config.numeric.wave_gauge_positions?.join(', '));
+    updateField('numeric.hotstart', config.numeric.hotstart);
   };
 
   const handleFieldChange = (path, value, isArray = false) => {
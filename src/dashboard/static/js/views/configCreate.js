@@ -47,7 +47,8 @@ export function createConfigCreateView() {
     numeric: {
       n_waves: 50,
       // Time step (0.05s) and output interval (0.1s) are fixed
-      wave_gauge_positions: [20.0, 60.0, 80.0, 100.0]
+      wave_gauge_positions: [20.0, 60.0, 80.0, 100.0],
+      hotstart: false
     }
   };
   
@@ -101,7 +101,27 @@ export function createConfigDetailView(configName) {
       btn.disabled = true;
       btn.innerHTML = `${icon('loader')} Running...`;
 
-      const result = await api.runSimulation(configName);
+      // Show the progress reported by the server while the simulation runs
+      const progressInterval = setInterval(async () => {
+        try {
+          const progress = await api.getSimulationProgress(configName);
+          if (progress.running && progress.total > 0) {
+            const percent = Math.floor(
+              (100 * progress.simulation_time) / progress.total
+            );
+            btn.innerHTML = `${icon('loader')} Running... ${percent}%`;
+          }
+        } catch (error) {
+          // progress is informative only
+        }
+      }, 1000);
+
+      let result;
+      try {
+        result = await api.runSimulation(configName);
+      } finally {
+        clearInterval(progressInterval);
+      }
       alert(result.message);
 
       // Load analysis results if simulation was successful
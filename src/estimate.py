@@ -0,0 +1,294 @@
+import heapq
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+import pydantic
+
+from . import cache
+from .config import Config
+
+#########
+# types #
+#########
+
+Policy = Literal["name", "shortest", "longest", "budget"]
+POLICIES: tuple[str, ...] = ("name", "shortest", "longest", "budget")
+
+# prior cost of a cell and time step on a single core (s), only used as long
+# as few runs have been recorded
+DEFAULT_SECONDS_PER_CELL_STEP = 1e-5
+
+# shallow water celerity of the default configuration (m/s), the time step
+# (and so the cost) adapts to the celerity to keep the CFL number bounded
+_REFERENCE_CELERITY = math.sqrt(9.81 * 1.5)
+
+# weight of the prior against the recorded runs
+_REGULARIZATION = 1.0
+
+
+@dataclass(frozen=True)
+class RunRecord:
+    """Wall time of a past SWASH run."""
+
+    config: Config
+    wall_time: float  # s
+    simulated_time: float  # s actually computed (without the spin-up)
+
+
+@dataclass(frozen=True)
+class CostModel:
+    """
+    Predicts the wall time of a SWASH run from its configuration.
+
+    The model is log-linear in the amount of work (computed cells and time
+    steps), the shallow water celerity (which bounds the adaptive time step)
+    and whether porous flow and vegetation are computed:
+
+        log(wall time) = b0 + b1 log(cells x steps) + b2 log(celerity)
+                         + b3 breakwater + b4 vegetation
+
+    It is fitted on recorded runs by ridge regression towards a prior of
+    `DEFAULT_SECONDS_PER_CELL_STEP` seconds per cell and step, so that it
+    gives sensible estimates before any run was recorded and follows the
+    machine's actual timings as runs accumulate.
+    """
+
+    coefficients: tuple[float, ...]
+    n_runs: int
+
+    @classmethod
+    def fit(cls, records: list[RunRecord]) -> "CostModel":
+        prior = np.array(
+            [math.log(DEFAULT_SECONDS_PER_CELL_STEP), 1.0, 1.0, 0.0, 0.0]
+        )
+        records = [
+            record
+            for record in records
+            if record.wall_time > 0 and record.simulated_time > 0
+        ]
+        if not records:
+            return cls(tuple(prior), 0)
+        x = np.array(
+            [
+                _features(record.config, record.simulated_time)
+                for record in records
+            ]
+        )
+        y = np.log([record.wall_time for record in records])
+        a = x.T @ x + _REGULARIZATION * np.eye(len(prior))
+        b = x.T @ y + _REGULARIZATION * prior
+        return cls(tuple(np.linalg.solve(a, b)), len(records))
+
+    def predict(self, config: Config) -> float:
+        """
+        Predicted wall time of a run on a single core.
+
+        With `numeric.convergence_tolerance`, this is an upper bound as the
+        run may stop early.
+
+        Parameters
+        ----------
+        config : Config
+            Configuration of the simulation
+
+        Returns
+        -------
+        float
+            Wall time (s)
+        """
+        features = _features(config, _simulated_time(config))
+        return float(np.exp(np.dot(self.coefficients, features)))
+
+
+############
+# external #
+############
+
+
+def load_records(simulations_dir: Path) -> list[RunRecord]:
+    """
+    Read the timings of the completed runs of the store.
+
+    Parameters
+    ----------
+    simulations_dir : Path
+        Directory containing all simulations
+
+    Returns
+    -------
+    list[RunRecord]
+        Recorded runs (runs from before configurations were recorded in
+        their manifest are ignored)
+    """
+    records = []
+    store_dir = simulations_dir / cache.STORE_DIR
+    if not store_dir.exists():
+        return records
+    for manifest_path in sorted(
+        store_dir.glob(f"*/swash/{cache.MANIFEST_FILE}")
+    ):
+        manifest = cache.read_manifest(manifest_path.parent)
+        resources = manifest.get("resources") or {}
+        if manifest.get("status") != "completed" or "config" not in manifest:
+            continue
+        try:
+            config = Config(**manifest["config"])
+            wall_time = float(resources["wall_time"])
+            reached = float(resources.get("simulation_time") or 0.0)
+        except (pydantic.ValidationError, KeyError, TypeError, ValueError):
+            continue
+        simulated_time = (
+            reached - config.spinup_duration
+            if reached > config.spinup_duration
+            else _simulated_time(config)
+        )
+        records.append(RunRecord(config, wall_time, simulated_time))
+    return records
+
+
+def fit_cost_model(simulations_dir: Path) -> CostModel:
+    """
+    Fit the cost model on the runs recorded in `simulations_dir`.
+
+    Parameters
+    ----------
+    simulations_dir : Path
+        Directory containing all simulations
+
+    Returns
+    -------
+    CostModel
+        Fitted model
+    """
+    return CostModel.fit(load_records(simulations_dir))
+
+
+def schedule(
+    configs: list[Config],
+    model: CostModel,
+    *,
+    policy: Policy = "name",
+    budget: float | None = None,
+) -> tuple[list[Config], list[Config]]:
+    """
+    Order the runs of a batch according to a scheduling policy.
+
+    - "name" keeps the given order (sorted by file name).
+    - "shortest" runs the cheapest first, which gets results out sooner on
+      average.
+    - "longest" runs the most expensive first, which packs the runs on the
+      workers with the shortest total time (longest processing time first).
+    - "budget" keeps as many runs as fit in `budget` core-hours, cheapest
+      first, and runs them longest first.
+
+    Configurations sharing their physics are only simulated once, so they
+    only count once against the budget.
+
+    Parameters
+    ----------
+    configs : list[Config]
+        Configurations to run
+    model : CostModel
+        Cost model used to predict the wall time of each run
+    policy : Policy, default "name"
+        Scheduling policy
+    budget : float | None, default None
+        Core-hours available, required by the "budget" policy and refused by
+        the others
+
+    Returns
+    -------
+    tuple[list[Config], list[Config]]
+        Configurations to run in order, and the ones left out of the budget
+    """
+    if policy not in POLICIES:
+        raise ValueError(
+            f"Unknown policy {policy}, expected one of {', '.join(POLICIES)}"
+        )
+    if budget is not None and policy != "budget":
+        raise ValueError(
+            f"A budget is only used by the budget policy, not {policy}"
+        )
+    if policy == "name":
+        return list(configs), []
+
+    costs = {config.physics_hash: model.predict(config) for config in configs}
+    by_cost = sorted(configs, key=lambda config: costs[config.physics_hash])
+    if policy == "shortest":
+        return by_cost, []
+    if policy == "longest":
+        return by_cost[::-1], []
+
+    if budget is None:
+        raise ValueError("The budget policy requires a budget")
+    remaining = budget * 3600
+    selected, skipped, paid = [], [], set()
+    for config in by_cost:
+        cost = (
+            0.0 if config.physics_hash in paid else costs[config.physics_hash]
+        )
+        if cost <= remaining:
+            remaining -= cost
+            paid.add(config.physics_hash)
+            selected.append(config)
+        else:
+            skipped.append(config)
+    return selected[::-1], skipped
+
+
+def estimate_makespan(costs: list[float], jobs: int) -> float:
+    """
+    Wall time of running jobs in order on a pool of workers.
+
+    Each run starts on the first worker to become free, as in `run_batch`.
+
+    Parameters
+    ----------
+    costs : list[float]
+        Wall time of each run, in submission order (s)
+    jobs : int
+        Number of workers
+
+    Returns
+    -------
+    float
+        Time until every run finished (s)
+    """
+    workers = [0.0] * max(1, jobs)
+    for cost in costs:
+        heapq.heappush(workers, heapq.heappop(workers) + cost)
+    return max(workers)
+
+
+############
+# internal #
+############
+
+
+def _simulated_time(config: Config) -> float:
+    """Simulated time computed by a run, excluding a shared spin-up (s)."""
+    return config.simulation_duration - config.spinup_duration
+
+
+def _features(config: Config, simulated_time: float) -> np.ndarray:
+    cell_steps = (
+        simulated_time
+        / config.numeric.time_step
+        * config.grid.nx_cells
+        * config.grid.n_layers
+    )
+    celerity = math.sqrt(
+        9.81 * (config.water.water_level + config.water.wave_height)
+    )
+    return np.array(
+        [
+            1.0,
+            math.log(max(cell_steps, 1.0)),
+            math.log(celerity / _REFERENCE_CELERITY),
+            float(config.breakwater.enable),
+            float(config.breakwater.enable and config.vegetation.enable),
+        ]
+    )
@@ -0,0 +1,143 @@
+import multiprocessing
+import os
+import sys
+import threading
+from collections.abc import Iterable
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+#########
+# types #
+#########
+
+# figures written by the analysis (Plotly JSON), exported to PNG next to them
+FIGURE_FILES = ["water_levels_and_x_velocity.json", "swash_diagram.json"]
+
+
+class ImageExporter:
+    """
+    Pool of long-lived renderers exporting analysis figures to PNG.
+
+    Starting the renderer of static images (kaleido, a headless Chromium) is
+    by far the largest fixed cost of an export. Instead of each analysis
+    paying it, figures are submitted to worker processes that start it once
+    and reuse it for every figure, so that exports overlap with the next
+    runs and analyses instead of blocking them. The workers are only started
+    with the first submitted figure.
+
+    Usage:
+        with ImageExporter() as exporter:
+            analyze_simulation(simulation_dir, config, exporter=exporter)
+            ...
+        # every submitted image is exported
+    """
+
+    def __init__(self, workers: int = 1) -> None:
+        self.workers = max(1, workers)
+        self.exported: list[Path] = []
+        self.failed: list[Path] = []
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending: dict[Future, Path] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, figures: Iterable[Path]) -> None:
+        """Export figures (Plotly JSON files) in the background."""
+        with self._lock:
+            for figure in figures:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                future = self._executor.submit(export_image, figure)
+                self._pending[future] = figure
+
+    def wait(self) -> list[Path]:
+        """Wait for the submitted figures, returning the exported images."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future in wait(pending).done:
+            try:
+                self.exported.append(future.result())
+            except Exception as e:
+                self.failed.append(pending[future])
+                print(
+                    f"Image export of {pending[future]} failed: {e}",
+                    file=sys.stderr,
+                )
+        return list(self.exported)
+
+    def close(self) -> None:
+        self.wait()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def __enter__(self) -> "ImageExporter":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+############
+# external #
+############
+
+
+def image_path(figure: Path) -> Path:
+    """PNG image exported from a figure."""
+    return figure.with_suffix(".png")
+
+
+def stale_images(analysis_dir: Path) -> list[Path]:
+    """
+    Find the figures of an analysis whose image is missing or out of date.
+
+    Parameters
+    ----------
+    analysis_dir : Path
+        Analysis directory of a simulation
+
+    Returns
+    -------
+    list[Path]
+        Figures (see `FIGURE_FILES`) newer than their image, or without one
+    """
+    figures = []
+    for file in FIGURE_FILES:
+        figure = analysis_dir / file
+        image = image_path(figure)
+        if figure.exists() and (
+            not image.exists()
+            or image.stat().st_mtime_ns < figure.stat().st_mtime_ns
+        ):
+            figures.append(figure)
+    return figures
+
+
+def export_image(figure: Path) -> Path:
+    """
+    Export a figure saved as Plotly JSON to a PNG image next to it.
+
+    The image is written to a temporary file then renamed, so that readers
+    never see a partial image.
+
+    Parameters
+    ----------
+    figure : Path
+        Plotly JSON file
+
+    Returns
+    -------
+    Path
+        Exported image
+    """
+    import plotly.io as pio
+
+    image = image_path(figure)
+    tmp_path = image.with_name(f".{image.name}.tmp")
+    pio.read_json(figure).write_image(tmp_path, format="png")
+    os.replace(tmp_path, image)
+    return image
@@ -0,0 +1,414 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+from .compression import find_output, read_output
+
+#########
+# types #
+#########
+
+# columns kept from the gauge outputs (the y velocity SWASH also writes is
+# always zero in the 1D flume)
+GAUGE_COLUMNS = ["water_level", "x_velocity"]
+
+# columnar store of the gauge data of a run, in its SWASH directory
+GAUGE_STORE = "gauges.parquet"
+
+# the same data as a (column, sample, gauge) matrix, to be memory-mapped:
+# Parquet can't be memory-mapped (its pages are encoded and compressed), so
+# the matrix is a cache of the store for zero-copy slicing, rebuilt from it
+# by the analysis when missing, while the store stays the portable and
+# self-describing record of the run (gauge names, positions and time step)
+GAUGE_MATRIX = "gauges.npy"
+
+# powers of ten of every exponent a float can have, exact up to 1e22 so that
+# values parsed with them are the ones `float` would give
+_POWERS = np.array([10.0**k for k in range(309)])
+
+_SPACE, _MINUS, _PLUS = ord(" "), ord("-"), ord("+")
+_ZERO, _NINE = ord("0"), ord("9")
+
+############
+# external #
+############
+
+
+def parse_gauge(content: bytes) -> np.ndarray:
+    """
+    Parse complete lines of a gauge output into rows of GAUGE_COLUMNS.
+
+    SWASH writes its TABLE outputs as fixed-width Fortran E notation (e.g.
+    ` 0.12345678E-02`), every line having the same layout. Such content is
+    decoded with a few vectorised operations on its bytes instead of
+    converting every number separately; anything else (e.g. hand-written
+    files or numbers overflowing their format) is split on whitespace.
+
+    Parameters
+    ----------
+    content : bytes
+        Complete lines of a gauge output
+
+    Returns
+    -------
+    np.ndarray
+        Rows of water level and x velocity, NaN where a column is missing
+
+    Raises
+    ------
+    ValueError
+        If a value can't be parsed
+    """
+    rows = _parse_fixed_width(content)
+    if rows is None:
+        rows = _parse_free(content)
+    if rows.shape[1] < len(GAUGE_COLUMNS):
+        rows = np.pad(
+            rows,
+            ((0, 0), (0, len(GAUGE_COLUMNS) - rows.shape[1])),
+            constant_values=np.nan,
+        )
+    return rows[:, : len(GAUGE_COLUMNS)]
+
+
+def read_gauge(path: Path) -> np.ndarray:
+    """
+    Read a gauge output, compressed or not.
+
+    Parameters
+    ----------
+    path : Path
+        Path of the uncompressed output
+
+    Returns
+    -------
+    np.ndarray
+        Rows of GAUGE_COLUMNS
+
+    Raises
+    ------
+    FileNotFoundError
+        If the output doesn't exist
+    ValueError
+        If it holds no data or a value can't be parsed
+    """
+    content = read_output(path)
+    if not content.strip():
+        raise ValueError(f"No data in {path}")
+    return parse_gauge(content)
+
+
+def read_gauges(
+    paths: list[Path], *, jobs: int | None = None
+) -> list[np.ndarray]:
+    """
+    Read gauge outputs in parallel threads.
+
+    Decompression and the vectorised parsing release the GIL, so the
+    outputs of a run are read concurrently.
+
+    Parameters
+    ----------
+    paths : list[Path]
+        Paths of the uncompressed outputs
+    jobs : int | None, default None
+        Number of threads, the number of CPUs if None
+
+    Returns
+    -------
+    list[np.ndarray]
+        Rows of GAUGE_COLUMNS of each output, in the order of `paths`
+    """
+    jobs = min(len(paths), jobs or os.cpu_count() or 1)
+    if jobs <= 1:
+        return [read_gauge(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(read_gauge, paths))
+
+
+def gauge_names(n_gauges: int) -> list[str]:
+    """
+    Names of the gauges of a run, as in their output files (wg01.txt, ...).
+
+    Parameters
+    ----------
+    n_gauges : int
+        Number of gauges
+
+    Returns
+    -------
+    list[str]
+        Names of the gauges
+    """
+    return [f"wg{i+1:02d}" for i in range(n_gauges)]
+
+
+def write_store(
+    swash_dir: Path,
+    rows: list[np.ndarray],
+    *,
+    positions: list[float],
+    timestep: float,
+) -> Path:
+    """
+    Write the gauge data of a run to its columnar store.
+
+    The store is a Parquet file with an integer sample index, the gauge as a
+    dictionary-encoded column and the values as 4-byte floats, along with
+    the position of each gauge and the time step between samples (in its
+    key-value metadata). It is written once per run and replaces parsing the
+    text outputs again (see `read_store`). The values are also written as a
+    matrix memory-mapped by `load_matrix`.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the run
+    rows : list[np.ndarray]
+        Rows of GAUGE_COLUMNS of each gauge
+    positions : list[float]
+        Position of each gauge (m)
+    timestep : float
+        Time step between samples (s)
+
+    Returns
+    -------
+    Path
+        Written store
+    """
+    names = gauge_names(len(rows))
+    data = pl.DataFrame(
+        {
+            "sample": np.concatenate(
+                [np.arange(len(rows_), dtype=np.int32) for rows_ in rows]
+            ),
+            "gauge": pl.Series(
+                np.repeat(names, [len(rows_) for rows_ in rows]),
+                dtype=pl.Enum(names),
+            ),
+            **{
+                column: np.concatenate([rows_[:, i] for rows_ in rows]).astype(
+                    np.float32
+                )
+                for i, column in enumerate(GAUGE_COLUMNS)
+            },
+        }
+    )
+    matrix_path = swash_dir / GAUGE_MATRIX
+    tmp_path = matrix_path.with_name(f"{matrix_path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        np.save(f, gauge_matrix(rows))
+    os.replace(tmp_path, matrix_path)
+
+    # written last, its metadata telling which gauges both files hold
+    path = swash_dir / GAUGE_STORE
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    data.write_parquet(
+        tmp_path,
+        metadata={
+            "positions": json.dumps(positions),
+            "timestep": repr(timestep),
+        },
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_store(
+    swash_dir: Path, positions: list[float]
+) -> list[np.ndarray] | None:
+    """
+    Read the gauge data of a run from its columnar store.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the run
+    positions : list[float]
+        Position of each gauge (m)
+
+    Returns
+    -------
+    list[np.ndarray] | None
+        Rows of GAUGE_COLUMNS of each gauge (4-byte floats), None if there
+        is no store for these gauges or a gauge output was written after it
+    """
+    path = swash_dir / GAUGE_STORE
+    if not _is_store_current(swash_dir, path, positions):
+        return None
+    try:
+        data = pl.read_parquet(path)
+    except (OSError, pl.exceptions.PolarsError):
+        return None
+    # the rows are stored gauge by gauge
+    counts = np.bincount(
+        data["gauge"].to_physical().to_numpy(), minlength=len(positions)
+    )
+    values = data.select(GAUGE_COLUMNS).to_numpy()
+    return np.split(values, np.cumsum(counts)[:-1])
+
+
+def gauge_matrix(rows: list[np.ndarray]) -> np.ndarray:
+    """
+    Lay the rows of the gauges out as contiguous time × gauge matrices.
+
+    Only the samples recorded by every gauge are kept, which are all of them
+    for the outputs of a run (SWASH writes every gauge at the same times).
+
+    Parameters
+    ----------
+    rows : list[np.ndarray]
+        Rows of GAUGE_COLUMNS of each gauge
+
+    Returns
+    -------
+    np.ndarray
+        4-byte floats of shape (len(GAUGE_COLUMNS), samples, gauges), e.g.
+        `matrix[0][:, i]` being the water level at gauge i
+    """
+    n_samples = min((len(rows_) for rows_ in rows), default=0)
+    matrix = np.empty(
+        (len(GAUGE_COLUMNS), n_samples, len(rows)), dtype=np.float32
+    )
+    for i, rows_ in enumerate(rows):
+        matrix[:, :, i] = rows_[:n_samples].T
+    return matrix
+
+
+def load_matrix(swash_dir: Path, positions: list[float]) -> np.ndarray | None:
+    """
+    Memory-map the gauge matrix of a run (see `gauge_matrix`).
+
+    The data is paged in from disk as it is accessed, so slicing a gauge or
+    a time window of a long run neither reads nor copies the rest.
+
+    Parameters
+    ----------
+    swash_dir : Path
+        SWASH directory of the run
+    positions : list[float]
+        Position of each gauge (m)
+
+    Returns
+    -------
+    np.ndarray | None
+        Read-only matrix, None if there is none for these gauges or a gauge
+        output was written after it
+    """
+    path = swash_dir / GAUGE_MATRIX
+    if not _is_store_current(swash_dir, path, positions):
+        return None
+    try:
+        matrix = np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if matrix.ndim != 3 or matrix.shape[2] != len(positions):
+        return None
+    return matrix
+
+
+############
+# internal #
+############
+
+
+def _is_store_current(
+    swash_dir: Path, path: Path, positions: list[float]
+) -> bool:
+    """Whether `path`, part of the store of these gauges, is up to date."""
+    try:
+        metadata = pl.read_parquet_metadata(swash_dir / GAUGE_STORE)
+        if json.loads(metadata.get("positions", "null")) != positions:
+            return False
+        mtime = path.stat().st_mtime_ns
+        for name in gauge_names(len(positions)):
+            output = find_output(swash_dir / f"{name}.txt")
+            if output is not None and output.stat().st_mtime_ns > mtime:
+                return False
+    except (OSError, ValueError, pl.exceptions.PolarsError):
+        return False
+    return True
+
+
+def _parse_fixed_width(content: bytes) -> np.ndarray | None:
+    """Decode lines of identical Fortran E notation layout, None otherwise."""
+    width = content.find(b"\n") + 1
+    if width <= 1 or len(content) % width:
+        return None
+    lines = np.frombuffer(content, dtype=np.uint8).reshape(-1, width)
+    if not (lines[:, -1] == ord("\n")).all():
+        return None
+
+    # one exponent per field, the fields being those of the first line
+    exponents = np.flatnonzero(lines[0] == ord("E"))
+    if not len(exponents) or len(exponents) != len(content[:width].split()):
+        return None
+
+    columns = []
+    for exponent in exponents[: len(GAUGE_COLUMNS)]:
+        values = _decode_field(lines, int(exponent))
+        if values is None:
+            return None
+        columns.append(values)
+    return np.column_stack(columns)
+
+
+def _decode_field(lines: np.ndarray, exponent: int) -> np.ndarray | None:
+    """Values of the field `[sign]d.ddddE±dd` whose E is at `exponent`."""
+    point = int(lines[0, :exponent].tobytes().rfind(b"."))
+    if point < 1 or exponent + 4 > lines.shape[1] - 1:
+        return None
+    mantissa = np.concatenate(
+        [lines[:, point - 1 : point], lines[:, point + 1 : exponent]], axis=1
+    )
+    power = lines[:, exponent + 2 : exponent + 4]
+    sign = lines[:, point - 2] if point >= 2 else None
+    exponent_sign = lines[:, exponent + 1]
+    after = lines[:, exponent + 4]
+    if not (
+        ((mantissa >= _ZERO) & (mantissa <= _NINE)).all()
+        and ((power >= _ZERO) & (power <= _NINE)).all()
+        and (lines[:, point] == ord(".")).all()
+        and (lines[:, exponent] == ord("E")).all()
+        and ((exponent_sign == _PLUS) | (exponent_sign == _MINUS)).all()
+        and ((after == _SPACE) | (after == ord("\n"))).all()
+        and (sign is None or ((sign == _SPACE) | (sign == _MINUS)).all())
+    ):
+        return None
+
+    n_decimals = exponent - point - 1
+    digits = (mantissa - _ZERO).astype(np.int64)
+    integer = digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1))
+    scale = (power[:, 0] - _ZERO).astype(np.int64) * 10 + power[:, 1] - _ZERO
+    scale = np.where(exponent_sign == _MINUS, -scale, scale) - n_decimals
+    values = np.where(
+        scale < 0,
+        integer / _POWERS[np.abs(scale)],
+        integer * _POWERS[np.abs(scale)],
+    )
+    if sign is not None:
+        values[sign == _MINUS] *= -1
+
+    # powers of ten beyond 1e22 aren't exact, these (rare) values are
+    # converted one by one
+    inexact = np.abs(scale) > 22
+    if inexact.any():
+        field = np.ascontiguousarray(
+            lines[inexact, max(point - 2, 0) : exponent + 4]
+        )
+        values[inexact] = (
+            field.view(f"S{field.shape[1]}").ravel().astype(float)
+        )
+    return values
+
+
+def _parse_free(content: bytes) -> np.ndarray:
+    """Split whitespace-separated values, as many per row as on the first."""
+    values = np.array(content.split(), dtype=float)
+    if not len(values):
+        return np.empty((0, len(GAUGE_COLUMNS)))
+    return values.reshape(-1, len(content.lstrip().split(b"\n", 1)[0].split()))
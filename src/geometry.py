@@ -0,0 +1,366 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .config import BathymetryConfig, Config, StructureConfig, VegetationConfig
+
+#########
+# types #
+#########
+
+# number of geometries kept in memory (see `get_geometry`)
+_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class ProfileArrays:
+    """Cross-shore profile resampled on the points of a grid."""
+
+    bed: np.ndarray  # bed level (m)
+    structure: np.ndarray  # height of the structures above the bed (m)
+    porosity: np.ndarray  # porosity, 1 outside of structures
+
+    @property
+    def bottom(self) -> np.ndarray:
+        """Bottom level including the structures (m), as given to SWASH."""
+        return self.bed + self.structure
+
+
+@dataclass(frozen=True)
+class Profile:
+    """
+    Cross-shore profile of the flume, defined by piecewise-linear breakpoints.
+
+    The bed level and the height of the structures are linear between
+    consecutive breakpoints, and the porosity is constant on each stretch
+    between them (`porosity[i]` between `x[i]` and `x[i + 1]`). Past the
+    first and last breakpoints, the levels stay constant and there is no
+    structure.
+    """
+
+    x: np.ndarray  # position of the breakpoints (m), increasing
+    bed: np.ndarray  # bed level at the breakpoints (m)
+    structure: np.ndarray  # structure height at the breakpoints (m)
+    porosity: np.ndarray  # porosity of each stretch, one less than `x`
+
+    def resample(self, x: np.ndarray) -> ProfileArrays:
+        """
+        Resample the profile on the points of a grid.
+
+        The stretch of each point is looked up once and used for every
+        array, which is linear in the number of points and breakpoints.
+        Points on a breakpoint between a structure and open water belong to
+        the structure.
+
+        Parameters
+        ----------
+        x : np.ndarray
+            Increasing positions of the grid points (m)
+
+        Returns
+        -------
+        ProfileArrays
+            Bed level, structure height and porosity at each point
+        """
+        right = np.searchsorted(self.x, x, side="right")
+        left = np.searchsorted(self.x, x, side="left")
+
+        # linear interpolation, constant past the ends
+        i = np.clip(right - 1, 0, len(self.x) - 2)
+        width = self.x[i + 1] - self.x[i]
+        weight = np.clip(
+            np.divide(
+                x - self.x[i],
+                width,
+                out=np.ones_like(x, dtype=float),
+                where=width > 0,
+            ),
+            0.0,
+            1.0,
+        )
+        bed = self.bed[i] + weight * (self.bed[i + 1] - self.bed[i])
+        structure = self.structure[i] + weight * (
+            self.structure[i + 1] - self.structure[i]
+        )
+        outside = (x < self.x[0]) | (x > self.x[-1])
+        structure[outside] = 0.0
+
+        # open water on both sides, points on a breakpoint taking the
+        # smallest porosity of the stretches they bound
+        porosity = np.concatenate([[1.0], self.porosity, [1.0]])
+        return ProfileArrays(
+            bed=bed,
+            structure=structure,
+            porosity=np.minimum(porosity[left], porosity[right]),
+        )
+
+
+@dataclass(frozen=True)
+class Geometry:
+    """
+    Grid of a configuration, with the per-point arrays derived from it.
+
+    It is computed once per grid, breakwater and bathymetry (see
+    `get_geometry`) and shared by the input writers and the plots, so its
+    arrays are read-only.
+    """
+
+    x: np.ndarray  # position of the grid points (m)
+    bed: np.ndarray  # bed level (m)
+    structure: np.ndarray  # height of the structures above the bed (m)
+    bottom: np.ndarray  # bottom level including the structures (m)
+    porosity: np.ndarray  # porosity, 1 outside of structures
+    breakwater_mask: np.ndarray  # points on the breakwater, toes included
+    crest_mask: np.ndarray  # points on the breakwater crest
+    crest_middle: float  # middle of the breakwater crest (m)
+
+    def vegetation_density(self, vegetation: VegetationConfig) -> np.ndarray:
+        """
+        Number of plant stems per square metre at each point.
+
+        Vegetation only grows on the breakwater crest. With two vegetation
+        types, the primary one either covers the seaward half of the crest
+        ("half") or alternates with the other in strips of `type_fraction`
+        of the crest ("alternating").
+
+        Parameters
+        ----------
+        vegetation : VegetationConfig
+            Vegetation on the crest
+
+        Returns
+        -------
+        np.ndarray
+            Plant density (1/m²)
+        """
+        density = np.zeros_like(self.x)
+        if vegetation.other_type is None:
+            density[self.crest_mask] = vegetation.type.plant_density
+        elif vegetation.distribution == "half":
+            seaward = self.x <= self.crest_middle
+            density[self.crest_mask & seaward] = vegetation.type.plant_density
+            density[self.crest_mask & ~seaward] = (
+                vegetation.other_type.plant_density
+            )
+        else:
+            n_crest = int(self.crest_mask.sum())
+            strip = max(1, int(n_crest * vegetation.type_fraction))
+            primary = (np.arange(n_crest) // strip) % 2 == 0
+            density[self.crest_mask] = np.where(
+                primary,
+                vegetation.type.plant_density,
+                vegetation.other_type.plant_density,
+            )
+        return density
+
+
+############
+# external #
+############
+
+
+def get_geometry(config: Config) -> Geometry:
+    """
+    Geometry of a configuration, shared with the configurations having the
+    same grid, breakwater and bathymetry.
+
+    Geometries are cached by the hashes of these sections, so configurations
+    must not be modified after their validation (which computes the hashes).
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+
+    Returns
+    -------
+    Geometry
+        Grid and derived arrays
+    """
+    key = (config.grid.hash, config.breakwater.hash, config.bathymetry.hash)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    geometry = _build_geometry(config)
+    with _cache_lock:
+        _cache[key] = geometry
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return geometry
+
+
+def build_profile(config: Config) -> Profile:
+    """
+    Build the cross-shore profile of a configuration.
+
+    The bed follows the survey of `config.bathymetry` (if any) then its
+    segments, and carries the breakwater (if enabled) and the other
+    structures. Overlapping structures merge, keeping the highest crest and
+    the lowest porosity.
+
+    Parameters
+    ----------
+    config : Config
+        Configuration of the simulation
+
+    Returns
+    -------
+    Profile
+        Breakpoints of the profile
+    """
+    bed_x, bed_z = _bed_breakpoints(config.bathymetry)
+    structures = list(config.bathymetry.structures)
+    if config.breakwater.enable:
+        structures.insert(
+            0,
+            StructureConfig(
+                start_position=config.breakwater.breakwater_start_position,
+                crest_height=config.breakwater.crest_height,
+                crest_length=config.breakwater.crest_length,
+                slope=config.breakwater.slope,
+                porosity=config.breakwater.porosity,
+            ),
+        )
+    shapes = [_trapezoid(structure) for structure in structures]
+
+    x = np.unique(np.concatenate([bed_x, *(shape[0] for shape in shapes)]))
+    structure = np.zeros_like(x)
+    porosity = np.ones(len(x) - 1)
+    middle = (x[:-1] + x[1:]) / 2
+    for (shape_x, shape_z), structure_ in zip(shapes, structures):
+        structure = np.maximum(
+            structure, np.interp(x, shape_x, shape_z, left=0.0, right=0.0)
+        )
+        inside = (middle >= shape_x[0]) & (middle <= shape_x[-1])
+        porosity[inside] = np.minimum(porosity[inside], structure_.porosity)
+
+    return Profile(
+        x=x,
+        bed=np.interp(x, bed_x, bed_z),
+        structure=structure,
+        porosity=porosity,
+    )
+
+
+def read_survey(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Read a bed survey from a CSV file.
+
+    The first two columns are the cross-shore position and the bed level
+    (m). Header and comment lines (starting with #) are skipped, and the
+    points are sorted by position, keeping the first of duplicate positions.
+
+    Parameters
+    ----------
+    path : Path
+        CSV file
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Positions and bed levels (m)
+
+    Raises
+    ------
+    ValueError
+        If the file holds less than two points
+    """
+    data = np.genfromtxt(
+        path, delimiter=",", comments="#", usecols=(0, 1), ndmin=2
+    )
+    data = data[~np.isnan(data).any(axis=1)]
+    x, index = np.unique(data[:, 0], return_index=True)
+    if len(x) < 2:
+        raise ValueError(f"The survey {path} needs at least two points")
+    return x, data[index, 1]
+
+
+############
+# internal #
+############
+
+
+_cache: "OrderedDict[tuple[str, str, str], Geometry]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _build_geometry(config: Config) -> Geometry:
+    x = np.linspace(0, config.grid.length, config.grid.nx_cells + 1)
+    arrays = build_profile(config).resample(x)
+
+    breakwater = config.breakwater
+    crest_start = (
+        breakwater.breakwater_start_position
+        + breakwater.crest_height * breakwater.slope
+    )
+    crest_end = crest_start + breakwater.crest_length
+    if breakwater.enable:
+        breakwater_mask = (x >= breakwater.breakwater_start_position) & (
+            x <= config.breakwater_end_position
+        )
+        crest_mask = (x >= crest_start) & (x <= crest_end)
+    else:
+        breakwater_mask = crest_mask = np.zeros_like(x, dtype=bool)
+
+    geometry = Geometry(
+        x=x,
+        bed=arrays.bed,
+        structure=arrays.structure,
+        bottom=arrays.bottom,
+        porosity=arrays.porosity,
+        breakwater_mask=breakwater_mask,
+        crest_mask=crest_mask,
+        crest_middle=(crest_start + crest_end) / 2,
+    )
+    for array in (
+        geometry.x,
+        geometry.bed,
+        geometry.structure,
+        geometry.bottom,
+        geometry.porosity,
+        geometry.breakwater_mask,
+        geometry.crest_mask,
+    ):
+        array.setflags(write=False)
+    return geometry
+
+
+def _bed_breakpoints(
+    bathymetry: BathymetryConfig,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Breakpoints of the bed, from the survey then the segments."""
+    if bathymetry.survey is not None:
+        x, z = read_survey(bathymetry.survey_path)
+    else:
+        x, z = np.array([0.0]), np.array([0.0])
+    lengths = np.array([segment.length for segment in bathymetry.segments])
+    rises = lengths * [segment.slope for segment in bathymetry.segments]
+    x = np.concatenate([x, x[-1] + np.cumsum(lengths)])
+    z = np.concatenate([z, z[-1] + np.cumsum(rises)])
+    if len(x) == 1:
+        x, z = np.append(x, x[0] + 1.0), np.append(z, z[0])
+    return x, z
+
+
+def _trapezoid(structure: StructureConfig) -> tuple[np.ndarray, np.ndarray]:
+    """Toes and shoulders of a structure, with its height above the bed."""
+    seaward_shoulder = (
+        structure.start_position + structure.crest_height * structure.slope
+    )
+    leeward_shoulder = seaward_shoulder + structure.crest_length
+    leeward_toe = leeward_shoulder + structure.crest_height * structure.slope
+    return (
+        np.array(
+            [
+                structure.start_position,
+                seaward_shoulder,
+                leeward_shoulder,
+                leeward_toe,
+            ]
+        ),
+        np.array([0.0, structure.crest_height, structure.crest_height, 0.0]),
+    )
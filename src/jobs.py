@@ -0,0 +1,532 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import cache
+from .compression import Compression
+from .config import Config, read_config
+from .export import ImageExporter
+from .simulation import run_simulation
+from .utils.paths import root_dir
+from .utils.print import done_print, error_print, load_print
+
+#########
+# types #
+#########
+
+QUEUE_FILE = "queue.db"
+
+STATES = ("queued", "running", "done", "failed")
+
+# a running job whose worker hasn't signaled it is alive for this long (s) is
+# considered abandoned (e.g. its machine crashed) and can be claimed again
+STALE_AFTER = 300.0
+HEARTBEAT_INTERVAL = 30.0
+
+# interval (s) at which idle workers look for jobs that became claimable
+IDLE_INTERVAL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    config_path TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    physics_hash TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    queued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    exit_code INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+@dataclass(frozen=True)
+class Job:
+    """A simulation in the job queue."""
+
+    id: int
+    name: str
+    config_path: str
+    config_hash: str
+    physics_hash: str
+    state: str
+    attempts: int
+    worker: str | None
+    queued_at: float
+    started_at: float | None
+    finished_at: float | None
+    heartbeat_at: float | None
+    exit_code: int | None
+    error: str | None
+
+    @property
+    def duration(self) -> float | None:
+        """Wall time (s) of the last attempt, up to now if still running."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+
+############
+# external #
+############
+
+
+class JobQueue:
+    """
+    Persistent queue of simulations stored in a SQLite database.
+
+    Every operation is a single statement or an immediate transaction, so
+    several worker processes can drain the same queue: a job is only ever
+    claimed by one worker, and jobs sharing their physics (and thus their
+    results directory) are never run at the same time.
+
+    This relies on the file locks of SQLite, so the database must be on a
+    local filesystem. Over NFS and other network filesystems these locks are
+    unreliable, and two workers could claim the same job or corrupt the
+    database.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def add(self, config: Config, config_path: Path) -> Job | None:
+        """
+        Queue a simulation.
+
+        Parameters
+        ----------
+        config : Config
+            Configuration to simulate
+        config_path : Path
+            Configuration file, read again when the job runs
+
+        Returns
+        -------
+        Job | None
+            Queued job, or None if the same configuration is already queued
+            or running
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            active = conn.execute(
+                "SELECT 1 FROM jobs WHERE name = ? AND config_hash = ?"
+                " AND state IN ('queued', 'running')",
+                (config.name, config.hash),
+            ).fetchone()
+            if active is not None:
+                conn.execute("COMMIT")
+                return None
+            row = conn.execute(
+                "INSERT INTO jobs"
+                " (name, config_path, config_hash, physics_hash, queued_at)"
+                " VALUES (?, ?, ?, ?, ?) RETURNING *",
+                (
+                    config.name,
+                    str(config_path.resolve()),
+                    config.hash,
+                    config.physics_hash,
+                    time.time(),
+                ),
+            ).fetchone()
+            conn.execute("COMMIT")
+        return _to_job(row)
+
+    def jobs(self, state: str | None = None) -> list[Job]:
+        """
+        List the jobs of the queue, in the order they were added.
+
+        Parameters
+        ----------
+        state : str | None
+            Only list jobs in this state
+
+        Returns
+        -------
+        list[Job]
+            Jobs of the queue
+        """
+        with self._connect() as conn:
+            if state is None:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id")
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM jobs WHERE state = ? ORDER BY id", (state,)
+                )
+            return [_to_job(row) for row in rows]
+
+    def claim(self, worker: str) -> Job | None:
+        """
+        Atomically claim the oldest queued job.
+
+        Jobs whose physics is already being simulated by another job are
+        skipped, they are claimed once it is done and reuse its results.
+
+        Parameters
+        ----------
+        worker : str
+            Identifier of the claiming worker
+
+        Returns
+        -------
+        Job | None
+            Claimed job, now running, or None if no job can be claimed
+        """
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "UPDATE jobs SET state = 'running',"
+                " attempts = attempts + 1, worker = ?, started_at = ?,"
+                " heartbeat_at = ?, finished_at = NULL, exit_code = NULL,"
+                " error = NULL"
+                " WHERE id = ("
+                "  SELECT id FROM jobs WHERE state = 'queued'"
+                "  AND physics_hash NOT IN ("
+                "   SELECT physics_hash FROM jobs WHERE state = 'running'"
+                "  ) ORDER BY id LIMIT 1"
+                " ) RETURNING *",
+                (worker, now, now),
+            ).fetchone()
+        return None if row is None else _to_job(row)
+
+    def heartbeat(self, worker: str) -> None:
+        """Signal that the running jobs of `worker` are still alive."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ?"
+                " WHERE state = 'running' AND worker = ?",
+                (time.time(), worker),
+            )
+
+    def finish(
+        self,
+        job: Job,
+        *,
+        success: bool,
+        exit_code: int | None = None,
+        error: str | None = None,
+    ) -> None:
+        """
+        Record the end of a job.
+
+        Nothing is recorded if the job was taken over by another worker in
+        the meantime (see `requeue_stale`).
+
+        Parameters
+        ----------
+        job : Job
+            Finished job, as returned by `claim`
+        success : bool
+            Whether the simulation succeeded
+        exit_code : int | None
+            Exit code of SWASH, if it ran
+        error : str | None
+            Error message, if the job failed
+        """
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, exit_code = ?,"
+                " error = ? WHERE id = ? AND state = 'running' AND worker = ?",
+                (
+                    "done" if success else "failed",
+                    time.time(),
+                    exit_code,
+                    error,
+                    job.id,
+                    job.worker,
+                ),
+            )
+
+    def release(self, worker: str) -> int:
+        """
+        Put the running jobs of a worker back in the queue.
+
+        Parameters
+        ----------
+        worker : str
+            Identifier of the worker
+
+        Returns
+        -------
+        int
+            Number of jobs put back in the queue
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = 'queued', worker = NULL"
+                " WHERE state = 'running' AND worker = ?",
+                (worker,),
+            ).rowcount
+
+    def requeue_stale(self, max_age: float = STALE_AFTER) -> int:
+        """
+        Put back in the queue the running jobs whose worker is gone.
+
+        A worker is gone if it ran on this machine and its process doesn't
+        exist anymore, or if it hasn't sent a heartbeat for `max_age` seconds.
+
+        Parameters
+        ----------
+        max_age : float, default STALE_AFTER
+            Time (s) without heartbeat after which a job is abandoned
+
+        Returns
+        -------
+        int
+            Number of jobs put back in the queue
+        """
+        now = time.time()
+        stale = [
+            job
+            for job in self.jobs("running")
+            if (job.heartbeat_at or 0.0) < now - max_age
+            or not _is_worker_alive(job.worker)
+        ]
+        with self._connect() as conn:
+            return sum(
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', worker = NULL"
+                    " WHERE id = ? AND state = 'running' AND worker IS ?",
+                    (job.id, job.worker),
+                ).rowcount
+                for job in stale
+            )
+
+    def retry(self, names: list[str] | None = None) -> int:
+        """
+        Put failed jobs back in the queue.
+
+        Parameters
+        ----------
+        names : list[str] | None
+            Only retry the jobs of these configurations
+
+        Returns
+        -------
+        int
+            Number of jobs put back in the queue
+        """
+        with self._connect() as conn:
+            if names:
+                return conn.execute(
+                    "UPDATE jobs SET state = 'queued' WHERE state = 'failed'"
+                    f" AND name IN ({', '.join('?' * len(names))})",
+                    names,
+                ).rowcount
+            return conn.execute(
+                "UPDATE jobs SET state = 'queued' WHERE state = 'failed'"
+            ).rowcount
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # autocommit mode, transactions are explicit; the timeout makes
+        # concurrent workers wait for each other's locks instead of failing
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
+def get_queue() -> JobQueue:
+    """
+    Get the job queue of the project, in `simulations/queue.db`.
+
+    Returns
+    -------
+    JobQueue
+        Job queue of the project
+    """
+    return JobQueue(root_dir / "simulations" / QUEUE_FILE)
+
+
+def run_worker(
+    queue: JobQueue,
+    *,
+    jobs: int,
+    force: bool = False,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+    exporter: ImageExporter | None = None,
+) -> dict[str, bool]:
+    """
+    Run the simulations of the queue until it is empty.
+
+    Each of the `jobs` threads claims a job, runs it and records the result,
+    so several workers (in this or other processes) can drain the queue
+    together. If interrupted, the jobs of this worker are put back in the
+    queue.
+
+    Parameters
+    ----------
+    queue : JobQueue
+        Job queue to drain
+    jobs : int
+        Maximum number of SWASH processes running at the same time
+    force : bool, default False
+        Run SWASH even if a complete run with the same inputs exists
+    scratch : Path | None, default None
+        Directory to run SWASH in before publishing the results (see
+        `run_simulation`)
+    compression : Compression, default "none"
+        Compression of the bulky outputs once each run finished
+    exporter : ImageExporter | None, default None
+        Renderer pool exporting the figures of the analyses to PNG
+
+    Returns
+    -------
+    dict[str, bool]
+        Whether each simulation run by this worker succeeded, keyed by
+        configuration name
+    """
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    jobs = max(1, jobs)
+    results: dict[str, bool] = {}
+    stop = threading.Event()
+
+    def work() -> None:
+        while not stop.is_set():
+            job = queue.claim(worker)
+            if job is None:
+                queue.requeue_stale()
+                if not queue.jobs("queued"):
+                    return
+                # queued jobs wait for a run of the same physics to finish
+                stop.wait(IDLE_INTERVAL)
+                continue
+            results[job.name] = _run_job(
+                queue,
+                job,
+                echo=jobs == 1,
+                force=force,
+                scratch=scratch,
+                compression=compression,
+                exporter=exporter,
+            )
+
+    def heartbeat() -> None:
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            queue.heartbeat(worker)
+
+    queue.requeue_stale()
+    n_queued = len(queue.jobs("queued"))
+    load_print(
+        f"Running {n_queued} queued simulations with {jobs} parallel jobs...",
+        end="\n",
+    )
+
+    heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+    heartbeat_thread.start()
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    try:
+        for future in [executor.submit(work) for _ in range(jobs)]:
+            future.result()
+    except KeyboardInterrupt:
+        stop.set()
+        n_released = queue.release(worker)
+        error_print(
+            f"Interrupted, {n_released} running simulations put back in the"
+            " queue"
+        )
+        raise
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    n_failed = sum(not success for success in results.values())
+    if n_failed:
+        error_print(
+            f"{len(results) - n_failed}/{len(results)} simulations"
+            " completed successfully"
+        )
+    else:
+        done_print(f"All {len(results)} simulations completed successfully")
+    return results
+
+
+############
+# internal #
+############
+
+
+def _to_job(row: sqlite3.Row) -> Job:
+    return Job(**dict(row))
+
+
+def _is_worker_alive(worker: str | None) -> bool:
+    """Check whether a worker is alive, if it runs on this machine."""
+    if worker is None:
+        return False
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        # can't be checked, rely on heartbeats
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run_job(
+    queue: JobQueue,
+    job: Job,
+    *,
+    echo: bool,
+    force: bool,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+    exporter: ImageExporter | None = None,
+) -> bool:
+    load_print(f"Running {job.name} (attempt {job.attempts})...", end="\n")
+    try:
+        config = read_config(Path(job.config_path))
+        success = run_simulation(
+            config,
+            force=force,
+            echo=echo,
+            scratch=scratch,
+            compression=compression,
+            exporter=exporter,
+        )
+    except Exception as e:
+        error_print(f"Simulation {job.name} failed: {e}")
+        queue.finish(job, success=False, error=str(e))
+        return False
+
+    swash_dir = (
+        root_dir / "simulations" / f"{config.name}_{config.hash}" / "swash"
+    )
+    exit_code = cache.read_manifest(swash_dir).get("exit_code")
+    queue.finish(
+        job,
+        success=success,
+        exit_code=exit_code,
+        error=None if success else "SWASH simulation failed",
+    )
+    if success:
+        done_print(f"Simulation {job.name} done")
+    else:
+        error_print(f"Simulation {job.name} failed")
+    return success
@@ -0,0 +1,366 @@
+import ctypes
+import os
+import queue
+import re
+import select
+import struct
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+#########
+# types #
+#########
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """Progress of a running SWASH simulation."""
+
+    simulation_time: float  # simulated time reached (s)
+    total: float  # total simulated time (s)
+
+    @property
+    def fraction(self) -> float:
+        """Fraction of the simulation done (0-1)."""
+        if self.total <= 0:
+            return 1.0
+        return min(1.0, self.simulation_time / self.total)
+
+
+class PrintScanner:
+    """Incremental scanner of the SWASH PRINT file.
+
+    Bytes are fed as they are appended to the file. Only complete lines are
+    scanned and only the last time report of each chunk is parsed, so the cost
+    is a single C-level search per chunk whatever the number of time steps.
+    """
+
+    _marker = b"Time of simulation"
+    _pattern = re.compile(
+        rb"Time of simulation\s*->\s*\d+\.\d+\s*in sec:\s*(\d+\.\d+)"
+    )
+
+    def __init__(self) -> None:
+        self.simulation_time = 0.0
+        self.n_reports = 0  # time reports scanned, one per time step
+        self._partial = b""
+
+    def feed(self, chunk: bytes) -> float | None:
+        """Scan newly appended bytes.
+
+        Returns the new simulated time if it advanced, None otherwise.
+        """
+        data = self._partial + chunk
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+
+        self.n_reports += data.count(self._marker, 0, end)
+        start = data.rfind(self._marker, 0, end)
+        if start == -1:
+            return None
+        match = self._pattern.match(data, start, end)
+        if match is None:
+            return None
+        time_ = float(match.group(1))
+        if time_ <= self.simulation_time:
+            return None
+        self.simulation_time = time_
+        return time_
+
+
+class DirectoryWatcher:
+    """Wait for changes to files of a directory.
+
+    Uses inotify on Linux, so that waiting costs nothing while files don't
+    change, and falls back to comparing file sizes at a fixed interval
+    elsewhere (or if inotify isn't available).
+    """
+
+    # inotify event flags (see inotify(7))
+    _IN_MODIFY = 0x00000002
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _event_header = struct.Struct("iIII")
+
+    def __init__(
+        self,
+        directory: Path,
+        names: set[str],
+        *,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.names = names
+        self.poll_interval = poll_interval
+        self._sizes: dict[str, int] = {}
+        self._wake_read: int | None
+        self._wake_write: int | None
+        self._wake_read, self._wake_write = os.pipe()
+        self._inotify_fd = _init_inotify(directory) if use_inotify else None
+        # guards the file descriptors, which `wake` uses from other threads
+        self._lock = threading.Lock()
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify_fd is not None
+
+    @property
+    def closed(self) -> bool:
+        return self._wake_read is None
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        """Wait until watched files change or `wake` is called.
+
+        Returns the names of the watched files that changed (possibly empty on
+        timeout or wake up, and always once closed).
+        """
+        if self.closed:
+            return set()
+        if self._inotify_fd is None:
+            return self._poll(timeout)
+
+        readable, _, _ = select.select(
+            [self._inotify_fd, self._wake_read], [], [], timeout
+        )
+        if self._wake_read in readable:
+            os.read(self._wake_read, 1024)  # type: ignore
+        if self._inotify_fd not in readable:
+            return set()
+        return self._read_events()
+
+    def wake(self) -> None:
+        """Interrupt a pending `wait`, doing nothing once closed."""
+        with self._lock:
+            if self._wake_write is None:
+                return
+            try:
+                os.write(self._wake_write, b"\0")
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """Close the file descriptors, which is safe to do more than once."""
+        with self._lock:
+            for fd in (self._inotify_fd, self._wake_read, self._wake_write):
+                if fd is not None:
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+            self._inotify_fd = self._wake_read = self._wake_write = None
+
+    def _read_events(self) -> set[str]:
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self._inotify_fd, 64 * 1024)  # type: ignore
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + self._event_header.size <= len(buffer):
+                _, _, _, length = self._event_header.unpack_from(
+                    buffer, offset
+                )
+                offset += self._event_header.size
+                name = buffer[offset : offset + length].rstrip(b"\0").decode()
+                offset += length
+                if name in self.names:
+                    changed.add(name)
+        return changed
+
+    def _poll(self, timeout: float | None) -> set[str]:
+        interval = (
+            self.poll_interval
+            if timeout is None
+            else min(timeout, self.poll_interval)
+        )
+        readable, _, _ = select.select([self._wake_read], [], [], interval)
+        if readable:
+            os.read(self._wake_read, 1024)  # type: ignore
+        changed = set()
+        for name in self.names:
+            try:
+                size = (self.directory / name).stat().st_size
+            except OSError:
+                continue
+            if self._sizes.get(name) != size:
+                self._sizes[name] = size
+                changed.add(name)
+        return changed
+
+
+class FileTail:
+    """Read the bytes appended to a file since the last read.
+
+    The file is opened once it exists and kept open, so following it only
+    costs a read per change.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = None
+
+    def read(self) -> bytes:
+        if self._file is None:
+            try:
+                self._file = open(self.path, "rb")
+            except OSError:
+                return b""
+        try:
+            return self._file.read()
+        except (OSError, ValueError):
+            return b""
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ProgressMonitor:
+    """Follow the progress of a running SWASH simulation from its PRINT file.
+
+    Progress is published as `ProgressEvent`s, both to callbacks registered
+    with `subscribe` (called from the monitoring thread) and as a stream
+    returned by `events`, so that the CLI progress bar, the dashboard and the
+    batch runner can all consume it.
+
+    Usage:
+        with ProgressMonitor(swash_dir / "PRINT", total=duration) as monitor:
+            monitor.subscribe(callback)
+            ...
+    """
+
+    def __init__(
+        self,
+        print_path: Path,
+        *,
+        total: float,
+        min_interval: float = 0.1,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.print_path = print_path
+        self.total = total
+        self.min_interval = min_interval
+        self._scanner = PrintScanner()
+        self._tail = FileTail(print_path)
+        self._watcher = DirectoryWatcher(
+            print_path.parent,
+            {print_path.name},
+            poll_interval=poll_interval,
+            use_inotify=use_inotify,
+        )
+        self._callbacks: list[Callable[[ProgressEvent], None]] = []
+        self._queues: list[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def simulation_time(self) -> float:
+        return self._scanner.simulation_time
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> None:
+        """Call `callback` with every new progress event."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def events(self) -> Iterator[ProgressEvent]:
+        """Stream of progress events, ending when the monitor stops."""
+        events: queue.Queue = queue.Queue()
+        with self._lock:
+            self._queues.append(events)
+            if self._stop.is_set():
+                events.put(None)
+        while (event := events.get()) is not None:
+            yield event
+
+    def start(self) -> "ProgressMonitor":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop monitoring, after reading what was written until now."""
+        self._stop.set()
+        self._watcher.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        else:
+            self._close()
+
+    def __enter__(self) -> "ProgressMonitor":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                if self.print_path.name in self._watcher.wait(timeout=1.0):
+                    self._read()
+                    # coalesce the many small writes SWASH does per time step
+                    self._stop.wait(self.min_interval)
+            self._read()
+        finally:
+            self._close()
+
+    def _read(self) -> None:
+        time_ = self._scanner.feed(self._tail.read())
+        if time_ is not None:
+            self._publish(ProgressEvent(time_, self.total))
+
+    def _publish(self, event: ProgressEvent) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+            queues = list(self._queues)
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Progress callback failed: {e}", file=sys.stderr)
+        for events in queues:
+            events.put(event)
+
+    def _close(self) -> None:
+        self._tail.close()
+        self._watcher.close()
+        with self._lock:
+            for events in self._queues:
+                events.put(None)
+
+
+############
+# internal #
+############
+
+
+def _init_inotify(directory: Path) -> int | None:
+    """Create an inotify instance watching `directory`, if supported."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        # the running interpreter is already linked against libc
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = (
+        DirectoryWatcher._IN_MODIFY
+        | DirectoryWatcher._IN_CLOSE_WRITE
+        | DirectoryWatcher._IN_MOVED_TO
+        | DirectoryWatcher._IN_CREATE
+    )
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
@@ -0,0 +1,242 @@
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .utils.print import format_bytes
+
+#########
+# types #
+#########
+
+_PROC = Path("/proc")
+
+
+@dataclass(frozen=True)
+class ResourceUsage:
+    """Resources used by a SWASH run."""
+
+    wall_time: float  # s
+    user_time: float  # CPU s
+    system_time: float  # CPU s
+    peak_rss: int  # bytes, of the largest process
+    bytes_written: int  # size of the files written in the run directory
+    simulation_time: float  # simulated s
+
+    @property
+    def speed(self) -> float:
+        """Simulated seconds per wall-clock second."""
+        if self.wall_time <= 0:
+            return 0.0
+        return self.simulation_time / self.wall_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "speed": round(self.speed, 3)}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ResourceUsage | None":
+        try:
+            return cls(
+                wall_time=float(data["wall_time"]),
+                user_time=float(data["user_time"]),
+                system_time=float(data["system_time"]),
+                peak_rss=int(data["peak_rss"]),
+                bytes_written=int(data["bytes_written"]),
+                simulation_time=float(data["simulation_time"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def summary(self) -> str:
+        return (
+            f"wall {self.wall_time:.1f}s,"
+            f" cpu {self.user_time:.1f}s user + {self.system_time:.1f}s sys,"
+            f" peak rss {format_bytes(self.peak_rss)},"
+            f" written {format_bytes(self.bytes_written)},"
+            f" {self.speed:.2f} simulated s/s"
+        )
+
+
+class ResourceMonitor:
+    """
+    Measure the resources used by a running process and its children.
+
+    On Linux, the CPU time and peak memory of every process of the tree are
+    sampled from `/proc` while it runs, which only counts this run even if
+    other simulations run at the same time. CPU time used after the last
+    sample (at most `interval` seconds) isn't counted. Elsewhere, the usage of
+    every terminated child of this process is used instead
+    (`RUSAGE_CHILDREN`), which is only exact if a single simulation runs at a
+    time.
+
+    Usage:
+        with ResourceMonitor(process.pid, directory=swash_dir) as monitor:
+            process.wait()
+        usage = monitor.usage(simulation_time)
+    """
+
+    def __init__(
+        self, pid: int, *, directory: Path, interval: float = 0.5
+    ) -> None:
+        self.pid = pid
+        self.directory = directory
+        self.interval = interval
+        self._use_proc = (_PROC / str(pid) / "stat").exists()
+        self._clock_ticks = (
+            os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        )
+        # latest (user, system) ticks and peak rss of each process of the
+        # tree, keyed by (pid, start time) to be robust to pid reuse
+        self._cpu: dict[tuple[int, int], tuple[int, int]] = {}
+        self._peak_rss = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at = 0.0
+        self._start_wall = 0.0
+        self._end_wall: float | None = None
+        self._rusage_start: resource.struct_rusage | None = None
+
+    def start(self) -> "ResourceMonitor":
+        self._started_at = time.time()
+        self._start_wall = time.monotonic()
+        self._rusage_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if self._use_proc:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._end_wall = time.monotonic()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def __enter__(self) -> "ResourceMonitor":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def usage(self, simulation_time: float) -> ResourceUsage:
+        """
+        Resources used by the process.
+
+        Parameters
+        ----------
+        simulation_time : float
+            Simulated time reached by the run (s)
+
+        Returns
+        -------
+        ResourceUsage
+            Resources used between `start` and `stop`
+        """
+        end = (
+            self._end_wall if self._end_wall is not None else time.monotonic()
+        )
+        if self._use_proc:
+            user = sum(user for user, _ in self._cpu.values())
+            system = sum(system for _, system in self._cpu.values())
+            user_time = user / self._clock_ticks
+            system_time = system / self._clock_ticks
+            peak_rss = self._peak_rss
+        else:
+            before = self._rusage_start
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            user_time = after.ru_utime - (before.ru_utime if before else 0.0)
+            system_time = after.ru_stime - (before.ru_stime if before else 0.0)
+            # kilobytes on Linux, bytes on macOS
+            peak_rss = after.ru_maxrss * (
+                1 if sys.platform == "darwin" else 1024
+            )
+        return ResourceUsage(
+            wall_time=end - self._start_wall,
+            user_time=user_time,
+            system_time=system_time,
+            peak_rss=peak_rss,
+            bytes_written=_bytes_written(self.directory, self._started_at),
+            simulation_time=simulation_time,
+        )
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        for pid in _process_tree(self.pid):
+            stat = _read_stat(pid)
+            if stat is None:
+                continue
+            user, system, start_time = stat
+            self._cpu[(pid, start_time)] = (user, system)
+            self._peak_rss = max(self._peak_rss, _read_peak_rss(pid))
+
+
+############
+# internal #
+############
+
+
+def _process_tree(pid: int) -> list[int]:
+    """Pids of a process and all its descendants."""
+    children: dict[int, list[int]] = {}
+    for entry in _PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_bytes()
+        except OSError:
+            continue
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        children.setdefault(int(fields[1]), []).append(int(entry.name))
+
+    tree = [pid]
+    for parent in tree:
+        tree.extend(children.get(parent, []))
+    return tree
+
+
+def _read_stat(pid: int) -> tuple[int, int, int] | None:
+    """User and system CPU ticks, and start time of a process."""
+    try:
+        stat = (_PROC / str(pid) / "stat").read_bytes()
+    except OSError:
+        return None
+    # the command name may contain spaces, fields start after its ")"
+    fields = stat[stat.rfind(b")") + 2 :].split()
+    # utime, stime and starttime are fields 14, 15 and 22 of proc(5)
+    return int(fields[11]), int(fields[12]), int(fields[19])
+
+
+def _read_peak_rss(pid: int) -> int:
+    """Peak resident set size (bytes) of a process."""
+    try:
+        with open(_PROC / str(pid) / "status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def _bytes_written(directory: Path, since: float) -> int:
+    """Total size of the files of a directory modified after `since`."""
+    total = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        if entry.is_file() and stat.st_mtime >= since:
+            total += stat.st_size
+    return total
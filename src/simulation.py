@@ -1,60 +1,276 @@
-import re
+import fcntl
+import functools
+import os
+import shutil
+import signal
 import subprocess
+import tempfile
 import threading
-import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any
 
-import numpy as np
 import tqdm
-from jinja2 import Template
-
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+)
+
+from . import cache
+from .compression import (
+    Compression,
+    compress_file,
+    open_output,
+    output_exists,
+    remove_output,
+)
 from .config import Config
+from .convergence import ConvergenceMonitor, truncate_outputs
+from .export import ImageExporter
+from .gauges import GAUGE_MATRIX, GAUGE_STORE
+from .geometry import get_geometry
+from .monitor import ProgressMonitor
+from .resources import ResourceMonitor
+from .stability import InstabilityWatchdog
+from .utils.arrays import ARRAY_SUFFIXES, write_array
 from .utils.paths import root_dir
 from .utils.print import done_print, error_print, load_print
 
+if TYPE_CHECKING:
+    from .analysis import StreamingAnalysis
+
+#########
+# types #
+#########
+
+# spun-up wave field written by spin-up runs and read by hot-started runs
+HOTSTART_FILE = "hotstart"
+
+# compiled templates, shared between processes and runs
+TEMPLATE_CACHE_DIR = root_dir / ".cache" / "jinja"
+
+# environment variable overriding `TEMPLATE_CACHE_DIR`, an empty value
+# disabling the cache on disk
+TEMPLATE_CACHE_ENV = "SWG_TEMPLATE_CACHE"
+
+# time integration of the successive attempts of a run, each retry after an
+# instability (see `InstabilityWatchdog`) narrowing the Courant number window
+# and reducing the initial time step:
+# (min Courant number, max Courant number, initial time step factor)
+STABILITY_LEVELS = [(0.4, 0.8, 1.0), (0.3, 0.6, 0.5), (0.2, 0.5, 0.25)]
+
 ############
 # external #
 ############
 
 
-def run_simulation(config: Config) -> None:
+def run_simulation(
+    config: Config,
+    *,
+    force: bool = False,
+    echo: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+    exporter: ImageExporter | None = None,
+) -> bool:
     """Run a SWASH simulation based on the provided configuration.
 
     Creates the necessary input files (INPUT, bathymetry, porosity, vegetation)
     in the simulation directory and executes SWASH.
+
+    Results are shared between configurations with the same physics (see
+    `cache.link_simulation_dir`). If they already hold a complete run for the
+    same physics, INPUT and template (see `cache.is_run_complete`), SWASH
+    isn't executed again and only the analysis products that are missing or
+    out of date are computed again (see `analysis.analyze_simulation`).
+    `force` disables both caches.
+
+    When `echo` is False, progress messages are silenced (errors are still
+    printed) and, if given, `on_progress` receives the simulated time in
+    seconds instead of a per-run progress bar being shown. This is how the
+    batch runner aggregates several concurrent runs into a single display.
+
+    With `scratch` (e.g. /dev/shm or a local disk), SWASH runs in a private
+    directory under it instead of writing to the simulations directory, and
+    the finished run is then published there at once (see
+    `cache.publish_run`), so that readers never see partial results.
+
+    With `compression`, the PRINT file and gauge outputs are compressed once
+    SWASH finished (see `compression.compress_file`), the readers of the
+    outputs decompressing them on the fly.
+
+    The figures of the analysis are only exported to PNG if an `exporter` is
+    given, which does it in the background (see `export.ImageExporter`).
+
+    Returns:
+        bool: True if the simulation succeeded, False otherwise
     """
-    load_print(f"Running simulation {config.name}...")
+    load_print(f"Running simulation {config.name}...", echo=echo)
     template_dir = root_dir / "templates"
-    simulation_dir = root_dir / "simulations" / f"{config.name}_{config.hash}"
+    simulation_dir = cache.link_simulation_dir(
+        config, root_dir / "simulations"
+    )
     swash_dir = simulation_dir / "swash"
     swash_dir.mkdir(parents=True, exist_ok=True)
 
-    # Create all necessary files in swash subdirectory
-    _create_bathymetry_file(config, simulation_dir=swash_dir)
-    if config.breakwater.enable:
-        _create_porosity_file(config, simulation_dir=swash_dir)
-        if config.vegetation.enable:
-            _create_vegetation_file(config, simulation_dir=swash_dir)
-    _create_input_file(
-        config, simulation_dir=swash_dir, template_dir=template_dir
+    rendered_input = _render_input(config, template_dir=template_dir)
+    run_key = cache.compute_run_key(
+        config, rendered_input, template_dir / "INPUT"
     )
 
-    # Execute SWASH
-    success = _execute_swash(config, simulation_dir=swash_dir)
+    if (
+        not force
+        and cache.is_run_complete(config, swash_dir, run_key)
+        and not _check_swash_errors(swash_dir)
+    ):
+        if cache.is_analysis_complete(simulation_dir, config):
+            done_print(
+                f"Simulation {config.name} is up to date, skipping",
+                echo=echo,
+            )
+            return True
+        done_print(
+            f"Simulation {config.name} already ran, skipping to analysis",
+            echo=echo,
+        )
+        success = True
+        stream = None
+    else:
+        with _run_dir(swash_dir, scratch) as run_dir:
+            success, stream = _run_swash(
+                config,
+                simulation_dir=simulation_dir,
+                run_dir=run_dir,
+                run_key=run_key,
+                rendered_input=rendered_input,
+                template_dir=template_dir,
+                echo=echo,
+                on_progress=on_progress,
+                scratch=scratch,
+                compression=compression,
+            )
+            if run_dir != swash_dir:
+                cache.publish_run(run_dir, swash_dir)
+
+        if success:
+            done_print("Simulation completed successfully", echo=echo)
 
     if success:
-        done_print("Simulation completed successfully")
-
         # Run analysis if simulation succeeded
-        load_print("Generating wave analysis...")
+        load_print("Generating wave analysis...", echo=echo)
         try:
             from .analysis import analyze_simulation
 
-            analyze_simulation(simulation_dir, config)
-            done_print("Analysis complete - results saved to analysis/")
+            analyze_simulation(
+                simulation_dir,
+                config,
+                stream=stream,
+                force=force,
+                exporter=exporter,
+            )
+            done_print(
+                "Analysis complete - results saved to analysis/", echo=echo
+            )
         except Exception as e:
-            error_print(f"Analysis failed: {e}")
+            error_print(f"Analysis failed for {config.name}: {e}")
+
+    return success
+
+
+def spinup_config(config: Config) -> Config | None:
+    """Configuration of the spin-up run a configuration hot-starts from.
+
+    The spin-up has the same waves, grid and gauges but neither breakwater nor
+    vegetation, and lasts `config.spinup_duration`, so configurations only
+    differing by their breakwater or vegetation share it.
+
+    Returns:
+        Config | None: Spin-up configuration, None if the configuration
+            doesn't hot-start
+    """
+    duration = config.spinup_duration
+    if duration <= 0:
+        return None
+    data = config.model_dump(exclude={"hash"})
+    data["name"] = f"{config.name}_spinup"
+    data["breakwater"] = {"enable": False}
+    data["vegetation"] = {"enable": False}
+    data["numeric"] = {
+        **data["numeric"],
+        "n_waves": round(duration / config.water.wave_period),
+        "hotstart": False,
+        "convergence_tolerance": None,
+    }
+    return Config(**data)
+
+
+def prepare_inputs(
+    config: Config,
+    swash_dir: Path,
+    *,
+    template_dir: Path,
+    write_hotstart: bool = False,
+) -> bool:
+    """Write the SWASH input files of a configuration without running it.
+
+    The INPUT, bathymetry, porosity and vegetation files are written in
+    `swash_dir`, as `run_simulation` would before executing SWASH. A
+    directory already holding a complete run for these inputs is left
+    untouched. With `write_hotstart`, the run writes its final state for
+    hot-started runs (see `spinup_config`), which read it from their own
+    directory.
+
+    Returns:
+        bool: True if the inputs were written, False if the directory holds
+            a complete run already
+    """
+    swash_dir.mkdir(parents=True, exist_ok=True)
+    rendered_input = _render_input(
+        config, template_dir=template_dir, write_hotstart=write_hotstart
+    )
+    run_key = cache.compute_run_key(
+        config, rendered_input, template_dir / "INPUT"
+    )
+    if cache.is_run_complete(config, swash_dir, run_key):
+        return False
+    cache.clear_manifest(swash_dir)
+    _write_inputs(
+        config,
+        simulation_dir=swash_dir,
+        template_dir=template_dir,
+        rendered=rendered_input,
+    )
+    return True
+
+
+def render_inputs(
+    configs: list[Config],
+    *,
+    template_dir: Path | None = None,
+    write_hotstart: bool = False,
+) -> list[str]:
+    """Render the SWASH INPUT of many configurations at once.
+
+    The template is loaded and compiled once for all of them, which is what
+    `run_simulation` and `prepare_inputs` do for a single configuration.
+    With `write_hotstart`, the runs write their final state (see
+    `spinup_config`).
+
+    Returns:
+        list[str]: Content of the INPUT file of each configuration
+    """
+    template = _environment(
+        template_dir or root_dir / "templates"
+    ).get_template("INPUT")
+    return [
+        template.render(
+            **_template_vars(config, write_hotstart=write_hotstart)
+        )
+        for config in configs
+    ]
 
 
 ############
@@ -62,68 +278,137 @@ def run_simulation(config: Config) -> None:
 ############
 
 
+def _write_inputs(
+    config: Config,
+    *,
+    simulation_dir: Path,
+    template_dir: Path,
+    rendered: str | None = None,
+) -> list[str]:
+    """Create the input files of a simulation in its SWASH directory.
+
+    Only the files whose sources changed are written, so that the others
+    keep their modification time: the grid files are recorded in the input
+    manifest with the hashes of the configuration sections they derive from
+    (see `_grid_inputs`), and the INPUT file is compared with its new
+    content.
+
+    Returns:
+        list[str]: Names of the written files
+    """
+    manifest = cache.read_input_manifest(simulation_dir)
+    written = {}
+    for name, sources, create in _grid_inputs(config):
+        if not cache.is_input_current(simulation_dir, manifest, name, sources):
+            create(config, simulation_dir=simulation_dir)
+            written[name] = sources
+    if written:
+        cache.record_inputs(simulation_dir, manifest, written)
+
+    if rendered is None:
+        rendered = _render_input(config, template_dir=template_dir)
+    input_path = simulation_dir / "INPUT"
+    if not input_path.exists() or input_path.read_text() != rendered:
+        _create_input_file(
+            config,
+            simulation_dir=simulation_dir,
+            template_dir=template_dir,
+            rendered=rendered,
+        )
+        return [*written, "INPUT"]
+    return list(written)
+
+
+def _grid_inputs(
+    config: Config,
+) -> list[tuple[str, dict[str, str], Callable[..., None]]]:
+    """Grid files read by SWASH, with the section hashes they derive from.
+
+    The hashes are the ones computed when the configuration was validated.
+    """
+    suffix = ARRAY_SUFFIXES[config.numeric.input_format]
+    geometry = {
+        "grid": config.grid.hash,
+        "breakwater": config.breakwater.hash,
+        "bathymetry": config.bathymetry.hash,
+    }
+    inputs: list[tuple[str, dict[str, str], Callable[..., None]]] = [
+        (f"bathymetry{suffix}", geometry, _create_bathymetry_file)
+    ]
+    if config.breakwater.enable or config.bathymetry.structures:
+        inputs.append((f"porosity{suffix}", geometry, _create_porosity_file))
+    if config.breakwater.enable and config.vegetation.enable:
+        inputs.append(
+            (
+                f"vegetation_density{suffix}",
+                {**geometry, "vegetation": config.vegetation.hash},
+                _create_vegetation_file,
+            )
+        )
+    return inputs
+
+
+def _environment(template_dir: Path) -> Environment:
+    """Jinja environment of a template directory, shared by every render.
+
+    Templates are compiled once and only again once their file changed, and
+    their compiled code is cached on disk for the next processes (see
+    `TEMPLATE_CACHE_DIR` and `TEMPLATE_CACHE_ENV`).
+    """
+    cache_dir = os.environ.get(TEMPLATE_CACHE_ENV)
+    return _template_environment(
+        template_dir,
+        TEMPLATE_CACHE_DIR if cache_dir is None else cache_dir or None,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _template_environment(
+    template_dir: Path, cache_dir: str | Path | None
+) -> Environment:
+    bytecode_cache = None
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+    environment = Environment(
+        loader=FileSystemLoader(template_dir),
+        auto_reload=True,
+        bytecode_cache=bytecode_cache,
+    )
+    environment.globals["enumerate"] = enumerate
+    return environment
+
+
 def _create_bathymetry_file(config: Config, *, simulation_dir: Path) -> None:
-    """Create bathymetry file with breakwater profile integrated.
+    """Create bathymetry file with the structures integrated.
 
-    The bathymetry file contains bottom elevation values at each grid point.
-    If breakwater is enabled, the breakwater profile is integrated into the bathymetry
-    with sloped sides and flat crest. Otherwise, flat bottom at elevation 0.0.
+    The bathymetry file contains bottom elevation values at each grid point:
+    the bed (flat at 0.0 unless `config.bathymetry` describes it) with the
+    breakwater and other structures on it (see `geometry.build_profile`).
     """
-    x = np.linspace(0, config.grid.length, config.grid.nx_cells + 1)
-    bottom = np.zeros_like(x)
-
-    if config.breakwater.enable:
-        # Calculate breakwater geometry
-        start_pos = config.breakwater.breakwater_start_position
-        crest_height = config.breakwater.crest_height
-        crest_length = config.breakwater.crest_length
-        slope = config.breakwater.slope  # H:V ratio
-
-        # Calculate key positions
-        seaward_toe = start_pos
-        seaward_shoulder = start_pos + crest_height * slope
-        leeward_shoulder = seaward_shoulder + crest_length
-        leeward_toe = leeward_shoulder + crest_height * slope
-
-        # Create breakwater profile
-        for i, x_pos in enumerate(x):
-            if seaward_toe <= x_pos <= seaward_shoulder:
-                # Seaward slope: linear rise from 0 to crest_height
-                progress = (x_pos - seaward_toe) / (
-                    seaward_shoulder - seaward_toe
-                )
-                bottom[i] = progress * crest_height
-            elif seaward_shoulder < x_pos < leeward_shoulder:
-                # Flat crest at crest_height
-                bottom[i] = crest_height
-            elif leeward_shoulder <= x_pos <= leeward_toe:
-                # Leeward slope: linear drop from crest_height to 0
-                progress = (x_pos - leeward_shoulder) / (
-                    leeward_toe - leeward_shoulder
-                )
-                bottom[i] = crest_height * (1 - progress)
+    bottom = get_geometry(config).bottom
 
-    output_path = simulation_dir / "bathymetry.txt"
-    np.savetxt(output_path, bottom, fmt="%.3f")
+    write_array(
+        simulation_dir / "bathymetry",
+        bottom,
+        format=config.numeric.input_format,
+    )
 
 
 def _create_porosity_file(config: Config, *, simulation_dir: Path) -> None:
-    """Create porosity file for the breakwater.
+    """Create porosity file for the breakwater and other structures.
 
     The porosity file contains porosity values at each grid point.
-    Porosity is set to the breakwater porosity within the breakwater extent,
-    and 0.0 elsewhere.
+    Porosity is set to the porosity of the structure within its extent, and
+    1.0 elsewhere.
     """
-    x = np.linspace(0, config.grid.length, config.grid.nx_cells + 1)
-    porosity = np.ones_like(x)
+    porosity = get_geometry(config).porosity
 
-    breakwater_mask = (x >= config.breakwater.breakwater_start_position) & (
-        x <= config.breakwater_end_position
+    write_array(
+        simulation_dir / "porosity",
+        porosity,
+        format=config.numeric.input_format,
     )
-    porosity[breakwater_mask] = config.breakwater.porosity
-
-    output_path = simulation_dir / "porosity.txt"
-    np.savetxt(output_path, porosity, fmt="%.3f")
 
 
 def _create_vegetation_file(config: Config, *, simulation_dir: Path) -> None:
@@ -132,138 +417,434 @@ def _create_vegetation_file(config: Config, *, simulation_dir: Path) -> None:
     The vegetation density file contains the number of plant stems per square meter
     at each grid point. Vegetation is only placed on the breakwater crest.
     """
-    x = np.linspace(0, config.grid.length, config.grid.nx_cells + 1)
-    vegetation_density = np.zeros_like(x)
-
-    # Calculate crest boundaries (top of breakwater)
-    crest_start = (
-        config.breakwater.breakwater_start_position
-        + config.breakwater.crest_height * config.breakwater.slope
+    vegetation_density = get_geometry(config).vegetation_density(
+        config.vegetation
     )
-    crest_end = crest_start + config.breakwater.crest_length
-
-    # Create mask for crest area
-    crest_mask = (x >= crest_start) & (x <= crest_end)
-
-    if config.vegetation.other_type is not None:
-        # Two vegetation types with spatial distribution
-        if config.vegetation.distribution == "half":
-            # Seaward half gets type 1, leeward half gets type 2
-            crest_mid = (crest_start + crest_end) / 2
-            type1_mask = crest_mask & (x <= crest_mid)
-            type2_mask = crest_mask & (x > crest_mid)
-            vegetation_density[type1_mask] = (
-                config.vegetation.type.plant_density
-            )
-            vegetation_density[type2_mask] = (
-                config.vegetation.other_type.plant_density
-            )
-
-        elif config.vegetation.distribution == "alternating":
-            # Alternating pattern based on type_fraction
-            crest_indices = np.where(crest_mask)[0]
-            if len(crest_indices) > 0:
-                pattern_length = max(
-                    1,
-                    int(len(crest_indices) * config.vegetation.type_fraction),
-                )
-                for i, idx in enumerate(crest_indices):
-                    if (i // pattern_length) % 2 == 0:
-                        vegetation_density[idx] = (
-                            config.vegetation.type.plant_density
-                        )
-                    else:
-                        vegetation_density[idx] = (
-                            config.vegetation.other_type.plant_density
-                        )
 
-    else:
-        # Single vegetation type
-        vegetation_density[crest_mask] = config.vegetation.type.plant_density
-
-    output_path = simulation_dir / "vegetation_density.txt"
-    np.savetxt(output_path, vegetation_density, fmt="%.3f")
+    write_array(
+        simulation_dir / "vegetation_density",
+        vegetation_density,
+        format=config.numeric.input_format,
+    )
 
 
 def _create_input_file(
-    config: Config, *, simulation_dir: Path, template_dir: Path
+    config: Config,
+    *,
+    simulation_dir: Path,
+    template_dir: Path,
+    rendered: str | None = None,
+    write_hotstart: bool = False,
+    stability: int = 0,
 ) -> None:
     """Create SWASH INPUT file from template.
 
-    Uses Jinja2 to render the INPUT template with values from the configuration.
+    Uses Jinja2 to render the INPUT template with values from the configuration,
+    unless the already `rendered` content is given. With `write_hotstart`, the
+    run writes its final state for other runs to hot-start from; runs of
+    configurations with `numeric.hotstart` start from such a state.
+    `stability` selects the time integration (see `STABILITY_LEVELS`).
     """
-    # Load template
-    template_path = template_dir / "INPUT"
-    with open(template_path, "r") as f:
-        template_content = f.read()
+    if rendered is None:
+        rendered = _render_input(
+            config,
+            template_dir=template_dir,
+            write_hotstart=write_hotstart,
+            stability=stability,
+        )
+
+    # Write to file
+    output_path = simulation_dir / "INPUT"
+    with open(output_path, "w") as f:
+        f.write(rendered)
+
+
+def _render_input(
+    config: Config,
+    *,
+    template_dir: Path,
+    write_hotstart: bool = False,
+    stability: int = 0,
+) -> str:
+    """Render the SWASH INPUT template with values from the configuration.
+
+    Hot-started runs start computing (and writing gauge outputs) at the end of
+    their spin-up, from the state it wrote. Retries of unstable runs use the
+    tighter time integration of their `stability` level.
+    """
+    template = _environment(template_dir).get_template("INPUT")
+    return template.render(
+        **_template_vars(
+            config, write_hotstart=write_hotstart, stability=stability
+        )
+    )
 
-    template = Template(template_content)
 
-    # Prepare template variables
-    # Generate a short project number from the hash (first 3 chars)
-    project_nr = config.hash[:3] if config.hash else "001"
+def _template_vars(
+    config: Config, *, write_hotstart: bool = False, stability: int = 0
+) -> dict[str, Any]:
+    """Values of the configuration used by the INPUT template."""
+    # Generate a short project number from the physics hash (first 3 chars),
+    # so that the INPUT only depends on the physics and not on the name
+    physics_hash = config.physics_hash
+    project_nr = physics_hash[:3]
 
-    template_vars = {
+    compute_start = config.spinup_duration
+    output_start = _output_start(config)
+    cfl_low, cfl_high, time_step_factor = STABILITY_LEVELS[stability]
+
+    return {
         "name": config.name,
+        "physics_hash": physics_hash,
         "project_nr": project_nr,
         "grid": config.grid,
         "water": config.water,
         "breakwater": config.breakwater,
         "vegetation": config.vegetation,
+        "bathymetry": config.bathymetry,
         "numeric": config.numeric,
         "simulation_duration": config.simulation_duration,
-        "enumerate": enumerate,  # Make enumerate available in template
+        "compute_start": _format_time(compute_start),
+        "compute_end": _format_time(config.simulation_duration),
+        "time_step": f"{config.numeric.time_step * time_step_factor:g}",
+        "cfl_low": cfl_low,
+        "cfl_high": cfl_high,
+        "output_start": _format_time(output_start),
+        "hotstart_read": HOTSTART_FILE if compute_start else None,
+        "hotstart_write": HOTSTART_FILE if write_hotstart else None,
+        "input_format": config.numeric.input_format.upper(),
+        "input_suffix": ARRAY_SUFFIXES[config.numeric.input_format],
     }
 
-    # Render template
-    rendered = template.render(**template_vars)
 
-    # Write to file
-    output_path = simulation_dir / "INPUT"
-    with open(output_path, "w") as f:
-        f.write(rendered)
+def _output_start(config: Config) -> float:
+    """Simulated time of the first sample of the gauge outputs (s)."""
+    if config.spinup_duration:
+        return config.spinup_duration + config.numeric.output_interval
+    return 0.0
+
+
+def _format_time(seconds: float) -> str:
+    """Format a time in seconds in the SWASH notation (hhmmss.sss)."""
+    milliseconds = round(seconds * 1000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}{minutes:02d}{milliseconds / 1000:06.3f}"
+
+
+def _run_swash(
+    config: Config,
+    *,
+    simulation_dir: Path,
+    run_dir: Path,
+    run_key: str,
+    rendered_input: str,
+    template_dir: Path,
+    echo: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+) -> tuple[bool, "StreamingAnalysis | None"]:
+    """Create the input files of a simulation in `run_dir` and run SWASH.
+
+    `run_dir` is the SWASH directory of the simulation, or a scratch
+    directory its outputs are published from afterwards.
+
+    Returns:
+        tuple[bool, StreamingAnalysis | None]: Whether SWASH succeeded, and
+            the analysis of the outputs done while it ran
+    """
+    # Never leave a stale manifest behind if this run is interrupted
+    cache.clear_manifest(run_dir)
+
+    # Run (or reuse) the spin-up shared with the other variants
+    spinup = spinup_config(config)
+    spinup_dir = None
+    if spinup is not None:
+        spinup_dir = _run_spinup(
+            spinup,
+            template_dir=template_dir,
+            echo=echo,
+            on_progress=on_progress,
+            scratch=scratch,
+            compression=compression,
+        )
+        if spinup_dir is None:
+            cache.record_run(config, run_dir, run_key=run_key, success=False)
+            return False, None
+        shutil.copy2(spinup_dir / HOTSTART_FILE, run_dir / HOTSTART_FILE)
+
+    # Create all necessary files in swash subdirectory
+    _write_inputs(
+        config,
+        simulation_dir=run_dir,
+        template_dir=template_dir,
+        rendered=rendered_input,
+    )
+
+    # Execute SWASH, analysing its outputs as they are written
+    success, stream = _execute_with_retries(
+        config,
+        simulation_dir=run_dir,
+        template_dir=template_dir,
+        echo=echo,
+        on_progress=on_progress,
+        start_stream=lambda: _start_streaming_analysis(
+            config, simulation_dir, prefix_dir=spinup_dir, swash_dir=run_dir
+        ),
+    )
+    if success and spinup_dir is not None:
+        _prepend_spinup_outputs(config, spinup_dir, run_dir)
+    _compress_outputs(config, run_dir, compression)
+    cache.record_run(config, run_dir, run_key=run_key, success=success)
+    return success, stream
+
+
+@contextmanager
+def _run_dir(swash_dir: Path, scratch: Path | None) -> Iterator[Path]:
+    """Directory to run SWASH in, removed afterwards if under `scratch`.
+
+    Without `scratch`, SWASH runs directly in its SWASH directory.
+    """
+    if scratch is None:
+        yield swash_dir
+        return
+    scratch.mkdir(parents=True, exist_ok=True)
+    run_dir = Path(tempfile.mkdtemp(prefix="swg-", dir=scratch))
+    try:
+        yield run_dir
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def _run_spinup(
+    spinup: Config,
+    *,
+    template_dir: Path,
+    echo: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+    scratch: Path | None = None,
+    compression: Compression = "none",
+) -> Path | None:
+    """Run the spin-up of hot-started configurations, unless already done.
+
+    Spin-ups are stored in the store, keyed by their physics hash. A lock
+    ensures configurations sharing a spin-up and running concurrently (in a
+    batch or in queue workers) only run it once. With `scratch`, the spin-up
+    runs under it and is then published like other runs.
 
+    Returns:
+        Path | None: SWASH directory of the spin-up, None if it failed
+    """
+    swash_dir = cache.spinup_dir(spinup, root_dir / "simulations") / "swash"
+    swash_dir.mkdir(parents=True, exist_ok=True)
+    rendered_input = _render_input(
+        spinup, template_dir=template_dir, write_hotstart=True
+    )
+    run_key = cache.compute_run_key(
+        spinup, rendered_input, template_dir / "INPUT"
+    )
+
+    # the lock is kept out of the SWASH directory, which publishing replaces
+    with _file_lock(swash_dir.parent / ".lock"):
+        if (
+            cache.is_run_complete(spinup, swash_dir, run_key)
+            and (swash_dir / HOTSTART_FILE).exists()
+            and not _check_swash_errors(swash_dir)
+        ):
+            done_print("Reusing spin-up", echo=echo)
+            return swash_dir
+
+        load_print(
+            f"Running spin-up ({spinup.simulation_duration:g} s)...",
+            end="\n",
+            echo=echo,
+        )
+        with _run_dir(swash_dir, scratch) as run_dir:
+            cache.clear_manifest(run_dir)
+            _write_inputs(
+                spinup,
+                simulation_dir=run_dir,
+                template_dir=template_dir,
+                rendered=rendered_input,
+            )
+            success, _ = _execute_with_retries(
+                spinup,
+                simulation_dir=run_dir,
+                template_dir=template_dir,
+                write_hotstart=True,
+                echo=echo,
+                on_progress=on_progress,
+            )
+            success = success and (run_dir / HOTSTART_FILE).exists()
+            _compress_outputs(spinup, run_dir, compression)
+            cache.record_run(spinup, run_dir, run_key=run_key, success=success)
+            if run_dir != swash_dir:
+                cache.publish_run(run_dir, swash_dir)
+
+    if not success:
+        error_print(f"Spin-up failed for {spinup.name}")
+        return None
+    return swash_dir
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive lock between threads and processes, held while in context."""
+    with open(path, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _prepend_spinup_outputs(
+    config: Config, spinup_dir: Path, swash_dir: Path
+) -> None:
+    """Prepend the gauge time series of the spin-up to the hot-started run's.
+
+    The hot-started run only writes its gauges from the end of the spin-up,
+    so that the result covers the whole simulation like a cold-started run.
+    """
+    for i in range(len(config.numeric.wave_gauge_positions)):
+        file = f"wg{i+1:02d}.txt"
+        path = swash_dir / file
+        tmp_path = path.with_suffix(".txt.tmp")
+        with open(tmp_path, "wb") as out:
+            for part in (spinup_dir / file, path):
+                with open_output(part) as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, path)
+
+
+def _execute_with_retries(
+    config: Config,
+    *,
+    simulation_dir: Path,
+    template_dir: Path,
+    write_hotstart: bool = False,
+    echo: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+    start_stream: Callable[[], "StreamingAnalysis | None"] | None = None,
+) -> tuple[bool, "StreamingAnalysis | None"]:
+    """Execute SWASH, retrying with a tighter time integration if unstable.
+
+    Each attempt whose run diverged (see `InstabilityWatchdog`) is retried at
+    the next level of `STABILITY_LEVELS`, until one is stable or none is left.
+    Every attempt is recorded under `attempts` in the run manifest. The INPUT
+    file of the first attempt must already be in `simulation_dir`.
+
+    Returns:
+        tuple[bool, StreamingAnalysis | None]: Whether SWASH succeeded, and
+            the analysis (started with `start_stream`) of the last attempt
+    """
+    attempts: list[dict] = []
+    success, stream = False, None
+    for level, (cfl_low, cfl_high, time_step_factor) in enumerate(
+        STABILITY_LEVELS
+    ):
+        time_step = config.numeric.time_step * time_step_factor
+        if level:
+            load_print(
+                f"Retrying {config.name} with a Courant number of"
+                f" {cfl_low}-{cfl_high} and an initial time step of"
+                f" {time_step:g} s...",
+                end="\n",
+                echo=echo,
+            )
+            _create_input_file(
+                config,
+                simulation_dir=simulation_dir,
+                template_dir=template_dir,
+                write_hotstart=write_hotstart,
+                stability=level,
+            )
 
-def _execute_swash(config: Config, *, simulation_dir: Path) -> bool:
+        # previous outputs removed so that they aren't followed for this run
+        _clear_outputs(config, simulation_dir)
+        stream = start_stream() if start_stream is not None else None
+        try:
+            success = _execute_swash(
+                config,
+                simulation_dir=simulation_dir,
+                time_step=time_step,
+                echo=echo,
+                on_progress=on_progress,
+            )
+        finally:
+            if stream is not None:
+                stream.stop()
+
+        manifest = cache.read_manifest(simulation_dir)
+        instability = manifest.pop("instability", None)
+        attempts.append(
+            {
+                "cfl": [cfl_low, cfl_high],
+                "time_step": time_step,
+                "status": (
+                    "unstable"
+                    if instability is not None
+                    else "completed" if success else "failed"
+                ),
+                "exit_code": manifest.get("exit_code"),
+                "wall_time": (manifest.get("resources") or {}).get(
+                    "wall_time"
+                ),
+                **({"instability": instability} if instability else {}),
+            }
+        )
+        cache.write_manifest(
+            simulation_dir, {**manifest, "attempts": attempts}
+        )
+        if instability is None:
+            break
+    return success, stream
+
+
+def _execute_swash(
+    config: Config,
+    *,
+    simulation_dir: Path,
+    time_step: float | None = None,
+    echo: bool = True,
+    on_progress: Callable[[float], None] | None = None,
+) -> bool:
     """Execute SWASH simulation with progress monitoring.
 
     Runs SWASH in the simulation directory and shows progress based on
-    simulation time advancement.
+    simulation time advancement, as reported by a `ProgressMonitor` following
+    the PRINT file. If `on_progress` is given, it is called with the simulated
+    time in seconds instead of showing a progress bar.
+
+    With `numeric.convergence_tolerance`, SWASH is stopped as soon as the wave
+    statistics of every gauge converged, and the gauge outputs are cut at that
+    point, which is recorded in the run manifest. SWASH is also stopped as
+    soon as it diverges, the instability being recorded in the manifest,
+    judged against the initial time step of the INPUT (`time_step`, by
+    default `numeric.time_step`).
 
     Returns:
         bool: True if simulation succeeded, False otherwise
     """
-    load_print("Executing SWASH simulation...")
+    load_print("Executing SWASH simulation...", echo=echo)
 
     # Remove existing error files to get clean error reporting
-    errfile_path = simulation_dir / "Errfile"
-    if errfile_path.exists():
-        errfile_path.unlink()
+    (simulation_dir / "Errfile").unlink(missing_ok=True)
 
     # Calculate total simulation duration for progress tracking
     total_duration = config.simulation_duration
 
+    process: subprocess.Popen | None = None
+    progress_bar: tqdm.tqdm | None = None
+    # stopped in any case, which closes the watchers of those that never
+    # started (e.g. when SWASH is missing or another monitor failed)
+    monitors: list[
+        ProgressMonitor | ConvergenceMonitor | InstabilityWatchdog
+    ] = []
     try:
-        # Start SWASH process with real-time output
-        process = subprocess.Popen(
-            ["swash"],
-            cwd=simulation_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,  # Line buffered
-            universal_newlines=True,
-        )
-
-        # Progress tracking variables
-        current_time: float = 0.0
-        progress_bar: Optional[tqdm.tqdm] = None
-
-        # Monitor SWASH output for progress
-        def monitor_progress():
-            nonlocal current_time, progress_bar
-
-            # Create progress bar
+        # Create progress bar, unless progress is reported to the caller
+        if on_progress is None and echo:
             progress_bar = tqdm.tqdm(
                 total=int(
                     total_duration * 100
@@ -277,78 +858,149 @@ def _execute_swash(config: Config, *, simulation_dir: Path) -> bool:
                 dynamic_ncols=True,
             )
 
-            # Pattern to match SWASH time output
-            time_pattern = re.compile(
-                r"Time of simulation\s*->\s*(\d+\.\d+)\s*in sec:\s*(\d+\.\d+)"
+        monitor = ProgressMonitor(
+            simulation_dir / "PRINT", total=total_duration
+        )
+        monitors.append(monitor)
+        if on_progress is not None:
+            monitor.subscribe(lambda event: on_progress(event.simulation_time))
+        if progress_bar is not None:
+            monitor.subscribe(
+                lambda event: _update_progress_bar(
+                    progress_bar, int(event.simulation_time * 100)
+                )
+            )
+
+        convergence = None
+        if config.numeric.convergence_tolerance is not None:
+            convergence = ConvergenceMonitor(
+                simulation_dir,
+                n_gauges=len(config.numeric.wave_gauge_positions),
+                timestep=config.numeric.output_interval,
+                start_time=_output_start(config),
+                tolerance=config.numeric.convergence_tolerance,
+                n_waves=config.numeric.convergence_waves,
             )
+            monitors.append(convergence)
+
+        watchdog = InstabilityWatchdog(
+            simulation_dir,
+            n_gauges=len(config.numeric.wave_gauge_positions),
+            water_depth=config.water.water_level,
+            wave_height=config.water.wave_height,
+            time_step=(
+                config.numeric.time_step if time_step is None else time_step
+            ),
+            output_interval=config.numeric.output_interval,
+            start_time=_output_start(config),
+        )
+        monitors.append(watchdog)
 
-            print_path = simulation_dir / "PRINT"
-            last_position = 0
-
-            while process.poll() is None:
-                if print_path.exists():
-                    try:
-                        with open(print_path, "r") as f:
-                            f.seek(last_position)
-                            new_content = f.read()
-                            last_position = f.tell()
-
-                            # Look for time progress in new content
-                            for match in time_pattern.finditer(new_content):
-                                sim_time = float(match.group(2))
-                                if sim_time > current_time:
-                                    current_time = sim_time
-                                    # Update progress bar (convert to centiseconds)
-                                    if progress_bar is not None:
-                                        progress_bar.n = int(
-                                            current_time * 100
-                                        )
-                                        progress_bar.refresh()
-                    except (IOError, ValueError):
-                        pass
-
-                time.sleep(0.1)  # Check every 100ms
-
-            # Complete the progress bar
-            if progress_bar:
-                progress_bar.n = progress_bar.total
-                progress_bar.refresh()
-                progress_bar.close()
-
-        # Start monitoring thread
-        monitor_thread = threading.Thread(target=monitor_progress, daemon=True)
-        monitor_thread.start()
-
-        # Wait for process to complete
-        stdout, stderr = process.communicate(timeout=3600)  # 1 hour timeout
-
-        # Wait for monitoring thread to finish
-        monitor_thread.join(timeout=2.0)
-
-        # Ensure progress bar is properly closed and cursor returns to new line
-        if progress_bar:
+        # Start SWASH process
+        process = subprocess.Popen(
+            ["swash"],
+            cwd=simulation_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        stopped = threading.Event()
+
+        def stop(_: object) -> None:
+            stopped.set()
+            process.terminate()
+
+        if convergence is not None:
+            convergence.on_converged(stop)
+        watchdog.on_unstable(stop)
+
+        # Wait for process to complete while following its progress and
+        # convergence, and measuring its resources
+        with (
+            monitor,
+            watchdog,
+            convergence or nullcontext(),
+            ResourceMonitor(
+                process.pid, directory=simulation_dir
+            ) as resources,
+        ):
+            stdout, stderr = process.communicate(timeout=3600)  # 1 hour
+        instability = watchdog.result
+        truncation = (
+            convergence.result
+            if convergence is not None and instability is None
+            else None
+        )
+        usage = resources.usage(
+            truncation.simulation_time
+            if truncation is not None
+            else monitor.simulation_time
+        )
+        manifest = {
+            "exit_code": process.returncode,
+            "resources": usage.to_dict(),
+        }
+        if truncation is not None:
+            truncate_outputs(
+                simulation_dir,
+                len(config.numeric.wave_gauge_positions),
+                truncation.n_samples,
+            )
+            manifest["truncation"] = truncation.to_dict()
+        if instability is not None:
+            manifest["instability"] = instability.to_dict()
+        cache.update_manifest(simulation_dir, manifest)
+
+        # Complete the progress bar and return the cursor to a new line
+        if progress_bar is not None:
+            _update_progress_bar(progress_bar, progress_bar.total)
             progress_bar.close()
-        print()  # Add newline after progress bar
+        if echo:
+            print()  # Add newline after progress bar
+
+        if instability is not None:
+            error_print(
+                f"SWASH simulation {config.name} went unstable after"
+                f" {instability.simulation_time:g} s: {instability.reason}"
+            )
+            return False
 
         # Check for errors in output files
         error_msgs = _check_swash_errors(simulation_dir)
 
         if error_msgs:
             error_print(
-                f"SWASH simulation failed with {len(error_msgs)} error(s)"
+                f"SWASH simulation {config.name} failed with"
+                f" {len(error_msgs)} error(s)"
             )
             for msg in error_msgs:
                 error_print(f"  {msg}", indent=2)
             return False
 
-        # Check if SWASH completed successfully
-        if process.returncode != 0:
-            error_print(f"SWASH exited with code {process.returncode}")
+        # Check if SWASH completed successfully (or was stopped once
+        # converged, and didn't fail on its own before)
+        stopped_once_converged = (
+            truncation is not None
+            and stopped.is_set()
+            and process.returncode == -signal.SIGTERM
+        )
+        if process.returncode != 0 and not stopped_once_converged:
+            error_print(
+                f"SWASH exited with code {process.returncode} for {config.name}"
+            )
             if stderr:
                 error_print(f"  {stderr.strip()}", indent=2)
             return False
 
-        done_print("SWASH simulation completed successfully")
+        if truncation is not None:
+            done_print(
+                f"SWASH simulation converged after"
+                f" {truncation.simulation_time:g} s",
+                echo=echo,
+            )
+        else:
+            done_print("SWASH simulation completed successfully", echo=echo)
+        done_print(usage.summary(), indent=2, echo=echo)
         return True
 
     except subprocess.TimeoutExpired:
@@ -364,6 +1016,66 @@ def _execute_swash(config: Config, *, simulation_dir: Path) -> bool:
     except Exception as e:
         error_print(f"Unexpected error running SWASH: {e}")
         return False
+    finally:
+        for monitor_ in monitors:
+            monitor_.stop()
+        if progress_bar is not None:
+            progress_bar.close()
+
+
+def _clear_outputs(config: Config, simulation_dir: Path) -> None:
+    """Remove the PRINT and gauge outputs of a previous run."""
+    for path in _bulky_outputs(config, simulation_dir):
+        remove_output(path)
+    for store in (GAUGE_STORE, GAUGE_MATRIX):
+        (simulation_dir / store).unlink(missing_ok=True)
+
+
+def _compress_outputs(
+    config: Config, simulation_dir: Path, compression: Compression
+) -> None:
+    """Compress the PRINT and gauge outputs of a finished run."""
+    if compression == "none":
+        return
+    for path in _bulky_outputs(config, simulation_dir):
+        if path.exists():
+            compress_file(path, compression)
+    cache.update_manifest(simulation_dir, {"compression": compression})
+
+
+def _bulky_outputs(config: Config, simulation_dir: Path) -> list[Path]:
+    """Text outputs of SWASH making up most of a run's size."""
+    return [simulation_dir / "PRINT"] + [
+        simulation_dir / f"wg{i+1:02d}.txt"
+        for i in range(len(config.numeric.wave_gauge_positions))
+    ]
+
+
+def _start_streaming_analysis(
+    config: Config,
+    simulation_dir: Path,
+    *,
+    prefix_dir: Path | None,
+    swash_dir: Path | None = None,
+) -> "StreamingAnalysis | None":
+    """Start analysing the outputs of the run while SWASH writes them.
+
+    Returns:
+        StreamingAnalysis | None: Running analysis, None if the analysis
+            module can't be loaded (the error is reported after the run)
+    """
+    try:
+        from .analysis import StreamingAnalysis
+    except Exception:
+        return None
+    return StreamingAnalysis(
+        config, simulation_dir, prefix_dir=prefix_dir, swash_dir=swash_dir
+    ).start()
+
+
+def _update_progress_bar(progress_bar: tqdm.tqdm, n: int) -> None:
+    progress_bar.n = n
+    progress_bar.refresh()
 
 
 def _check_swash_errors(simulation_dir: Path) -> list[str]:
@@ -383,9 +1095,9 @@ def _check_swash_errors(simulation_dir: Path) -> list[str]:
 
     # Check PRINT file for severe errors and errors
     print_path = simulation_dir / "PRINT"
-    if print_path.exists():
+    if output_exists(print_path):
         try:
-            with open(print_path, "r") as f:
+            with open_output(print_path, "r") as f:
                 lines = f.readlines()
 
             for i, line in enumerate(lines, 1):
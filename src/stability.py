@@ -0,0 +1,211 @@
+import math
+import sys
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .gauges import parse_gauge
+from .monitor import DirectoryWatcher, FileTail, PrintScanner
+
+#########
+# types #
+#########
+
+# velocities above this multiple of the shallow water celerity are taken as
+# a diverging solution
+VELOCITY_LIMIT = 5.0
+
+# water levels further than this multiple of the water depth from the still
+# water level are taken as a diverging solution
+ELEVATION_LIMIT = 2.0
+
+# the time step collapsed once SWASH halved it this many times (on average
+# over `_TIME_STEP_WINDOW` steps)
+TIME_STEP_HALVINGS = 10
+
+_TIME_STEP_WINDOW = 100
+
+
+@dataclass(frozen=True)
+class Instability:
+    """Divergence of a SWASH run, detected while it runs."""
+
+    reason: str
+    simulation_time: float  # simulated time at detection (s)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "reason": self.reason,
+            "simulation_time": round(self.simulation_time, 3),
+        }
+
+
+class InstabilityWatchdog:
+    """Stop a running SWASH simulation as soon as it diverges.
+
+    The PRINT file and gauge outputs are followed while SWASH writes them,
+    and the run is deemed unstable if a gauge records a non-finite value, a
+    velocity beyond `VELOCITY_LIMIT` times the shallow water celerity or a
+    water level beyond `ELEVATION_LIMIT` times the water depth, or if the
+    adaptive time step collapsed (`TIME_STEP_HALVINGS` halvings of the initial
+    time step). The callbacks registered with `on_unstable` are then called
+    (from the monitoring thread), e.g. to terminate the process, instead of
+    finding out once the whole run is done.
+
+    Usage:
+        with InstabilityWatchdog(swash_dir, ...) as watchdog:
+            watchdog.on_unstable(lambda instability: process.terminate())
+            process.wait()
+        if watchdog.result is not None:
+            ...
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        n_gauges: int,
+        water_depth: float,
+        wave_height: float,
+        time_step: float,
+        output_interval: float,
+        start_time: float,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.max_velocity = VELOCITY_LIMIT * math.sqrt(
+            9.81 * (water_depth + wave_height)
+        )
+        self.max_elevation = ELEVATION_LIMIT * water_depth
+        self.min_time_step = time_step / 2**TIME_STEP_HALVINGS
+        self.output_interval = output_interval
+        self.start_time = start_time
+        self.result: Instability | None = None
+        self._gauge_names = [f"wg{i+1:02d}.txt" for i in range(n_gauges)]
+        self._names = ["PRINT"] + self._gauge_names
+        self._tails = {
+            name: FileTail(directory / name) for name in self._names
+        }
+        self._partial = {name: b"" for name in self._gauge_names}
+        self._n_samples = {name: 0 for name in self._gauge_names}
+        self._scanner = PrintScanner()
+        self._reference = (0.0, 0)  # simulated time and time reports
+        self._watcher = DirectoryWatcher(
+            directory,
+            set(self._names),
+            poll_interval=poll_interval,
+            use_inotify=use_inotify,
+        )
+        self._callbacks: list[Callable[[Instability], None]] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def on_unstable(self, callback: Callable[[Instability], None]) -> None:
+        """Call `callback` with the instability once detected."""
+        self._callbacks.append(callback)
+
+    def start(self) -> "InstabilityWatchdog":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # the thread closes the watcher once it detected an instability
+        if self._thread is not None and self._thread.is_alive():
+            self._watcher.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        else:
+            self._close()
+
+    def __enter__(self) -> "InstabilityWatchdog":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def check_print(self, chunk: bytes) -> str | None:
+        """Check bytes appended to PRINT, returning why the run diverged."""
+        if self._scanner.feed(chunk) is None:
+            return None
+        time_, n_reports = self._reference
+        if self._scanner.n_reports - n_reports < _TIME_STEP_WINDOW:
+            return None
+        time_step = (self._scanner.simulation_time - time_) / (
+            self._scanner.n_reports - n_reports
+        )
+        self._reference = (
+            self._scanner.simulation_time,
+            self._scanner.n_reports,
+        )
+        if time_step < self.min_time_step:
+            return f"time step collapsed to {time_step:.2e} s"
+        return None
+
+    def check_gauge(self, name: str, chunk: bytes) -> str | None:
+        """Check bytes appended to a gauge output, returning why it diverged."""
+        data = self._partial[name] + chunk
+        end = data.rfind(b"\n") + 1
+        self._partial[name] = data[end:]
+        content = data[:end]
+        if not content.strip():
+            return None
+        try:
+            rows = parse_gauge(content)
+        except ValueError:
+            # fortran writes asterisks for numbers overflowing their format
+            return f"unreadable value in {name}"
+        # only the columns written, the others being NaN
+        rows = rows[:, : len(content.split(b"\n", 1)[0].split())]
+        self._n_samples[name] += len(rows)
+        if not np.isfinite(rows).all():
+            return f"non-finite value in {name}"
+        elevation = np.abs(rows[:, 0]).max()
+        if elevation > self.max_elevation:
+            return f"water level of {elevation:.3g} m in {name}"
+        if rows.shape[1] > 1:
+            velocity = np.abs(rows[:, 1]).max()
+            if velocity > self.max_velocity:
+                return f"velocity of {velocity:.3g} m/s in {name}"
+        return None
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set() and self.result is None:
+                for name in self._watcher.wait(timeout=1.0):
+                    chunk = self._tails[name].read()
+                    reason = (
+                        self.check_print(chunk)
+                        if name == "PRINT"
+                        else self.check_gauge(name, chunk)
+                    )
+                    if reason is not None:
+                        self._notify(reason, name)
+                        break
+        finally:
+            self._close()
+
+    def _notify(self, reason: str, name: str) -> None:
+        simulation_time = (
+            self._scanner.simulation_time
+            if name == "PRINT"
+            else self.start_time
+            + max(self._n_samples[name] - 1, 0) * self.output_interval
+        )
+        self.result = Instability(reason, simulation_time)
+        for callback in self._callbacks:
+            try:
+                callback(self.result)
+            except Exception as e:
+                print(f"Instability callback failed: {e}", file=sys.stderr)
+
+    def _close(self) -> None:
+        for tail in self._tails.values():
+            tail.close()
+        self._watcher.close()
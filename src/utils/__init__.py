@@ -1,8 +1,9 @@
 __all__ = [
+    "arrays",
     "paths",
     "plotting",
     "print",
     "validators",
 ]
 
-from . import paths, plotting, print, validators
+from . import arrays, paths, plotting, print, validators
@@ -0,0 +1,171 @@
+from pathlib import Path
+from typing import Literal
+
+import numpy as np
+
+#########
+# types #
+#########
+
+ArrayFormat = Literal["free", "unformatted"]
+ARRAY_FORMATS: tuple[str, ...] = ("free", "unformatted")
+
+# suffix of the files written in each format
+ARRAY_SUFFIXES = {"free": ".txt", "unformatted": ".bin"}
+
+_ZERO = ord("0")
+
+############
+# external #
+############
+
+
+def format_array(values: np.ndarray, decimals: int = 3) -> bytes:
+    """
+    Format numbers one per line with a fixed number of decimals.
+
+    The output is the one of `np.savetxt(..., fmt=f"%.{decimals}f")`
+    (except that negative numbers rounding to zero lose their sign and that
+    numbers halfway between two decimals may round the other way), but the
+    digits of every number are computed in a single vectorised pass instead
+    of formatting each number in Python.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Numbers to format (flattened)
+    decimals : int, default 3
+        Number of decimals
+
+    Returns
+    -------
+    bytes
+        ASCII text, one number per line
+
+    Raises
+    ------
+    ValueError
+        If a number isn't finite
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    if not np.isfinite(values).all():
+        raise ValueError("Only finite numbers can be formatted")
+    if not len(values):
+        return b""
+
+    scale = 10**decimals
+    scaled = np.rint(values * scale)
+    negative = scaled < 0
+    scaled = np.abs(scaled).astype(np.int64)
+    n_integer = len(str(int(scaled.max()) // scale))
+    n_digits = n_integer + decimals
+    powers = 10 ** np.arange(n_digits - 1, -1, -1, dtype=np.int64)
+    digits = (scaled[:, None] // powers % 10 + _ZERO).astype(np.uint8)
+
+    # sign, integer digits, decimal point and decimals, newline
+    point = 1 if decimals else 0
+    chars = np.empty((len(values), 1 + n_digits + point + 1), dtype=np.uint8)
+    chars[:, 0] = ord("-")
+    chars[:, 1 : 1 + n_integer] = digits[:, :n_integer]
+    if decimals:
+        chars[:, 1 + n_integer] = ord(".")
+        chars[:, 2 + n_integer : -1] = digits[:, n_integer:]
+    chars[:, -1] = ord("\n")
+
+    # drop the sign of positive numbers and the leading zeros
+    keep = np.ones(chars.shape, dtype=bool)
+    keep[:, 0] = negative
+    keep[:, 1:n_integer] = scaled[:, None] >= scale * 10 ** np.arange(
+        n_integer - 1, 0, -1, dtype=np.int64
+    )
+    return chars[keep].tobytes()
+
+
+def write_array(
+    path: Path,
+    values: np.ndarray,
+    *,
+    format: ArrayFormat = "free",
+    decimals: int = 3,
+) -> Path:
+    """
+    Write a SWASH input grid in a single write.
+
+    In "free" format, the numbers are written one per line as text (see
+    `format_array`) and read by SWASH with `READINP ... FREE`. In
+    "unformatted" format, they are written as a single Fortran unformatted
+    record of 4-byte floats (`READINP ... UNFORMATTED`), which is smaller
+    and faster to write and read for large grids. The values are rounded to
+    `decimals` in both formats, so that SWASH (which reads them in single
+    precision) gets the same grid either way. The file of the other format,
+    if any, is removed.
+
+    Parameters
+    ----------
+    path : Path
+        File to write, without its suffix (see `ARRAY_SUFFIXES`)
+    values : np.ndarray
+        Values of the grid points
+    format : ArrayFormat, default "free"
+        Format of the file
+    decimals : int, default 3
+        Number of decimals kept
+
+    Returns
+    -------
+    Path
+        Written file
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown
+    """
+    if format not in ARRAY_FORMATS:
+        raise ValueError(
+            f"Unknown format {format}, expected one of"
+            f" {', '.join(ARRAY_FORMATS)}"
+        )
+    if format == "free":
+        content = format_array(values, decimals)
+    else:
+        content = _unformatted_record(np.round(values, decimals))
+    target = path.with_name(f"{path.name}{ARRAY_SUFFIXES[format]}")
+    target.write_bytes(content)
+    for format_, suffix in ARRAY_SUFFIXES.items():
+        if format_ != format:
+            path.with_name(f"{path.name}{suffix}").unlink(missing_ok=True)
+    return target
+
+
+def read_unformatted(path: Path) -> np.ndarray:
+    """
+    Read the values of a grid written in "unformatted" format.
+
+    Parameters
+    ----------
+    path : Path
+        File written by `write_array`
+
+    Returns
+    -------
+    np.ndarray
+        Values of the grid points
+    """
+    content = path.read_bytes()
+    length = int(np.frombuffer(content[:4], dtype=np.int32)[0])
+    return np.frombuffer(content[4 : 4 + length], dtype=np.float32).astype(
+        float
+    )
+
+
+############
+# internal #
+############
+
+
+def _unformatted_record(values: np.ndarray) -> bytes:
+    """Sequential Fortran record: length, 4-byte floats, length."""
+    data = np.asarray(values, dtype=np.float32).ravel().tobytes()
+    marker = np.array([len(data)], dtype=np.int32).tobytes()
+    return marker + data + marker
@@ -166,6 +166,29 @@ def format_number(n: float) -> str:
     return "{:,}".format(n).replace(",", " ")
 
 
+def format_bytes(n: float) -> str:
+    """
+    Format a number of bytes with a binary unit.
+
+    Parameters
+    ----------
+    n : float
+        Number of bytes
+
+    Returns
+    -------
+    str
+        Formatted size (e.g. "12.3 MiB")
+    """
+    if abs(n) < 1024:
+        return f"{n:.0f} B"
+    for unit in ("KiB", "MiB"):
+        n /= 1024
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+    return f"{n / 1024:.1f} GiB"
+
+
 def cursor_up(n: int) -> None:
     """
     Move the cursor up n lines in the terminal.
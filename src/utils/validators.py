@@ -9,7 +9,9 @@ import pydantic
 ############
 
 
-def hash_config(ignore: list[str] = []) -> Callable[..., Any]:
+def hash_config(
+    ignore: list[str] = [], ignore_default: list[str] = []
+) -> Callable[..., Any]:
     """
     Create a model validator that hashes the configuration.
 
@@ -20,6 +22,10 @@ def hash_config(ignore: list[str] = []) -> Callable[..., Any]:
     ----------
     ignore : list[str], default []
         List of field names to ignore when computing the hash
+    ignore_default : list[str], default []
+        List of field names (dotted for the fields of sub-configurations, e.g.
+        "numeric.hotstart") to ignore while they are at their default, so that
+        adding a field keeps the hash of the existing configurations
 
     Returns
     -------
@@ -28,19 +34,43 @@ def hash_config(ignore: list[str] = []) -> Callable[..., Any]:
     """
 
     def fct_(model: pydantic.BaseModel) -> pydantic.BaseModel:
-        model.hash = _hash_config(  # type: ignore
-            {
-                key: val
-                for key, val in model.model_dump().items()
-                if key not in ignore
-            },
-            model.hash,  # type: ignore
-        )
+        config = {
+            key: val
+            for key, val in model.model_dump().items()
+            if key not in ignore
+        }
+        for field in ignore_default:
+            _drop_default(model, config, field.split("."))
+        model.hash = _hash_config(config, model.hash)  # type: ignore
         return model
 
     return pydantic.model_validator(mode="after")(fct_)  # type: ignore
 
 
+def hash_dict(config: dict[str, Any], length: int = 8) -> str:
+    """
+    Compute a hash of a configuration dictionary.
+
+    Keys are sorted, `hash` fields are ignored at every level and numbers are
+    compared by value (`1000` and `1000.0` hash the same), so the hash only
+    depends on the values of the configuration.
+
+    Parameters
+    ----------
+    config : dict[str, Any]
+        Configuration dictionary to hash
+    length : int, default 8
+        Number of hexadecimal characters to keep
+
+    Returns
+    -------
+    str
+        Hash string for the configuration
+    """
+    config = _normalize_numbers(_prepare_config_for_hashing(config))
+    return hashlib.sha256(str(config).encode()).hexdigest()[:length]
+
+
 def parse_config(field: str, fct: Callable) -> Callable:  # type: ignore
     """
     Create a field validator that parses configuration.
@@ -153,6 +183,38 @@ def _hash_config(config: dict[str, Any], prev_hash: str = "") -> str:
         return hash_
 
 
+def _drop_default(
+    model: pydantic.BaseModel, config: dict[str, Any], field: list[str]
+) -> None:
+    """
+    Remove a field from the dumped configuration if it is at its default.
+
+    Parameters
+    ----------
+    model : pydantic.BaseModel
+        Model the configuration was dumped from
+    config : dict[str, Any]
+        Dumped configuration, modified in place
+    field : list[str]
+        Path of the field, through the sub-configurations
+    """
+    *parents, name = field
+    for parent in parents:
+        model = getattr(model, parent)
+        config = config.get(parent) or {}
+    if name not in config:
+        return
+    default = (
+        type(model).model_fields[name].get_default(call_default_factory=True)
+    )
+    if isinstance(default, pydantic.BaseModel):
+        default = default.model_dump()
+    if _prepare_config_for_hashing(
+        config[name]
+    ) == _prepare_config_for_hashing(default):
+        del config[name]
+
+
 def _prepare_config_for_hashing(config: Any) -> Any:
     """
     Prepare a configuration object for hashing by sorting and filtering.
@@ -177,3 +239,27 @@ def _prepare_config_for_hashing(config: Any) -> Any:
         return [_prepare_config_for_hashing(x) for x in config]
     else:
         return config
+
+
+def _normalize_numbers(config: Any) -> Any:
+    """
+    Convert every number of a configuration to float.
+
+    Parameters
+    ----------
+    config : Any
+        Configuration object to normalize
+
+    Returns
+    -------
+    Any
+        Configuration object with float numbers
+    """
+    if isinstance(config, dict):
+        return {key: _normalize_numbers(val) for key, val in config.items()}
+    elif isinstance(config, list):
+        return [_normalize_numbers(x) for x in config]
+    elif isinstance(config, int) and not isinstance(config, bool):
+        return float(config)
+    else:
+        return config
@@ -1,3 +1,5 @@
+import heapq
+
 import numpy as np
 import polars as pl
 
@@ -35,37 +37,144 @@ def calculate_wave_heights(
     else:
         raise ValueError(f"Unknown method: {method}")
 
-    if len(wave_heights) == 0:
-        return {
-            "significant_wave_height": 0.0,
-            "mean_wave_height": 0.0,
-            "max_wave_height": 0.0,
-            "rms_wave_height": 0.0,
-            "n_waves": 0,
-            "mean_period": 0.0,
-        }
+    return _wave_statistics(wave_heights, wave_periods)
 
-    # Sort wave heights in descending order
-    sorted_heights = np.sort(wave_heights)[::-1]
 
-    # Calculate H1/3 (significant wave height)
-    n_third = max(1, len(sorted_heights) // 3)
-    h_sig = np.mean(sorted_heights[:n_third])
+class ZeroCrossingEstimator:
+    """
+    Incremental zero-crossing analysis of a growing water level time series.
 
-    # Calculate other statistics
-    h_mean = np.mean(wave_heights)
-    h_max = np.max(wave_heights)
-    h_rms = np.sqrt(np.mean(wave_heights**2))
-    t_mean = np.mean(wave_periods) if len(wave_periods) > 0 else 0.0
+    Samples are fed as they are produced (e.g. while SWASH writes a gauge
+    output) and waves are detected as in `calculate_wave_heights`, without
+    analysing the whole series again. As the mean of the whole series isn't
+    known yet, crossings are detected around the running mean of the samples.
+
+    Parameters
+    ----------
+    timestep : float
+        Time step between measurements in seconds
+    """
+
+    def __init__(self, timestep: float) -> None:
+        self.timestep = timestep
+        self.n_samples = 0
+        self.wave_heights: list[float] = []
+        self.wave_periods: list[float] = []
+        self._sum = 0.0
+        self._previous: float | None = None
+        self._start: int | None = None  # index of the last up-crossing
+        self._down_crossed = False
+        self._max = -np.inf
+        self._min = np.inf
+
+    @property
+    def n_waves(self) -> int:
+        return len(self.wave_heights)
+
+    def update(self, water_levels: np.ndarray) -> int:
+        """
+        Analyse new samples of the time series.
+
+        Parameters
+        ----------
+        water_levels : np.ndarray
+            Water levels following the ones already analysed
+
+        Returns
+        -------
+        int
+            Number of waves completed by these samples
+        """
+        n_waves = self.n_waves
+        for level in np.asarray(water_levels, dtype=float):
+            self._sum += level
+            self.n_samples += 1
+            previous, self._previous = self._previous, level
+            if previous is None:
+                continue
+
+            # the sample before `level` (index n_samples - 2) is classified
+            # once its successor is known
+            mean = self._sum / self.n_samples
+            index = self.n_samples - 2
+            if previous < mean < level:
+                if self._start is not None and self._down_crossed:
+                    self.wave_heights.append(self._max - self._min)
+                    self.wave_periods.append(
+                        (index - self._start) * self.timestep
+                    )
+                self._start = index
+                self._down_crossed = False
+                self._max = -np.inf
+                self._min = np.inf
+            elif previous > mean > level and self._start is not None:
+                self._down_crossed = True
+
+            if self._start is not None:
+                self._max = max(self._max, previous)
+                self._min = min(self._min, previous)
+        return self.n_waves - n_waves
+
+    def statistics(self, n_waves: int | None = None) -> dict:
+        """
+        Wave statistics of the waves detected so far.
+
+        Parameters
+        ----------
+        n_waves : int | None
+            Only use the first `n_waves` waves (all of them if None)
+
+        Returns
+        -------
+        dict
+            Same statistics as `calculate_wave_heights`
+        """
+        return _wave_statistics(
+            np.array(self.wave_heights[:n_waves]),
+            np.array(self.wave_periods[:n_waves]),
+        )
 
-    return {
-        "significant_wave_height": h_sig,
-        "mean_wave_height": h_mean,
-        "max_wave_height": h_max,
-        "rms_wave_height": h_rms,
-        "n_waves": len(wave_heights),
-        "mean_period": t_mean,
-    }
+
+class RunningWaveStatistics:
+    """
+    Significant wave height and mean period of waves added one at a time.
+
+    The highest third of the waves (at least one) is kept in a min-heap and
+    the others in a max-heap, so that adding a wave updates H1/3 in
+    logarithmic time instead of sorting every wave again. The values are
+    those of `calculate_wave_heights` (up to rounding).
+    """
+
+    def __init__(self) -> None:
+        self.n_waves = 0
+        self._highest: list[float] = []  # min-heap of the highest third
+        self._others: list[float] = []  # max-heap (negated) of the others
+        self._highest_sum = 0.0
+        self._period_sum = 0.0
+
+    @property
+    def significant_wave_height(self) -> float:
+        if not self._highest:
+            return 0.0
+        return self._highest_sum / len(self._highest)
+
+    @property
+    def mean_period(self) -> float:
+        return self._period_sum / self.n_waves if self.n_waves else 0.0
+
+    def add(self, height: float, period: float) -> None:
+        """Add a wave to the statistics."""
+        self.n_waves += 1
+        self._period_sum += period
+        if self._highest and height > self._highest[0]:
+            self._highest_sum += height - self._highest[0]
+            height = heapq.heapreplace(self._highest, height)
+        heapq.heappush(self._others, -height)
+        # the highest third only grows
+        while len(self._highest) < max(1, self.n_waves // 3):
+            height = -heapq.heappop(self._others)
+            heapq.heappush(self._highest, height)
+            self._highest_sum += height
 
 
 def _zero_crossing_analysis(
@@ -131,6 +240,57 @@ def _zero_crossing_analysis(
     return np.array(wave_heights), np.array(wave_periods)
 
 
+def _wave_statistics(
+    wave_heights: np.ndarray, wave_periods: np.ndarray
+) -> dict:
+    """
+    Summarise individual waves into wave statistics.
+
+    Parameters
+    ----------
+    wave_heights : np.ndarray
+        Height of each wave
+    wave_periods : np.ndarray
+        Period of each wave
+
+    Returns
+    -------
+    dict
+        Statistics described in `calculate_wave_heights`
+    """
+    if len(wave_heights) == 0:
+        return {
+            "significant_wave_height": 0.0,
+            "mean_wave_height": 0.0,
+            "max_wave_height": 0.0,
+            "rms_wave_height": 0.0,
+            "n_waves": 0,
+            "mean_period": 0.0,
+        }
+
+    # Sort wave heights in descending order
+    sorted_heights = np.sort(wave_heights)[::-1]
+
+    # Calculate H1/3 (significant wave height)
+    n_third = max(1, len(sorted_heights) // 3)
+    h_sig = np.mean(sorted_heights[:n_third])
+
+    # Calculate other statistics
+    h_mean = np.mean(wave_heights)
+    h_max = np.max(wave_heights)
+    h_rms = np.sqrt(np.mean(wave_heights**2))
+    t_mean = np.mean(wave_periods) if len(wave_periods) > 0 else 0.0
+
+    return {
+        "significant_wave_height": h_sig,
+        "mean_wave_height": h_mean,
+        "max_wave_height": h_max,
+        "rms_wave_height": h_rms,
+        "n_waves": len(wave_heights),
+        "mean_period": t_mean,
+    }
+
+
 def calculate_wave_statistics_for_gauges(
     data: pl.DataFrame, timestep: float
 ) -> pl.DataFrame:
@@ -162,3 +322,40 @@ def calculate_wave_statistics_for_gauges(
         results.append(stats)
 
     return pl.DataFrame(results)
+
+
+def calculate_wave_statistics_for_matrix(
+    water_levels: np.ndarray, positions: list[float], timestep: float
+) -> pl.DataFrame:
+    """
+    Calculate wave statistics for each gauge of a time × gauge matrix.
+
+    The results are those of `calculate_wave_statistics_for_gauges`, the
+    water levels of each gauge being a column of the matrix (a view, e.g. of
+    a memory-mapped gauge matrix) instead of being filtered out of a long
+    frame.
+
+    Parameters
+    ----------
+    water_levels : np.ndarray
+        Water levels of shape (samples, gauges)
+    positions : list[float]
+        Position of each gauge
+    timestep : float
+        Time step between measurements
+
+    Returns
+    -------
+    pl.DataFrame
+        DataFrame with wave statistics for each gauge
+    """
+    results = []
+
+    for position in sorted(set(positions)):
+        stats = calculate_wave_heights(
+            water_levels[:, positions.index(position)], timestep
+        )
+        stats["position"] = position
+        results.append(stats)
+
+    return pl.DataFrame(results)
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Iterator
 from unittest.mock import Mock
 
 import pytest
@@ -6,6 +7,17 @@ import pytest
 from src import config, simulation
 
 
+@pytest.fixture(scope="session", autouse=True)
+def template_cache_dir(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> Iterator[Path]:
+    """Keep the compiled templates out of the working tree."""
+    cache_dir = tmp_path_factory.mktemp("jinja")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(simulation.TEMPLATE_CACHE_ENV, str(cache_dir))
+        yield cache_dir
+
+
 @pytest.fixture
 def mock_swash_executable(monkeypatch: pytest.MonkeyPatch) -> Mock:
     """Mock SWASH executable check."""
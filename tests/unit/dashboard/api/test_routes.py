@@ -284,7 +284,38 @@ class TestSimulateConfig:
         data = response.json()
         assert data["success"] is True
         assert "Simulation completed successfully" in data["message"]
-        mock_run.assert_called_once_with(mock_config)
+        mock_run.assert_called_once()
+        assert mock_run.call_args.args == (mock_config,)
+        assert callable(mock_run.call_args.kwargs["on_progress"])
+
+    def test_simulate_config_progress(self, api_client, mock_config_dir, mock_config):
+        """Test that the progress of a simulation can be queried."""
+        config_file = mock_config_dir / "test.yml"
+        config_file.write_text("name: test")
+        mock_config.simulation_duration = 100.0
+
+        def fake_run(cfg, on_progress):
+            on_progress(40.0)
+            progress = api_client.get("/simulate/test").json()
+            assert progress == {
+                "running": True,
+                "simulation_time": 40.0,
+                "total": 100.0,
+            }
+
+        with patch('src.dashboard.api.routes.config_module.read_config', return_value=mock_config), \
+             patch('src.dashboard.api.routes.run_simulation', side_effect=fake_run):
+            response = api_client.post("/simulate/test")
+
+        assert response.status_code == 200
+        assert api_client.get("/simulate/test").json()["running"] is False
+
+    def test_simulate_config_progress_unknown(self, api_client):
+        """Test the progress of a simulation that never ran."""
+        response = api_client.get("/simulate/unknown")
+
+        assert response.status_code == 200
+        assert response.json()["running"] is False
 
     def test_simulate_config_error(self, api_client, mock_config_dir, mock_config, capsys):
         """Test error handling in simulate_config."""
@@ -442,7 +473,7 @@ class TestGetApiRoutes:
         routes_list = routes.get_api_routes()
         
         # Check that we have the expected number of routes
-        assert len(routes_list) == 8
+        assert len(routes_list) == 9
         
         # Check that all expected routes are present
         route_patterns = [route.path for route in routes_list]
@@ -4,7 +4,6 @@ from pathlib import Path
 from unittest.mock import Mock, patch
 
 import numpy as np
-import pandas as pd
 import polars as pl
 import pytest
 
@@ -45,7 +44,7 @@ class TestAnalyzeSimulation:
 
         # Mock the wave statistics calculation
         with patch(
-            "src.analysis.calculate_wave_statistics_for_gauges"
+            "src.analysis.calculate_wave_statistics_for_matrix"
         ) as mock_wave_stats:
             mock_stats = pl.DataFrame(
                 {
@@ -67,12 +66,13 @@ class TestAnalyzeSimulation:
             assert len(result["wave_stats"]) == 5
 
             # Verify files were created
-            assert (analysis_dir / "water_levels_and_x_velocity.png").exists()
             assert (analysis_dir / "water_levels_and_x_velocity.json").exists()
+            # images are only exported by an exporter
+            assert not (analysis_dir / "water_levels_and_x_velocity.png").exists()
             assert (analysis_dir / "wave_statistics.csv").exists()
 
-            # Verify data.csv was created
-            assert (swash_dir / "data.csv").exists()
+            # Verify the gauge store was created
+            assert (swash_dir / "gauges.parquet").exists()
 
     def test_analyze_simulation_missing_plot_file(self, tmp_path: Path) -> None:
         """Test analysis when plot file is not created."""
@@ -91,7 +91,7 @@ class TestAnalyzeSimulation:
             gauge_file.write_text("0.0 0.0 0.0\n")
 
         with patch(
-            "src.analysis.calculate_wave_statistics_for_gauges"
+            "src.analysis.calculate_wave_statistics_for_matrix"
         ) as mock_wave_stats:
             mock_wave_stats.return_value = pl.DataFrame({"position": [20.0]})
 
@@ -102,6 +102,106 @@ class TestAnalyzeSimulation:
                 assert result["plot_file"] == ""
 
 
+    def _incremental_setup(self, tmp_path: Path) -> tuple[config.Config, Path]:
+        cfg = config.Config(
+            name="incremental",
+            numeric=config.NumericConfig(wave_gauge_positions=[20.0, 60.0]),
+        )
+        simulation_dir = tmp_path / "test_sim"
+        swash_dir = simulation_dir / "swash"
+        swash_dir.mkdir(parents=True)
+        (swash_dir / "INPUT").write_text("WATLEV OUTPUT 0.0 0.0 0.1 SEC\n")
+        for i in range(2):
+            np.savetxt(
+                swash_dir / f"wg{i+1:02d}.txt",
+                np.array([[0.1, 0.05], [0.2, 0.08], [0.15, 0.06]]),
+                fmt="%.3f",
+            )
+        return cfg, simulation_dir
+
+    def _fake_plots(self, simulation_dir: Path) -> dict[str, Mock]:
+        analysis_dir = simulation_dir / "analysis"
+        return {
+            "time_series": Mock(
+                side_effect=lambda *args: (
+                    analysis_dir / "water_levels_and_x_velocity.json"
+                ).write_text("{}")
+            ),
+            "diagram": Mock(
+                side_effect=lambda *args: (
+                    analysis_dir / "swash_diagram.json"
+                ).write_text("{}")
+            ),
+        }
+
+    def test_analyze_simulation_is_incremental(self, tmp_path: Path) -> None:
+        """Test that only the out of date products are computed again."""
+        cfg, simulation_dir = self._incremental_setup(tmp_path)
+        plots = self._fake_plots(simulation_dir)
+
+        with patch(
+            "src.analysis._plot_water_levels_and_x_velocities",
+            plots["time_series"],
+        ), patch("src.analysis._plot_swash_data", plots["diagram"]):
+            first = analysis.analyze_simulation(simulation_dir, cfg)
+            second = analysis.analyze_simulation(simulation_dir, cfg)
+            assert plots["time_series"].call_count == 1
+            assert plots["diagram"].call_count == 1
+
+            # new gauge outputs leave the diagram alone
+            np.savetxt(
+                simulation_dir / "swash" / "wg01.txt",
+                np.array([[0.3, 0.05], [0.1, 0.08]]),
+                fmt="%.3f",
+            )
+            third = analysis.analyze_simulation(simulation_dir, cfg)
+            assert plots["time_series"].call_count == 2
+            assert plots["diagram"].call_count == 1
+
+        assert first["updated"] == ["wave_statistics", "time_series", "diagram"]
+        assert second["updated"] == []
+        assert third["updated"] == ["wave_statistics", "time_series"]
+        assert second["wave_stats"] == first["wave_stats"]
+
+    def test_analyze_simulation_force(self, tmp_path: Path) -> None:
+        """Test that force computes up to date products again."""
+        cfg, simulation_dir = self._incremental_setup(tmp_path)
+        plots = self._fake_plots(simulation_dir)
+
+        with patch(
+            "src.analysis._plot_water_levels_and_x_velocities",
+            plots["time_series"],
+        ), patch("src.analysis._plot_swash_data", plots["diagram"]):
+            analysis.analyze_simulation(simulation_dir, cfg)
+            result = analysis.analyze_simulation(
+                simulation_dir, cfg, force=True
+            )
+
+        assert plots["diagram"].call_count == 2
+        assert result["updated"] == ["wave_statistics", "time_series", "diagram"]
+
+
+    def test_analyze_simulation_exports_images(self, tmp_path: Path) -> None:
+        """Test that the figures without an image are given to the exporter."""
+        cfg, simulation_dir = self._incremental_setup(tmp_path)
+        plots = self._fake_plots(simulation_dir)
+        exporter = Mock()
+
+        with patch(
+            "src.analysis._plot_water_levels_and_x_velocities",
+            plots["time_series"],
+        ), patch("src.analysis._plot_swash_data", plots["diagram"]):
+            analysis.analyze_simulation(simulation_dir, cfg, exporter=exporter)
+
+        analysis_dir = simulation_dir / "analysis"
+        exporter.submit.assert_called_once_with(
+            [
+                analysis_dir / "water_levels_and_x_velocity.json",
+                analysis_dir / "swash_diagram.json",
+            ]
+        )
+
+
 class TestFindTimestep:
     """Test the _find_timestep internal function."""
 
@@ -186,7 +286,7 @@ class TestReadSimulationData:
 
         # Verify structure
         assert isinstance(result, pl.DataFrame)
-        expected_columns = {"timestep", "water_level", "x_velocity", "y_velocity", "position"}
+        expected_columns = {"timestep", "water_level", "x_velocity", "position"}
         assert set(result.columns) == expected_columns
 
         # Verify data
@@ -194,8 +294,46 @@ class TestReadSimulationData:
         assert result["timestep"].to_list() == [0.0, 0.1, 0.2] * 3
         assert sorted(result["position"].unique().to_list()) == [20.0, 60.0, 100.0]
 
-        # Verify data.csv was created
-        assert (swash_dir / "data.csv").exists()
+        # Verify the gauge store was created
+        assert (swash_dir / "gauges.parquet").exists()
+
+    def test_read_simulation_data_from_store(self, tmp_path: Path) -> None:
+        """Test that later analyses load the gauge store instead of parsing."""
+        cfg = config.Config(
+            name="test",
+            numeric=config.NumericConfig(wave_gauge_positions=[20.0, 60.0]),
+        )
+        swash_dir = tmp_path / "swash"
+        swash_dir.mkdir()
+        for i in range(2):
+            np.savetxt(swash_dir / f"wg{i+1:02d}.txt", np.ones((5, 3)) * i)
+        parsed = analysis._read_simulaton_data(cfg, 0.1, tmp_path)
+
+        with patch("src.analysis.read_gauges") as read:
+            loaded = analysis._read_simulaton_data(cfg, 0.1, tmp_path)
+
+        read.assert_not_called()
+        assert loaded.equals(parsed)
+        assert loaded["water_level"].dtype == pl.Float32
+
+    def test_read_simulation_data_from_parquet(self, tmp_path: Path) -> None:
+        """Test that a store without its matrix is still loaded."""
+        cfg = config.Config(
+            name="test",
+            numeric=config.NumericConfig(wave_gauge_positions=[20.0]),
+        )
+        swash_dir = tmp_path / "swash"
+        swash_dir.mkdir()
+        np.savetxt(swash_dir / "wg01.txt", np.ones((5, 3)))
+        parsed = analysis._read_simulaton_data(cfg, 0.1, tmp_path)
+        (swash_dir / "gauges.npy").unlink()
+
+        with patch("src.analysis.read_gauges") as read:
+            loaded = analysis._read_simulaton_data(cfg, 0.1, tmp_path)
+
+        read.assert_not_called()
+        assert loaded.equals(parsed)
+        assert (swash_dir / "gauges.npy").exists()
 
     def test_read_simulation_data_empty_files(self, tmp_path: Path) -> None:
         """Test reading empty gauge files."""
@@ -265,7 +403,6 @@ class TestPlotWaterLevelsAndXVelocities:
         # Verify files were created
         analysis_dir = tmp_path / "analysis"
         assert analysis_dir.exists()
-        assert (analysis_dir / "water_levels_and_x_velocity.png").exists()
         assert (analysis_dir / "water_levels_and_x_velocity.json").exists()
 
         # Verify JSON content has breakwater annotations
@@ -291,7 +428,6 @@ class TestPlotWaterLevelsAndXVelocities:
         # Verify files were created
         analysis_dir = tmp_path / "analysis"
         assert analysis_dir.exists()
-        assert (analysis_dir / "water_levels_and_x_velocity.png").exists()
         assert (analysis_dir / "water_levels_and_x_velocity.json").exists()
 
         # Verify JSON content has no breakwater annotations
@@ -411,7 +547,6 @@ class TestPlotWaterLevelsAndXVelocities:
         # Verify files were created despite the edge case
         analysis_dir = tmp_path / "analysis"
         assert analysis_dir.exists()
-        assert (analysis_dir / "water_levels_and_x_velocity.png").exists()
 
 
 class TestEdgeCases:
@@ -513,16 +648,15 @@ class TestEdgeCases:
 
         # Create gauge file with wrong number of columns
         gauge_file = swash_dir / "wg01.txt"
-        gauge_file.write_text("0.1 0.05\n0.2 0.08\n")  # Missing third column
+        gauge_file.write_text("0.1\n0.2\n")  # Missing velocity columns
 
-        # pandas handles missing columns by filling with NaN, so this should work
-        # but we can check that NaN values are present
+        # missing columns are filled with NaN
         result = analysis._read_simulaton_data(cfg, timestep, tmp_path)
         assert isinstance(result, pl.DataFrame)
         assert len(result) == 2
-        
-        # Check that y_velocity column contains null values
-        assert result["y_velocity"].null_count() == 2
+
+        # Check that x_velocity column contains NaN values
+        assert result["x_velocity"].is_nan().sum() == 2
 
     def test_analyze_simulation_integration_minimal(self, tmp_path: Path) -> None:
         """Integration test with minimal valid setup."""
@@ -549,7 +683,7 @@ class TestEdgeCases:
 
         # Mock wave statistics
         with patch(
-            "src.analysis.calculate_wave_statistics_for_gauges"
+            "src.analysis.calculate_wave_statistics_for_matrix"
         ) as mock_wave_stats:
             mock_wave_stats.return_value = pl.DataFrame({
                 "position": [50.0],
@@ -561,4 +695,122 @@ class TestEdgeCases:
             assert isinstance(result, dict)
             assert "plot_file" in result
             assert "wave_stats" in result
-            assert len(result["wave_stats"]) == 1
\ No newline at end of file
+            assert len(result["wave_stats"]) == 1
+
+class TestStreamingAnalysis:
+    """Test the analysis following SWASH outputs during the run."""
+
+    @pytest.fixture
+    def cfg(self) -> config.Config:
+        return config.Config(
+            name="stream",
+            numeric=config.NumericConfig(wave_gauge_positions=[20.0, 60.0]),
+        )
+
+    @staticmethod
+    def _write_outputs(swash_dir: Path, n_rows: int, chunks: int = 5) -> None:
+        t = np.arange(n_rows) * 0.1
+        rows = np.column_stack(
+            [0.05 * np.sin(2 * np.pi * t / 6), 0.1 * np.cos(2 * np.pi * t / 6), np.zeros(n_rows)]
+        )
+        files = [open(swash_dir / f"wg0{i}.txt", "w") for i in (1, 2)]
+        for chunk in np.array_split(rows, chunks):
+            for f in files:
+                np.savetxt(f, chunk, fmt="%.6f")
+                f.flush()
+        for f in files:
+            f.close()
+
+    @pytest.fixture
+    def simulation_dir(self, tmp_path: Path) -> Path:
+        swash_dir = tmp_path / "sim" / "swash"
+        swash_dir.mkdir(parents=True)
+        return tmp_path / "sim"
+
+    def test_stream_matches_final_outputs(
+        self, cfg: config.Config, simulation_dir: Path
+    ) -> None:
+        """Test that the streamed data is the data read after the run."""
+        with analysis.StreamingAnalysis(
+            cfg, simulation_dir, poll_interval=0.01
+        ) as stream:
+            self._write_outputs(simulation_dir / "swash", 600)
+
+        expected = analysis._read_simulaton_data(cfg, 0.1, simulation_dir)
+        assert stream.data(0.1).equals(expected)
+        assert stream.diagram_ready
+        assert (simulation_dir / "analysis" / "swash_diagram.json").exists()
+
+    def test_stream_follows_truncated_outputs(
+        self, cfg: config.Config, simulation_dir: Path
+    ) -> None:
+        """Test that outputs cut after the run are taken into account."""
+        from src.convergence import truncate_outputs
+
+        with analysis.StreamingAnalysis(cfg, simulation_dir) as stream:
+            self._write_outputs(simulation_dir / "swash", 600)
+        truncate_outputs(simulation_dir / "swash", n_gauges=2, n_samples=250)
+
+        data = stream.data(0.1)
+        assert len(data) == 500
+        assert data.equals(analysis._read_simulaton_data(cfg, 0.1, simulation_dir))
+
+    def test_stream_with_spinup_prefix(
+        self, cfg: config.Config, simulation_dir: Path, tmp_path: Path
+    ) -> None:
+        """Test that spin-up rows prepended after the run are included."""
+        prefix_dir = tmp_path / "spinup"
+        prefix_dir.mkdir()
+        self._write_outputs(prefix_dir, 100, chunks=1)
+
+        with analysis.StreamingAnalysis(
+            cfg, simulation_dir, prefix_dir=prefix_dir
+        ) as stream:
+            self._write_outputs(simulation_dir / "swash", 300)
+        for i in (1, 2):
+            path = simulation_dir / "swash" / f"wg0{i}.txt"
+            path.write_bytes((prefix_dir / f"wg0{i}.txt").read_bytes() + path.read_bytes())
+
+        assert stream.data(0.1).equals(
+            analysis._read_simulaton_data(cfg, 0.1, simulation_dir)
+        )
+
+    def test_analyze_simulation_uses_stream(
+        self, cfg: config.Config, simulation_dir: Path
+    ) -> None:
+        """Test that the final analysis doesn't read the outputs again."""
+        (simulation_dir / "swash" / "INPUT").write_text("WATLEV OUTPUT 0.0 0.0 0.1 SEC\n")
+        with analysis.StreamingAnalysis(cfg, simulation_dir) as stream:
+            self._write_outputs(simulation_dir / "swash", 300)
+
+        with (
+            patch("src.analysis._read_simulaton_data") as read,
+            patch("src.analysis._plot_swash_data") as plot_diagram,
+        ):
+            result = analysis.analyze_simulation(simulation_dir, cfg, stream=stream)
+
+        read.assert_not_called()
+        plot_diagram.assert_not_called()
+        assert len(result["wave_stats"]) == 2
+        assert (simulation_dir / "swash" / "gauges.parquet").exists()
+
+    def test_stream_with_compressed_outputs(
+        self, cfg: config.Config, simulation_dir: Path
+    ) -> None:
+        """Test that outputs compressed after the run are read transparently."""
+        from src import cache
+        from src.compression import compress_file
+
+        swash_dir = simulation_dir / "swash"
+        with analysis.StreamingAnalysis(cfg, simulation_dir) as stream:
+            self._write_outputs(swash_dir, 300)
+        expected = analysis._read_simulaton_data(cfg, 0.1, simulation_dir)
+        for i in (1, 2):
+            compress_file(swash_dir / f"wg0{i}.txt", "gzip")
+        cache.update_manifest(swash_dir, {"compression": "gzip"})
+
+        assert stream.data(0.1).equals(expected)
+        assert analysis._read_simulaton_data(cfg, 0.1, simulation_dir).equals(
+            expected
+        )
+        assert not (swash_dir / "wg01.txt").exists()
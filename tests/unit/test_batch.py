@@ -0,0 +1,420 @@
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src import batch, cache, config, resources
+
+
+@pytest.fixture
+def configs() -> list[config.Config]:
+    return [
+        config.Config(
+            name=f"batch_{i}",
+            water=config.WaterConfig(wave_period=2, wave_height=0.1 * (i + 1)),
+        )
+        for i in range(4)
+    ]
+
+
+class TestRunBatch:
+    def test_run_batch_runs_every_config(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that every config is simulated once and results are collected."""
+        mock_run = Mock(return_value=True)
+        monkeypatch.setattr("src.batch.run_simulation", mock_run)
+
+        results = batch.run_batch(configs, jobs=2)
+
+        assert results == {f"{cfg.name}_{cfg.hash}": True for cfg in configs}
+        assert mock_run.call_count == len(configs)
+        for call in mock_run.call_args_list:
+            assert call.kwargs["echo"] is False
+            assert callable(call.kwargs["on_progress"])
+
+    def test_run_batch_runs_concurrently(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that up to `jobs` simulations run at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            barrier.wait()
+            return True
+
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        results = batch.run_batch(configs[:2], jobs=2)
+
+        assert all(results.values())
+
+    def test_run_batch_isolates_failures(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a failing or crashing run doesn't stop the others."""
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            if cfg.name == "batch_1":
+                raise RuntimeError("boom")
+            return cfg.name != "batch_2"
+
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        results = batch.run_batch(configs, jobs=3)
+
+        assert results == {
+            f"{cfg.name}_{cfg.hash}": success
+            for cfg, success in zip(configs, [True, False, False, True])
+        }
+
+    def test_run_batch_deduplicates_identical_configs(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the same config isn't run twice in the same directory."""
+        mock_run = Mock(return_value=True)
+        monkeypatch.setattr("src.batch.run_simulation", mock_run)
+
+        batch.run_batch([configs[0], configs[0]], jobs=2)
+
+        assert mock_run.call_count == 1
+
+    def test_run_batch_same_name_other_hash(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that configs sharing a name keep their own results."""
+        other = configs[1].model_copy(update={"name": configs[0].name})
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            return cfg is configs[0]
+
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        results = batch.run_batch([configs[0], other], jobs=2)
+
+        assert results == {
+            f"batch_0_{configs[0].hash}": True,
+            f"batch_0_{other.hash}": False,
+        }
+
+    def test_run_batch_shares_identical_physics(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that configs differing only by name wait for a single run."""
+        renamed = configs[0].model_copy(update={"name": "renamed"})
+        calls = []
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            calls.append((cfg.name, kwargs["force"]))
+            return True
+
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        results = batch.run_batch([configs[0], renamed], jobs=2, force=True)
+
+        assert results == {
+            f"batch_0_{configs[0].hash}": True,
+            f"renamed_{renamed.hash}": True,
+        }
+        # the second config only runs after the first one, reusing its results
+        assert calls == [("batch_0", True), ("renamed", False)]
+
+    def test_run_batch_shared_physics_failure(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a failed run isn't retried for configs sharing its physics."""
+        renamed = configs[0].model_copy(update={"name": "renamed"})
+        mock_run = Mock(return_value=False)
+        monkeypatch.setattr("src.batch.run_simulation", mock_run)
+
+        results = batch.run_batch([configs[0], renamed], jobs=2)
+
+        assert results == {
+            f"batch_0_{configs[0].hash}": False,
+            f"renamed_{renamed.hash}": False,
+        }
+        assert mock_run.call_count == 1
+
+    def test_run_batch_aggregates_progress(
+        self, configs: list[config.Config], monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that progress callbacks feed a single aggregated bar."""
+        bars = []
+
+        class FakeBar:
+            def __init__(self, *args, **kwargs) -> None:
+                self.total = kwargs["total"]
+                self.n = 0
+                self.history = []
+                bars.append(self)
+
+            def refresh(self) -> None:
+                self.history.append(self.n)
+
+            def set_postfix_str(self, text: str) -> None:
+                pass
+
+            def close(self) -> None:
+                pass
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            kwargs["on_progress"](cfg.simulation_duration / 2)
+            return True
+
+        monkeypatch.setattr("src.batch.tqdm.tqdm", FakeBar)
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        batch.run_batch(configs[:1], jobs=1)
+
+        assert len(bars) == 1
+        assert bars[0].total == int(configs[0].simulation_duration)
+        assert bars[0].history == [int(configs[0].simulation_duration / 2)]
+        assert bars[0].n == bars[0].total
+
+    def test_run_batch_prints_resources(
+        self,
+        configs: list[config.Config],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture,
+    ) -> None:
+        """Test that the summary shows the resources used by each run."""
+        monkeypatch.setattr("src.batch.root_dir", tmp_path)
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            swash_dir = (
+                tmp_path / "simulations" / f"{cfg.name}_{cfg.hash}" / "swash"
+            )
+            swash_dir.mkdir(parents=True)
+            usage = resources.ResourceUsage(4.0, 3.0, 1.0, 2048, 1024, 8.0)
+            cache.update_manifest(swash_dir, {"resources": usage.to_dict()})
+            return True
+
+        monkeypatch.setattr("src.batch.run_simulation", fake_run)
+
+        batch.run_batch(configs[:2], jobs=2)
+
+        out = capsys.readouterr().out
+        assert "batch_0" in out and "batch_1" in out
+        assert "2.00" in out  # simulated s per wall s
+        assert "8.0s" in out  # total wall time
+
+
+class TestPrepareBatch:
+    def test_prepare_batch(
+        self, configs: list[config.Config], tmp_path: Path
+    ) -> None:
+        """Test that the inputs of every config are written."""
+        simulations_dir = tmp_path / "simulations"
+
+        prepared = batch.prepare_batch(
+            configs,
+            jobs=1,
+            simulations_dir=simulations_dir,
+            template_dir=Path(__file__).parents[2] / "templates",
+        )
+
+        assert [run.name for run in prepared] == [cfg.name for cfg in configs]
+        for run in prepared:
+            assert run.state == "prepared"
+            assert run.spinup_dir is None
+            assert (run.swash_dir / "INPUT").exists()
+            assert (run.swash_dir / "bathymetry.txt").exists()
+
+    def test_prepare_batch_shares_physics(
+        self,
+        configs: list[config.Config],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that configs sharing their physics are only written once."""
+        mock_prepare = Mock(return_value=True)
+        monkeypatch.setattr("src.batch.prepare_inputs", mock_prepare)
+        copy = config.Config(**configs[0].model_dump(exclude={"hash"}))
+        copy.name = "batch_copy"
+
+        prepared = batch.prepare_batch(
+            [configs[0], copy],
+            jobs=1,
+            simulations_dir=tmp_path,
+            template_dir=tmp_path,
+        )
+
+        assert mock_prepare.call_count == 1
+        assert prepared[0].swash_dir != prepared[1].swash_dir
+        assert (
+            prepared[0].swash_dir.resolve() == prepared[1].swash_dir.resolve()
+        )
+
+    def test_prepare_batch_spinups(self, tmp_path: Path) -> None:
+        """Test that the spin-up of hot-started configs is prepared once."""
+        configs = [
+            config.Config(
+                name=f"hot_{i}",
+                breakwater=config.BreakwaterConfig(porosity=porosity),
+                numeric=config.NumericConfig(hotstart=True),
+            )
+            for i, porosity in enumerate((0.3, 0.5))
+        ]
+
+        prepared = batch.prepare_batch(
+            configs,
+            jobs=2,
+            simulations_dir=tmp_path,
+            template_dir=Path(__file__).parents[2] / "templates",
+        )
+
+        assert prepared[0].spinup_dir is not None
+        assert prepared[0].spinup_dir == prepared[1].spinup_dir
+        assert "hotstart" in (prepared[0].spinup_dir / "INPUT").read_text()
+        for run in prepared:
+            assert (run.swash_dir / "porosity.txt").exists()
+
+    def test_prepare_batch_skips_complete_runs(
+        self,
+        configs: list[config.Config],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that directories holding a complete run are reported."""
+        monkeypatch.setattr(
+            "src.batch.prepare_inputs", Mock(return_value=False)
+        )
+
+        prepared = batch.prepare_batch(
+            configs[:1],
+            jobs=1,
+            simulations_dir=tmp_path,
+            template_dir=tmp_path,
+        )
+
+        assert prepared[0].state == "complete"
+
+
+def _fake_analyze(
+    simulation_dir: Path, cfg: config.Config, *, force: bool = False
+) -> dict:
+    if cfg.name == "batch_2":
+        raise ValueError("unreadable outputs")
+    return {
+        "updated": (
+            ["wave_statistics"] if force or cfg.name == "batch_0" else []
+        )
+    }
+
+
+class TestAnalyzeBatch:
+    @pytest.fixture
+    def simulations_dir(
+        self,
+        configs: list[config.Config],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> Path:
+        monkeypatch.setattr("src.analysis.analyze_simulation", _fake_analyze)
+        for cfg in configs[:3]:
+            (tmp_path / f"{cfg.name}_{cfg.hash}" / "swash").mkdir(parents=True)
+        return tmp_path
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_analyze_batch(
+        self, configs: list[config.Config], simulations_dir: Path, jobs: int
+    ) -> None:
+        """Test that every run is analyzed, failures being isolated."""
+        analyzed = batch.analyze_batch(
+            configs, jobs=jobs, simulations_dir=simulations_dir
+        )
+
+        assert [run.name for run in analyzed] == [cfg.name for cfg in configs]
+        assert [run.state for run in analyzed] == [
+            "analyzed",
+            "skipped",
+            "failed",
+            "failed",
+        ]
+        assert analyzed[0].detail == "wave_statistics"
+        assert analyzed[2].detail == "unreadable outputs"
+        assert analyzed[3].detail == "no simulation results"
+
+    def test_analyze_batch_force(
+        self, configs: list[config.Config], simulations_dir: Path
+    ) -> None:
+        """Test that force is given to every analysis."""
+        analyzed = batch.analyze_batch(
+            configs[:2], jobs=1, force=True, simulations_dir=simulations_dir
+        )
+
+        assert [run.state for run in analyzed] == ["analyzed", "analyzed"]
+
+    def test_analyze_batch_exports_images(
+        self, configs: list[config.Config], simulations_dir: Path
+    ) -> None:
+        """Test that the images of the runs that didn't fail are exported."""
+        exporter = Mock()
+
+        batch.analyze_batch(
+            configs, jobs=1, exporter=exporter, simulations_dir=simulations_dir
+        )
+
+        assert exporter.submit.call_count == 2
+
+    def test_analyze_batch_shared_results(
+        self, configs: list[config.Config], simulations_dir: Path
+    ) -> None:
+        """Test that runs sharing their results are analyzed by one task."""
+        copy = config.Config(**configs[1].model_dump(exclude={"hash"}))
+        copy.name = "batch_copy"
+        (simulations_dir / f"{copy.name}_{copy.hash}").symlink_to(
+            simulations_dir / f"{configs[1].name}_{configs[1].hash}"
+        )
+        calls = []
+        analyze_many = batch._analyze_many
+
+        def record(task: list) -> list:
+            calls.append([cfg.name for cfg, _, _ in task])
+            return analyze_many(task)
+
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            monkeypatch.setattr("src.batch._analyze_many", record)
+            analyzed = batch.analyze_batch(
+                [configs[1], copy], jobs=2, simulations_dir=simulations_dir
+            )
+
+        assert calls == [["batch_1", "batch_copy"]]
+        assert [run.state for run in analyzed] == ["skipped", "skipped"]
+
+
+class TestPhysicalCores:
+    def test_physical_cores_ignores_hyperthreads(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that sibling hyper-threads count as a single core."""
+        cpuinfo = tmp_path / "cpuinfo"
+        blocks = [
+            f"processor\t: {i}\nphysical id\t: 0\ncore id\t\t: {i % 2}\n"
+            for i in range(4)
+        ]
+        cpuinfo.write_text("\n".join(blocks))
+
+        original_open = open
+
+        def fake_open(path, *args, **kwargs):
+            if path == "/proc/cpuinfo":
+                return original_open(cpuinfo, *args, **kwargs)
+            return original_open(path, *args, **kwargs)
+
+        monkeypatch.setattr("builtins.open", fake_open)
+
+        assert batch.physical_cores() == 2
+
+    def test_physical_cores_fallback(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the fallback to the logical CPU count."""
+        monkeypatch.setattr(
+            "builtins.open", Mock(side_effect=OSError("no procfs"))
+        )
+        monkeypatch.setattr("src.batch.os.cpu_count", Mock(return_value=6))
+
+        assert batch.physical_cores() == 6
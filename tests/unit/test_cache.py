@@ -0,0 +1,398 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from src import cache, config
+
+
+@pytest.fixture
+def cfg() -> config.Config:
+    return config.Config(
+        name="cache_test",
+        numeric=config.NumericConfig(wave_gauge_positions=[10.0, 20.0]),
+    )
+
+
+@pytest.fixture
+def template(tmp_path: Path) -> Path:
+    path = tmp_path / "INPUT.template"
+    path.write_text("PROJECT '{{ name }}'\n")
+    return path
+
+
+class TestComputeRunKey:
+    def test_key_is_stable(self, cfg: config.Config, template: Path) -> None:
+        """Test that the same inputs always give the same key."""
+        assert cache.compute_run_key(
+            cfg, "INPUT", template
+        ) == cache.compute_run_key(cfg, "INPUT", template)
+
+    def test_key_depends_on_every_input(
+        self, cfg: config.Config, template: Path
+    ) -> None:
+        """Test that config, rendered INPUT and template all change the key."""
+        key = cache.compute_run_key(cfg, "INPUT", template)
+
+        other_cfg = config.Config(
+            name="cache_test", water=config.WaterConfig(wave_height=0.1)
+        )
+        assert cache.compute_run_key(other_cfg, "INPUT", template) != key
+        assert cache.compute_run_key(cfg, "OTHER", template) != key
+
+        template.write_text("changed")
+        assert cache.compute_run_key(cfg, "INPUT", template) != key
+
+
+class TestLinkSimulationDir:
+    def test_link_to_store(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that the simulation directory links to the store."""
+        sim_dir = cache.link_simulation_dir(cfg, tmp_path)
+
+        assert sim_dir == tmp_path / f"{cfg.name}_{cfg.hash}"
+        assert sim_dir.is_symlink()
+        assert (
+            sim_dir.resolve()
+            == (tmp_path / cache.STORE_DIR / cfg.physics_hash).resolve()
+        )
+
+    def test_same_physics_share_results(
+        self, cfg: config.Config, tmp_path: Path
+    ) -> None:
+        """Test that a renamed config links to the same results."""
+        renamed = cfg.model_copy(update={"name": "renamed"})
+        renamed = config.Config(**renamed.model_dump())
+
+        a = cache.link_simulation_dir(cfg, tmp_path)
+        b = cache.link_simulation_dir(renamed, tmp_path)
+        (a / "result").write_text("shared")
+
+        assert a != b
+        assert (b / "result").read_text() == "shared"
+
+    def test_link_is_idempotent(
+        self, cfg: config.Config, tmp_path: Path
+    ) -> None:
+        """Test that linking twice keeps the existing link."""
+        a = cache.link_simulation_dir(cfg, tmp_path)
+        (a / "result").write_text("kept")
+        b = cache.link_simulation_dir(cfg, tmp_path)
+
+        assert a == b
+        assert (b / "result").read_text() == "kept"
+
+    def test_stale_link_is_replaced(
+        self, cfg: config.Config, tmp_path: Path
+    ) -> None:
+        """Test that a link to other results is pointed to the right ones."""
+        link = tmp_path / f"{cfg.name}_{cfg.hash}"
+        link.symlink_to(tmp_path / "elsewhere")
+
+        sim_dir = cache.link_simulation_dir(cfg, tmp_path)
+
+        assert (
+            sim_dir.resolve()
+            == (tmp_path / cache.STORE_DIR / cfg.physics_hash).resolve()
+        )
+
+    def test_existing_directory_is_moved_to_store(
+        self, cfg: config.Config, tmp_path: Path
+    ) -> None:
+        """Test that results from before the store are kept."""
+        legacy = tmp_path / f"{cfg.name}_{cfg.hash}"
+        (legacy / "swash").mkdir(parents=True)
+        (legacy / "swash" / "PRINT").write_text("legacy")
+
+        sim_dir = cache.link_simulation_dir(cfg, tmp_path)
+
+        assert sim_dir.is_symlink()
+        assert (sim_dir / "swash" / "PRINT").read_text() == "legacy"
+
+
+class TestFileDigest:
+    def test_file_digest_missing_file(self, tmp_path: Path) -> None:
+        """Test that a missing file has an empty digest."""
+        assert cache.file_digest(tmp_path / "missing") == ""
+
+    def test_file_digest_content(self, tmp_path: Path) -> None:
+        """Test that the digest only depends on content."""
+        a = tmp_path / "a"
+        b = tmp_path / "b"
+        a.write_text("same")
+        b.write_text("same")
+        assert cache.file_digest(a) == cache.file_digest(b)
+
+
+class TestManifest:
+    def test_read_missing_manifest(self, tmp_path: Path) -> None:
+        """Test that a missing manifest reads as empty."""
+        assert cache.read_manifest(tmp_path) == {}
+
+    def test_read_corrupted_manifest(self, tmp_path: Path) -> None:
+        """Test that a corrupted manifest reads as empty."""
+        (tmp_path / cache.MANIFEST_FILE).write_text("{not json")
+        assert cache.read_manifest(tmp_path) == {}
+
+    def test_write_and_read_manifest(self, tmp_path: Path) -> None:
+        """Test the manifest round trip and that no temporary file is left."""
+        cache.write_manifest(tmp_path, {"status": "completed"})
+
+        assert cache.read_manifest(tmp_path) == {"status": "completed"}
+        assert [p.name for p in tmp_path.iterdir()] == [cache.MANIFEST_FILE]
+
+    def test_update_manifest(self, tmp_path: Path) -> None:
+        """Test that updating keeps the other entries."""
+        cache.write_manifest(tmp_path, {"exit_code": 0, "status": "failed"})
+        cache.update_manifest(tmp_path, {"status": "completed"})
+
+        assert cache.read_manifest(tmp_path) == {
+            "exit_code": 0,
+            "status": "completed",
+        }
+
+    def test_clear_manifest(self, tmp_path: Path) -> None:
+        """Test that clearing removes the manifest and tolerates absence."""
+        cache.write_manifest(tmp_path, {})
+        cache.clear_manifest(tmp_path)
+        cache.clear_manifest(tmp_path)
+        assert not (tmp_path / cache.MANIFEST_FILE).exists()
+
+
+class TestInputManifest:
+    def test_read_missing_input_manifest(self, tmp_path: Path) -> None:
+        """Test that a missing input manifest reads as empty."""
+        assert cache.read_input_manifest(tmp_path) == {}
+
+    def test_recorded_input_is_current(self, tmp_path: Path) -> None:
+        """Test that a recorded file is current for the same sources only."""
+        (tmp_path / "bathymetry.txt").write_text("0.000\n")
+        manifest = cache.read_input_manifest(tmp_path)
+        cache.record_inputs(
+            tmp_path, manifest, {"bathymetry.txt": {"grid": "a"}}
+        )
+
+        manifest = cache.read_input_manifest(tmp_path)
+        assert cache.is_input_current(
+            tmp_path, manifest, "bathymetry.txt", {"grid": "a"}
+        )
+        assert not cache.is_input_current(
+            tmp_path, manifest, "bathymetry.txt", {"grid": "b"}
+        )
+        assert not cache.is_input_current(
+            tmp_path, manifest, "porosity.txt", {"grid": "a"}
+        )
+
+    def test_modified_input_is_not_current(self, tmp_path: Path) -> None:
+        """Test that a file modified since it was recorded is regenerated."""
+        path = tmp_path / "bathymetry.txt"
+        path.write_text("0.000\n")
+        manifest: dict = {}
+        cache.record_inputs(tmp_path, manifest, {path.name: {"grid": "a"}})
+
+        mtime = path.stat().st_mtime + 1
+        os.utime(path, (mtime, mtime))
+
+        assert not cache.is_input_current(
+            tmp_path, manifest, path.name, {"grid": "a"}
+        )
+
+    def test_missing_input_is_not_recorded(self, tmp_path: Path) -> None:
+        """Test that recording a missing file drops its entry."""
+        manifest = {"porosity.txt": {"sources": {}, "mtime_ns": 0}}
+        cache.record_inputs(tmp_path, manifest, {"porosity.txt": {}})
+
+        assert cache.read_input_manifest(tmp_path) == {}
+
+
+class TestIsRunComplete:
+    def _write_outputs(self, cfg: config.Config, swash_dir: Path) -> None:
+        for file in cache.expected_outputs(cfg):
+            (swash_dir / file).write_text("output")
+
+    def test_complete_run(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that a successful run with every output is complete."""
+        self._write_outputs(cfg, tmp_path)
+        cache.record_run(cfg, tmp_path, run_key="key", success=True)
+
+        assert cache.is_run_complete(cfg, tmp_path, "key")
+
+    def test_expected_outputs(self, cfg: config.Config) -> None:
+        """Test that every gauge has an expected output."""
+        assert cache.expected_outputs(cfg) == [
+            "PRINT",
+            "norm_end",
+            "wg01.txt",
+            "wg02.txt",
+        ]
+
+    def test_different_key(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that a run with another key isn't complete."""
+        self._write_outputs(cfg, tmp_path)
+        cache.record_run(cfg, tmp_path, run_key="key", success=True)
+
+        assert not cache.is_run_complete(cfg, tmp_path, "other")
+
+    def test_failed_run(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that a failed run isn't complete."""
+        self._write_outputs(cfg, tmp_path)
+        cache.record_run(cfg, tmp_path, run_key="key", success=False)
+
+        assert not cache.is_run_complete(cfg, tmp_path, "key")
+
+    def test_missing_output(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that a run missing norm_end isn't complete."""
+        self._write_outputs(cfg, tmp_path)
+        (tmp_path / "norm_end").unlink()
+        cache.record_run(cfg, tmp_path, run_key="key", success=True)
+
+        assert not cache.is_run_complete(cfg, tmp_path, "key")
+
+    def test_truncated_run(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that a run stopped once converged doesn't need norm_end."""
+        self._write_outputs(cfg, tmp_path)
+        (tmp_path / "norm_end").unlink()
+        cache.update_manifest(tmp_path, {"truncation": {"n_samples": 10}})
+        cache.record_run(cfg, tmp_path, run_key="key", success=True)
+
+        assert cache.is_run_complete(cfg, tmp_path, "key")
+        assert "norm_end" not in cache.read_manifest(tmp_path)["outputs"]
+
+
+class TestAnalysisCache:
+    def _analyze(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Write every analysis product and record it."""
+        analysis_dir = tmp_path / "analysis"
+        analysis_dir.mkdir(exist_ok=True)
+        for files in cache.ANALYSIS_PRODUCTS.values():
+            for file in files:
+                (analysis_dir / file).write_text("analysis")
+        cache.record_analysis(
+            analysis_dir,
+            cache.read_analysis_manifest(analysis_dir),
+            cache.analysis_inputs(cfg, tmp_path),
+        )
+
+    def _stale(self, cfg: config.Config, tmp_path: Path) -> list[str]:
+        analysis_dir = tmp_path / "analysis"
+        return cache.stale_analysis_products(
+            analysis_dir,
+            cache.read_analysis_manifest(analysis_dir),
+            cache.analysis_inputs(cfg, tmp_path),
+        )
+
+    @pytest.fixture
+    def swash_dir(self, cfg: config.Config, tmp_path: Path) -> Path:
+        swash_dir = tmp_path / "swash"
+        swash_dir.mkdir()
+        (swash_dir / "INPUT").write_text("INPUT")
+        for file in cache.expected_outputs(cfg):
+            (swash_dir / file).write_text(f"output {file}")
+        return swash_dir
+
+    def test_no_manifest(self, cfg: config.Config, tmp_path: Path) -> None:
+        """Test that there is nothing up to date without an analysis."""
+        assert not cache.is_analysis_complete(tmp_path, cfg)
+        assert self._stale(cfg, tmp_path) == list(cache.ANALYSIS_PRODUCTS)
+
+    def test_recorded_analysis(
+        self, cfg: config.Config, tmp_path: Path, swash_dir: Path
+    ) -> None:
+        """Test that recorded products with the same inputs are up to date."""
+        self._analyze(cfg, tmp_path)
+
+        assert cache.is_analysis_complete(tmp_path, cfg)
+
+    def test_new_gauge_outputs(
+        self, cfg: config.Config, tmp_path: Path, swash_dir: Path
+    ) -> None:
+        """Test that new gauge outputs only invalidate the gauge products."""
+        self._analyze(cfg, tmp_path)
+        (swash_dir / "wg02.txt").write_text("new output")
+
+        assert self._stale(cfg, tmp_path) == ["wave_statistics", "time_series"]
+
+    def test_new_geometry(
+        self, cfg: config.Config, tmp_path: Path, swash_dir: Path
+    ) -> None:
+        """Test that the geometry only invalidates the dependent products."""
+        self._analyze(cfg, tmp_path)
+        other = config.Config(
+            name=cfg.name,
+            numeric=cfg.numeric,
+            breakwater=config.BreakwaterConfig(crest_height=1.5),
+        )
+
+        assert self._stale(other, tmp_path) == ["time_series", "diagram"]
+
+    def test_renamed_config(
+        self, cfg: config.Config, tmp_path: Path, swash_dir: Path
+    ) -> None:
+        """Test that the name of the configuration doesn't matter."""
+        self._analyze(cfg, tmp_path)
+        other = config.Config(name="other", numeric=cfg.numeric)
+
+        assert cache.is_analysis_complete(tmp_path, other)
+
+    def test_new_analysis_version(
+        self,
+        cfg: config.Config,
+        tmp_path: Path,
+        swash_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a change of the analysis code invalidates everything."""
+        self._analyze(cfg, tmp_path)
+        monkeypatch.setattr(cache, "analysis_version", lambda: "other")
+
+        assert self._stale(cfg, tmp_path) == list(cache.ANALYSIS_PRODUCTS)
+
+    def test_missing_product(
+        self, cfg: config.Config, tmp_path: Path, swash_dir: Path
+    ) -> None:
+        """Test that a deleted product file makes its product stale."""
+        self._analyze(cfg, tmp_path)
+        (tmp_path / "analysis" / "swash_diagram.json").unlink()
+
+        assert self._stale(cfg, tmp_path) == ["diagram"]
+
+    def test_analysis_version_is_stable(self) -> None:
+        """Test that the analysis version is a digest of its sources."""
+        assert cache.analysis_version() == cache.analysis_version()
+        assert len(cache.analysis_version()) == 16
+
+
+class TestPublishRun:
+    def _run_dir(self, tmp_path: Path, content: str) -> Path:
+        run_dir = tmp_path / "scratch" / content
+        run_dir.mkdir(parents=True)
+        (run_dir / "PRINT").write_text(content)
+        return run_dir
+
+    def test_publish_replaces_results(self, tmp_path: Path) -> None:
+        """Test that published outputs replace the previous ones at once."""
+        result_dir = tmp_path / "result"
+        swash_dir = result_dir / "swash"
+        swash_dir.mkdir(parents=True)
+        (swash_dir / "PRINT").write_text("in place")
+
+        cache.publish_run(self._run_dir(tmp_path, "first"), swash_dir)
+        first = swash_dir.resolve()
+        cache.publish_run(self._run_dir(tmp_path, "second"), swash_dir)
+
+        assert swash_dir.is_symlink()
+        assert (swash_dir / "PRINT").read_text() == "second"
+        assert not first.exists()
+        assert sorted(path.name for path in result_dir.iterdir()) == sorted(
+            [swash_dir.resolve().name, "swash"]
+        )
+        assert list((tmp_path / "scratch" / "second").iterdir()) == []
+
+    def test_stale_publications(self, tmp_path: Path) -> None:
+        """Test finding outputs left behind by an interrupted publication."""
+        result_dir = tmp_path / "result"
+        result_dir.mkdir()
+        cache.publish_run(self._run_dir(tmp_path, "run"), result_dir / "swash")
+        stale = result_dir / f"{cache.PUBLISHED_PREFIX}interrupted"
+        stale.mkdir()
+
+        assert cache.stale_publications(result_dir) == [stale]
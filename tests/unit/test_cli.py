@@ -1,11 +1,11 @@
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 from typer.testing import CliRunner
 
 import pytest
 import typer
 
-from src import cli, config
+from src import batch, cli, config, jobs
 
 
 class TestRunCli:
@@ -186,11 +186,78 @@ class TestRun:
         monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
         
         app = cli._init_cli()
-        result = cli_runner.invoke(app, ["run", str(minimal_config_file), str(full_config_file)])
+        result = cli_runner.invoke(
+            app,
+            ["run", str(minimal_config_file), str(full_config_file), "--jobs", "1"],
+        )
         
         assert result.exit_code == 0
         assert mock_run_simulation.call_count == 2
 
+    def test_run_multiple_simulations_in_parallel(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that several configs with --jobs > 1 go through the batch runner."""
+        mock_run_simulation = Mock()
+        mock_run_batch = Mock()
+        monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
+        monkeypatch.setattr("src.cli.run_batch", mock_run_batch)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app,
+            ["run", str(minimal_config_file), str(full_config_file), "-j", "4"],
+        )
+
+        assert result.exit_code == 0
+        mock_run_simulation.assert_not_called()
+        mock_run_batch.assert_called_once()
+        configs = mock_run_batch.call_args.args[0]
+        assert len(configs) == 2
+        assert mock_run_batch.call_args.kwargs["jobs"] == 4
+
+    def test_run_with_force(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that --force is passed down to the simulation."""
+        mock_run_simulation = Mock()
+        monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["run", str(minimal_config_file), "--force"]
+        )
+
+        assert result.exit_code == 0
+        assert mock_run_simulation.call_args.kwargs["force"] is True
+
+    def test_run_jobs_defaults_to_physical_cores(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that --jobs defaults to the number of physical cores."""
+        mock_run_batch = Mock()
+        monkeypatch.setattr("src.cli.run_batch", mock_run_batch)
+        monkeypatch.setattr("src.cli.physical_cores", Mock(return_value=8))
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["run", str(minimal_config_file), str(full_config_file)]
+        )
+
+        assert result.exit_code == 0
+        assert mock_run_batch.call_args.kwargs["jobs"] == 8
+
     def test_run_with_short_alias(
         self,
         cli_runner: CliRunner,
@@ -339,6 +406,77 @@ class TestClean:
         assert not orphaned_dir1.exists()
         assert not orphaned_dir2.exists()
 
+    def test_clean_store(
+        self,
+        cli_runner: CliRunner,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test clean with links to stored results."""
+        config_dir = tmp_path / "config"
+        simulations_dir = tmp_path / "simulations"
+        config_dir.mkdir()
+        simulations_dir.mkdir()
+
+        cfg = config.Config(name="test")
+        config.write_config(cfg, config_dir / "test.yml")
+        cfg = config.read_config(config_dir / "test.yml")
+        orphan = config.Config(name="old", water=config.WaterConfig(wave_height=0.1))
+
+        from src.cache import link_simulation_dir
+
+        kept = link_simulation_dir(cfg, simulations_dir)
+        removed = link_simulation_dir(orphan, simulations_dir)
+
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["clean", "--force"])
+
+        assert result.exit_code == 0
+        # the orphaned link and the results only it pointed to
+        assert "Found 2 orphaned simulation directories" in result.output
+        assert kept.exists()
+        assert not removed.is_symlink()
+        assert not (simulations_dir / ".store" / orphan.physics_hash).exists()
+        assert (simulations_dir / ".store" / cfg.physics_hash).exists()
+
+    def test_clean_keeps_used_spinups(
+        self,
+        cli_runner: CliRunner,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that clean only removes spin-ups no config hot-starts from."""
+        config_dir = tmp_path / "config"
+        simulations_dir = tmp_path / "simulations"
+        config_dir.mkdir()
+        (simulations_dir / ".store").mkdir(parents=True)
+
+        cfg = config.Config(
+            name="test", numeric=config.NumericConfig(hotstart=True)
+        )
+        config.write_config(cfg, config_dir / "test.yml")
+        cfg = config.read_config(config_dir / "test.yml")
+
+        from src.cache import link_simulation_dir, spinup_dir
+        from src.simulation import spinup_config
+
+        link_simulation_dir(cfg, simulations_dir)
+        used = spinup_dir(spinup_config(cfg), simulations_dir)
+        used.mkdir()
+        unused = simulations_dir / ".store" / "spinup_0123456789abcdef"
+        unused.mkdir()
+
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["clean", "--force"])
+
+        assert result.exit_code == 0
+        assert used.exists()
+        assert not unused.exists()
+
     def test_clean_with_invalid_dir_name(
         self,
         cli_runner: CliRunner,
@@ -462,6 +600,74 @@ class TestAnalyze:
         assert "Analysis complete" in result.output
         mock_analyze.assert_called_once()
 
+    def test_analyze_force(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that --force recomputes every analysis product."""
+        # Set up temporary environment
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+
+        # Read the config to get the correct hash
+        cfg = config.read_config(minimal_config_file)
+        # Create the simulation directory with the correct hash
+        simulations_dir = tmp_path / "simulations"
+        sim_dir = simulations_dir / f"{cfg.name}_{cfg.hash}"
+        sim_dir.mkdir(parents=True, exist_ok=True)
+        (sim_dir / "swash").mkdir(exist_ok=True)
+
+        # Mock analyze_simulation function
+        mock_analyze = Mock(return_value={"plot_file": "test_plot.png"})
+        with patch.dict('sys.modules', {'src.analysis': Mock(analyze_simulation=mock_analyze)}):
+            app = cli._init_cli()
+            result = cli_runner.invoke(app, ["analyze", str(minimal_config_file), "--force"])
+
+        assert result.exit_code == 0
+        assert "Analysis complete" in result.output
+        assert mock_analyze.call_args.kwargs["force"] is True
+
+    def test_analyze_parallel(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that several simulations are analyzed by a pool, with a summary."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        mock_batch = Mock(
+            return_value=[
+                batch.AnalyzedRun("minimal", "analyzed", tmp_path, "diagram"),
+                batch.AnalyzedRun("full", "failed", tmp_path, "no results"),
+            ]
+        )
+        monkeypatch.setattr("src.cli.analyze_batch", mock_batch)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app,
+            [
+                "analyze",
+                str(minimal_config_file),
+                str(full_config_file),
+                "-j",
+                "2",
+                "--no-images",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert mock_batch.call_args.kwargs["jobs"] == 2
+        assert mock_batch.call_args.kwargs["exporter"] is None
+        lines = result.stdout.strip().splitlines()
+        assert lines[-3].split() == ["name", "state", "details"]
+        assert lines[-2].split() == ["minimal", "analyzed", "diagram"]
+        assert lines[-1].split() == ["full", "failed", "no", "results"]
+
     def test_analyze_simulation_not_found(
         self,
         cli_runner: CliRunner,
@@ -582,6 +788,110 @@ class TestAnalyze:
         assert result.exit_code == 0
 
 
+class TestQueue:
+    @pytest.fixture
+    def queue(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> jobs.JobQueue:
+        queue = jobs.JobQueue(tmp_path / jobs.QUEUE_FILE)
+        monkeypatch.setattr("src.cli.get_queue", lambda: queue)
+        return queue
+
+    def test_queue_add(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        queue: jobs.JobQueue,
+    ) -> None:
+        """Test adding configs to the queue, only once each."""
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["queue", "add", str(minimal_config_file), str(full_config_file)]
+        )
+        assert result.exit_code == 0
+        assert "Added 2 simulations" in result.stdout
+
+        result = cli_runner.invoke(app, ["q", "add", str(minimal_config_file)])
+        assert result.exit_code == 0
+        assert "already queued" in result.stdout
+        assert len(queue.jobs()) == 2
+
+    def test_queue_ls(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        queue: jobs.JobQueue,
+    ) -> None:
+        """Test listing the jobs of the queue."""
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["queue", "ls"])
+        assert "No simulations in the queue" in result.stdout
+
+        cfg = config.read_config(minimal_config_file)
+        queue.add(cfg, minimal_config_file)
+        queue.finish(queue.claim("worker"), success=False, exit_code=4, error="boom")
+
+        result = cli_runner.invoke(app, ["queue", "ls"])
+        assert result.exit_code == 0
+        assert cfg.name in result.stdout
+        assert "failed" in result.stdout
+        assert "boom" in result.stdout
+        assert "0 queued, 0 running, 0 done, 1 failed" in result.stdout
+
+        result = cli_runner.invoke(app, ["queue", "ls", "--state", "done"])
+        assert "No simulations in the queue" in result.stdout
+
+    def test_queue_ls_unknown_state(
+        self, cli_runner: CliRunner, queue: jobs.JobQueue
+    ) -> None:
+        """Test listing with an invalid state."""
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["queue", "ls", "--state", "lost"])
+        assert result.exit_code == 1
+
+    def test_queue_resume(
+        self,
+        cli_runner: CliRunner,
+        queue: jobs.JobQueue,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that resuming drains the queue with a worker."""
+        mock_run_worker = Mock(return_value={})
+        monkeypatch.setattr("src.cli.run_worker", mock_run_worker)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["queue", "resume", "--jobs", "3", "--no-images"]
+        )
+
+        assert result.exit_code == 0
+        mock_run_worker.assert_called_once_with(
+            queue,
+            jobs=3,
+            force=False,
+            scratch=None,
+            compression="none",
+            exporter=None,
+        )
+
+    def test_queue_retry(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        queue: jobs.JobQueue,
+    ) -> None:
+        """Test that failed jobs are queued again."""
+        cfg = config.read_config(minimal_config_file)
+        queue.add(cfg, minimal_config_file)
+        queue.finish(queue.claim("worker"), success=False)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["queue", "retry"])
+
+        assert result.exit_code == 0
+        assert "Queued 1 failed simulations again" in result.stdout
+        assert queue.jobs()[0].state == "queued"
+
+
 class TestExpandPaths:
     def test_expand_paths_single_file(self, tmp_config_dir: Path) -> None:
         """Test expanding a single file path."""
@@ -684,4 +994,220 @@ class TestExpandPaths:
         """Test expanding nonexistent file path."""
         nonexistent = Path("/nonexistent/file.yml")
         result = cli._expand_paths([str(nonexistent)])
-        assert result == [nonexistent]  # Should include even if doesn't exist
\ No newline at end of file
+        assert result == [nonexistent]  # Should include even if doesn't exist
+
+class TestPrepare:
+    def test_prepare(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test generating the inputs of several configs."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        monkeypatch.setattr("src.batch.root_dir", tmp_path)
+        (tmp_path / "templates").mkdir()
+        (tmp_path / "templates" / "INPUT").write_text(
+            (Path(__file__).parents[2] / "templates" / "INPUT").read_text()
+        )
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app,
+            ["prepare", str(minimal_config_file), str(full_config_file), "-j", "1"],
+        )
+
+        assert result.exit_code == 0
+        lines = result.stdout.strip().splitlines()
+        assert lines[-3].split() == ["name", "state", "swash", "spin-up"]
+        for line in lines[-2:]:
+            name, state, swash_dir = line.split()[:3]
+            assert state == "prepared"
+            assert swash_dir.startswith("simulations/")
+            assert (tmp_path / swash_dir / "INPUT").exists()
+
+    def test_prepare_without_configs(
+        self, cli_runner: CliRunner, tmp_path: Path
+    ) -> None:
+        """Test that an empty selection is refused."""
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["p", str(tmp_path)])
+
+        assert result.exit_code == 1
+
+
+class TestExport:
+    def _analysis_dir(self, config_file: Path, tmp_path: Path) -> Path:
+        cfg = config.read_config(config_file)
+        analysis_dir = (
+            tmp_path / "simulations" / f"{cfg.name}_{cfg.hash}" / "analysis"
+        )
+        analysis_dir.mkdir(parents=True)
+        return analysis_dir
+
+    def test_export(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that the figures without an image are exported."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        analysis_dir = self._analysis_dir(minimal_config_file, tmp_path)
+        (analysis_dir / "swash_diagram.json").write_text("{}")
+        exporter = MagicMock(exported=[], failed=[])
+        exporter.__enter__.return_value = exporter
+        mock_exporter = Mock(return_value=exporter)
+        monkeypatch.setattr("src.cli.ImageExporter", mock_exporter)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["export", str(minimal_config_file), "-j", "2"]
+        )
+
+        assert result.exit_code == 0
+        mock_exporter.assert_called_once_with(workers=2)
+        exporter.submit.assert_called_once_with(
+            [analysis_dir / "swash_diagram.json"]
+        )
+
+    def test_export_up_to_date(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that up to date images are only exported with --force."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        analysis_dir = self._analysis_dir(minimal_config_file, tmp_path)
+        (analysis_dir / "swash_diagram.json").write_text("{}")
+        (analysis_dir / "swash_diagram.png").write_bytes(b"png")
+        mock_exporter = MagicMock()
+        monkeypatch.setattr("src.cli.ImageExporter", mock_exporter)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(app, ["export", str(minimal_config_file)])
+
+        assert result.exit_code == 0
+        assert "up to date" in result.output
+        mock_exporter.assert_not_called()
+
+        result = cli_runner.invoke(
+            app, ["export", str(minimal_config_file), "--force"]
+        )
+        mock_exporter.assert_called_once_with(workers=1)
+
+
+class TestEstimate:
+    def test_estimate(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        full_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test estimating the cost of a batch without recorded runs."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app,
+            ["estimate", str(minimal_config_file), str(full_config_file), "-j", "2"],
+        )
+
+        assert result.exit_code == 0
+        assert "core-hours" in result.stdout
+        assert "with 2 parallel jobs" in result.stdout
+        assert "no recorded runs yet" in result.stdout
+
+    def test_estimate_invalid_policy(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that an unknown policy is refused."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["e", str(minimal_config_file), "--policy", "random"]
+        )
+
+        assert result.exit_code == 1
+
+    def test_run_budget_requires_budget(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that the budget policy needs a budget to run."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        mock_run_simulation = Mock()
+        monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["run", str(minimal_config_file), "--policy", "budget"]
+        )
+
+        assert result.exit_code == 1
+        mock_run_simulation.assert_not_called()
+
+    def test_run_budget_requires_budget_policy(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a budget isn't silently ignored by the other policies."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        mock_run_simulation = Mock()
+        monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app, ["run", str(minimal_config_file), "--budget", "10"]
+        )
+
+        assert result.exit_code == 1
+        assert "budget policy" in result.output
+        mock_run_simulation.assert_not_called()
+
+    def test_run_skips_over_budget(
+        self,
+        cli_runner: CliRunner,
+        minimal_config_file: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that runs over the budget are skipped."""
+        monkeypatch.setattr("src.cli.root_dir", tmp_path)
+        mock_run_simulation = Mock()
+        monkeypatch.setattr("src.cli.run_simulation", mock_run_simulation)
+
+        app = cli._init_cli()
+        result = cli_runner.invoke(
+            app,
+            [
+                "run",
+                str(minimal_config_file),
+                "--policy",
+                "budget",
+                "--budget",
+                "0",
+            ],
+        )
+
+        assert result.exit_code == 0
+        assert "over the budget" in result.output
+        mock_run_simulation.assert_not_called()
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from src import compression
+
+
+@pytest.fixture
+def output(tmp_path: Path) -> Path:
+    path = tmp_path / "wg01.txt"
+    path.write_text("".join(f"{i * 0.01:.3f} 0.000\n" for i in range(1000)))
+    return path
+
+
+class TestCompressFile:
+    def test_gzip_round_trip(self, output: Path) -> None:
+        """Test that compressed outputs are read back transparently."""
+        content = output.read_bytes()
+
+        compressed = compression.compress_file(output, "gzip")
+
+        assert compressed.name == "wg01.txt.gz"
+        assert not output.exists()
+        assert compressed.stat().st_size < len(content)
+        assert compression.find_output(output) == compressed
+        assert compression.output_exists(output)
+        assert compression.read_output(output) == content
+        with compression.open_output(output, "r") as f:
+            assert f.readline() == "0.000 0.000\n"
+
+    def test_zstd_round_trip(self, output: Path) -> None:
+        """Test compressing with zstd."""
+        pytest.importorskip("zstandard")
+        content = output.read_bytes()
+
+        compressed = compression.compress_file(output, "zstd")
+
+        assert compressed.name == "wg01.txt.zst"
+        assert compression.read_output(output) == content
+
+    def test_none(self, output: Path) -> None:
+        """Test that nothing is done without compression."""
+        assert compression.compress_file(output, "none") == output
+        assert compression.read_output(output) == output.read_bytes()
+
+    def test_replaces_other_variants(self, output: Path) -> None:
+        """Test that a stale compressed variant never shadows new content."""
+        compression.compress_file(output, "gzip")
+        output.write_text("new\n")
+
+        compression.compress_file(output, "gzip")
+
+        assert compression.read_output(output) == b"new\n"
+        assert sorted(p.name for p in output.parent.iterdir()) == [
+            "wg01.txt.gz"
+        ]
+
+
+class TestOutputs:
+    def test_remove_output(self, output: Path) -> None:
+        """Test removing every variant of an output."""
+        compression.compress_file(output, "gzip")
+        output.write_text("plain\n")
+
+        compression.remove_output(output)
+
+        assert not compression.output_exists(output)
+
+    def test_missing_output(self, tmp_path: Path) -> None:
+        """Test that a missing output can't be opened."""
+        assert compression.find_output(tmp_path / "PRINT") is None
+        with pytest.raises(FileNotFoundError):
+            compression.open_output(tmp_path / "PRINT")
+
+
+class TestCheckCompression:
+    def test_check_compression(self) -> None:
+        """Test that unknown compressions are refused."""
+        compression.check_compression("gzip")
+        compression.check_compression("none")
+        with pytest.raises(ValueError, match="Unknown compression"):
+            compression.check_compression("bz2")
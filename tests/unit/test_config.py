@@ -4,7 +4,7 @@ import pytest
 import ruamel.yaml
 from pydantic import ValidationError
 
-from src import config
+from src import config, utils
 
 
 class TestComputationalGridConfig:
@@ -93,6 +93,33 @@ class TestBreakwaterConfig:
         assert breakwater.breakwater_start_position == 60.0
 
 
+class TestBathymetryConfig:
+    def test_default_values(self) -> None:
+        """Test that the default bed is the flat floor of the flume."""
+        bathymetry = config.BathymetryConfig()
+        assert bathymetry.segments == []
+        assert bathymetry.survey is None
+        assert bathymetry.structures == []
+        assert bathymetry.flat
+
+    def test_survey_hash(self, tmp_path: Path) -> None:
+        """Test that the survey content is part of the hash."""
+        survey = tmp_path / "survey.csv"
+        survey.write_text("x,z\n0,0\n10,1\n")
+        a = config.BathymetryConfig(survey=str(survey))
+        survey.write_text("x,z\n0,0\n10,2\n")
+        b = config.BathymetryConfig(survey=str(survey))
+
+        assert not a.flat
+        assert a.survey_hash and a.survey_hash != b.survey_hash
+        assert a.hash != b.hash
+
+    def test_missing_survey(self, tmp_path: Path) -> None:
+        """Test that a missing survey file is refused."""
+        with pytest.raises(ValidationError, match="doesn't exist"):
+            config.BathymetryConfig(survey=str(tmp_path / "missing.csv"))
+
+
 class TestVegetationType:
     def test_default_values(self) -> None:
         """Test default values for vegetation type."""
@@ -229,6 +256,42 @@ class TestConfig:
         cfg.water.wave_period = 10.0
         assert cfg.simulation_duration == 1000.0
 
+    def test_spinup_duration(self) -> None:
+        """Test the spin-up lasts whole periods before waves reach the breakwater."""
+        cfg = config.Config(
+            name="test", numeric=config.NumericConfig(hotstart=True)
+        )
+        celerity = (
+            9.81 * (cfg.water.water_level + cfg.water.wave_height)
+        ) ** 0.5
+        travel_time = cfg.breakwater.breakwater_start_position / celerity
+
+        assert cfg.spinup_duration > 0
+        assert cfg.spinup_duration % cfg.water.wave_period == 0
+        assert cfg.spinup_duration <= travel_time
+        assert cfg.spinup_duration + cfg.water.wave_period > travel_time
+
+    def test_spinup_duration_without_hotstart(self) -> None:
+        """Test that there is no spin-up without hotstart or breakwater."""
+        assert config.Config(name="test").spinup_duration == 0
+        cfg = config.Config(
+            name="test",
+            breakwater=config.BreakwaterConfig(enable=False),
+            numeric=config.NumericConfig(hotstart=True),
+        )
+        assert cfg.spinup_duration == 0
+
+    def test_spinup_duration_without_flat_bed(self) -> None:
+        """Test that there is no spin-up over a bed that isn't flat."""
+        cfg = config.Config(
+            name="test",
+            bathymetry=config.BathymetryConfig(
+                segments=[config.BedSegment(length=50.0, slope=0.01)]
+            ),
+            numeric=config.NumericConfig(hotstart=True),
+        )
+        assert cfg.spinup_duration == 0
+
     def test_breakwater_end_position_enabled(self) -> None:
         """Test breakwater end position calculation when enabled."""
         cfg = config.Config(name="test")
@@ -261,6 +324,117 @@ class TestConfig:
         assert len(cfg.vegetation.hash) == 8
         assert len(cfg.numeric.hash) == 8
 
+    def test_hash_ignores_added_defaults(self) -> None:
+        """Test that sections and fields added since keep the hashes."""
+        cfg = config.Config(name="test")
+        dump = cfg.model_dump()
+        del dump["bathymetry"]
+        for field in (
+            "hotstart",
+            "convergence_tolerance",
+            "convergence_waves",
+            "input_format",
+        ):
+            del dump["numeric"][field]
+
+        assert cfg.hash == utils.validators._hash_config(dump)
+
+        changed = config.Config(
+            name="test", numeric=config.NumericConfig(hotstart=True)
+        )
+        assert changed.hash != cfg.hash
+        assert changed.numeric.hash != cfg.numeric.hash
+
+    def test_hash_of_committed_configs(self) -> None:
+        """Test that the configs keep the hash of their simulations."""
+        for name, hash_ in (
+            ("dev", "d43a0bde"),
+            ("model001", "c610e7bc"),
+            ("model001_with_breakwater", "9accb0b1"),
+        ):
+            path = utils.paths.root_dir / "config" / f"{name}.yml"
+            assert config.read_config(path).hash == hash_
+
+    def test_physics_hash_ignores_name(self) -> None:
+        """Test that configs differing only by name share the physics hash."""
+        a = config.Config(name="a")
+        b = config.Config(name="b")
+        assert a.hash != b.hash
+        assert a.physics_hash == b.physics_hash
+        assert len(a.physics_hash) == 16
+
+    def test_physics_hash_depends_on_physics(self) -> None:
+        """Test that a physical parameter changes the physics hash."""
+        a = config.Config(name="a")
+        b = config.Config(name="a", water=config.WaterConfig(wave_height=0.2))
+        assert a.physics_hash != b.physics_hash
+
+    def test_physics_hash_ignores_disabled_sections(self) -> None:
+        """Test that parameters of disabled sections don't matter."""
+        a = config.Config(
+            name="a",
+            breakwater=config.BreakwaterConfig(enable=False, porosity=0.3),
+            vegetation=config.VegetationConfig(enable=True),
+        )
+        b = config.Config(
+            name="b",
+            breakwater=config.BreakwaterConfig(enable=False, porosity=0.5),
+        )
+        assert a.physics_hash == b.physics_hash
+
+    def test_physics_hash_depends_on_bathymetry(self) -> None:
+        """Test that the bed profile only changes the hash when it isn't flat."""
+        a = config.Config(name="a")
+        b = config.Config(
+            name="a", bathymetry=config.BathymetryConfig(segments=[])
+        )
+        c = config.Config(
+            name="a",
+            bathymetry=config.BathymetryConfig(
+                segments=[config.BedSegment(length=10.0, slope=0.1)]
+            ),
+        )
+        assert a.physics_hash == b.physics_hash
+        assert a.physics_hash != c.physics_hash
+
+    def test_physics_hash_ignores_unused_convergence(self) -> None:
+        """Test that the convergence waves only matter with a tolerance."""
+        a = config.Config(name="a")
+        b = config.Config(
+            name="a", numeric=config.NumericConfig(convergence_waves=3)
+        )
+        c = config.Config(
+            name="a",
+            numeric=config.NumericConfig(
+                convergence_tolerance=0.01, convergence_waves=3
+            ),
+        )
+        assert a.physics_hash == b.physics_hash
+        assert b.physics_hash != c.physics_hash
+
+    def test_physics_hash_ignores_input_format(self) -> None:
+        """Test that the format of the grid files doesn't change the hash."""
+        a = config.Config(name="a")
+        b = config.Config(
+            name="a", numeric=config.NumericConfig(input_format="unformatted")
+        )
+        assert a.numeric.hash != b.numeric.hash
+        assert a.physics_hash == b.physics_hash
+
+    def test_physics_hash_ignores_unused_distribution(self) -> None:
+        """Test that the distribution is ignored with a single vegetation type."""
+        a = config.Config(
+            name="a",
+            vegetation=config.VegetationConfig(enable=True, type_fraction=0.2),
+        )
+        b = config.Config(
+            name="a",
+            vegetation=config.VegetationConfig(
+                enable=True, distribution="alternating"
+            ),
+        )
+        assert a.physics_hash == b.physics_hash
+
 
 class TestReadConfig:
     def test_read_valid_config(self, config_file: Path) -> None:
@@ -0,0 +1,163 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src import convergence
+
+
+def _table(water_levels: np.ndarray) -> bytes:
+    """Gauge output lines as written by SWASH."""
+    return b"".join(
+        f"  {level:.6f}  0.000000  0.000000\n".encode()
+        for level in water_levels
+    )
+
+
+def _waves(
+    n_waves: int, amplitude: float = 0.05, period: float = 6.0
+) -> np.ndarray:
+    t = np.arange(0, n_waves * period, 0.1)
+    return 0.5 + amplitude * np.sin(2 * np.pi * t / period)
+
+
+class TestGaugeConvergence:
+    def test_steady_waves_converge(self) -> None:
+        """Test that steady waves converge after enough waves."""
+        gauge = convergence.GaugeConvergence(0.1, tolerance=0.01, n_waves=5)
+
+        gauge.feed(_table(_waves(4)))
+        assert not gauge.converged
+
+        gauge.feed(_table(_waves(10)))
+        assert gauge.converged
+        h_sig, t_mean = gauge.estimate
+        assert pytest.approx(h_sig, rel=0.05) == 0.1
+        assert pytest.approx(t_mean, rel=0.05) == 6.0
+
+    def test_growing_waves_dont_converge(self) -> None:
+        """Test that waves whose height keeps changing never converge."""
+        gauge = convergence.GaugeConvergence(0.1, tolerance=0.01, n_waves=5)
+        t = np.arange(0, 120, 0.1)
+
+        gauge.feed(_table(0.5 + 0.001 * t * np.sin(2 * np.pi * t / 6)))
+
+        assert not gauge.converged
+
+    def test_partial_lines_are_kept(self) -> None:
+        """Test that lines split between reads are parsed once complete."""
+        gauge = convergence.GaugeConvergence(0.1, tolerance=0.01, n_waves=5)
+        data = _table(_waves(2))
+
+        gauge.feed(data[:25])
+        gauge.feed(data[25:])
+
+        assert gauge.n_samples == 120
+
+    def test_estimates_match_batch_statistics(self) -> None:
+        """Test that the running estimates are the statistics of every wave."""
+        gauge = convergence.GaugeConvergence(0.1, tolerance=0.01, n_waves=5)
+        rng = np.random.default_rng(0)
+        t = np.arange(0, 120, 0.1)
+
+        gauge.feed(_table(0.5 + 0.1 * np.sin(t) + 0.01 * rng.random(len(t))))
+
+        stats = gauge.estimator.statistics()
+        assert gauge.estimate == (
+            pytest.approx(stats["significant_wave_height"]),
+            pytest.approx(stats["mean_period"]),
+        )
+
+
+class TestConvergenceMonitor:
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_monitor_detects_convergence(
+        self, tmp_path: Path, use_inotify: bool
+    ) -> None:
+        """Test that convergence is detected while gauge outputs are written."""
+        monitor = convergence.ConvergenceMonitor(
+            tmp_path,
+            n_gauges=2,
+            timestep=0.1,
+            start_time=0.0,
+            tolerance=0.01,
+            n_waves=5,
+            poll_interval=0.05,
+            use_inotify=use_inotify,
+        )
+        callback = Mock()
+        monitor.on_converged(callback)
+        stop = threading.Event()
+
+        def write() -> None:
+            data = _table(_waves(200))
+            files = [open(tmp_path / f"wg0{i}.txt", "wb") for i in (1, 2)]
+            for start in range(0, len(data), 4096):
+                if stop.is_set():
+                    break
+                for f in files:
+                    f.write(data[start : start + 4096])
+                    f.flush()
+                time.sleep(0.005)
+            for f in files:
+                f.close()
+
+        with monitor:
+            writer = threading.Thread(target=write)
+            writer.start()
+            deadline = time.monotonic() + 10
+            while monitor.result is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            stop.set()
+            writer.join()
+
+        result = monitor.result
+        assert result is not None
+        callback.assert_called_once_with(result)
+        assert result.n_samples < 200 * 60
+        assert result.simulation_time == pytest.approx(
+            (result.n_samples - 1) * 0.1
+        )
+        assert len(result.significant_wave_heights) == 2
+        assert result.to_dict()["tolerance"] == 0.01
+
+    def test_stop_after_convergence_doesnt_wake(self, tmp_path: Path) -> None:
+        """Test that stopping a monitor whose thread ended skips the wake."""
+        for i in (1, 2):
+            (tmp_path / f"wg0{i}.txt").write_bytes(_table(_waves(20)))
+        monitor = convergence.ConvergenceMonitor(
+            tmp_path,
+            n_gauges=2,
+            timestep=0.1,
+            start_time=0.0,
+            tolerance=0.01,
+            n_waves=5,
+            poll_interval=0.01,
+            use_inotify=False,
+        )
+        monitor.start()
+        monitor._thread.join(timeout=10)
+        wake = Mock()
+        monitor._watcher.wake = wake
+
+        monitor.stop()
+
+        assert monitor.result is not None
+        wake.assert_not_called()
+
+
+class TestTruncateOutputs:
+    def test_truncate_outputs(self, tmp_path: Path) -> None:
+        """Test that every gauge output is cut to the same complete lines."""
+        (tmp_path / "wg01.txt").write_bytes(_table(np.arange(10)))
+        (tmp_path / "wg02.txt").write_bytes(_table(np.arange(12)) + b"  1.0")
+
+        convergence.truncate_outputs(tmp_path, n_gauges=2, n_samples=8)
+
+        for file in ("wg01.txt", "wg02.txt"):
+            lines = (tmp_path / file).read_bytes().splitlines()
+            assert len(lines) == 8
+            assert float(lines[-1].split()[0]) == 7.0
@@ -0,0 +1,203 @@
+import math
+from pathlib import Path
+
+import pytest
+
+from src import cache, config, estimate
+
+
+def _config(name: str, n_waves: int = 50, **kwargs) -> config.Config:
+    return config.Config(
+        name=name, numeric=config.NumericConfig(n_waves=n_waves), **kwargs
+    )
+
+
+def _record(
+    cfg: config.Config, simulations_dir: Path, wall_time: float
+) -> None:
+    swash_dir = cache.link_simulation_dir(cfg, simulations_dir) / "swash"
+    swash_dir.mkdir(parents=True, exist_ok=True)
+    cache.update_manifest(
+        swash_dir,
+        {
+            "resources": {
+                "wall_time": wall_time,
+                "simulation_time": cfg.simulation_duration,
+            }
+        },
+    )
+    cache.record_run(cfg, swash_dir, run_key="key", success=True)
+
+
+class TestCostModel:
+    def test_prior_without_records(self) -> None:
+        """Test that the default cost per cell and step is used at first."""
+        cfg = _config("prior")
+        model = estimate.CostModel.fit([])
+
+        cell_steps = (
+            cfg.simulation_duration
+            / cfg.numeric.time_step
+            * cfg.grid.nx_cells
+            * cfg.grid.n_layers
+        )
+        celerity = math.sqrt(
+            9.81 * (cfg.water.water_level + cfg.water.wave_height)
+        )
+        expected = (
+            estimate.DEFAULT_SECONDS_PER_CELL_STEP
+            * cell_steps
+            * celerity
+            / estimate._REFERENCE_CELERITY
+        )
+        assert model.n_runs == 0
+        assert model.predict(cfg) == pytest.approx(expected)
+
+    def test_longer_runs_cost_more(self) -> None:
+        """Test that the prediction grows with the simulated time."""
+        model = estimate.CostModel.fit([])
+        assert model.predict(_config("long", n_waves=100)) > model.predict(
+            _config("short", n_waves=20)
+        )
+
+    def test_fit_follows_records(self) -> None:
+        """Test that the model follows the timings of the machine."""
+        records = [
+            estimate.RunRecord(
+                cfg,
+                0.1 * estimate.CostModel.fit([]).predict(cfg),
+                cfg.simulation_duration,
+            )
+            for cfg in (_config(f"r{n}", n_waves=n) for n in (10, 20, 40, 80))
+        ]
+        model = estimate.CostModel.fit(records * 20)
+
+        cfg = _config("new", n_waves=30)
+        prior = estimate.CostModel.fit([]).predict(cfg)
+        assert model.n_runs == 80
+        assert model.predict(cfg) == pytest.approx(0.1 * prior, rel=0.05)
+
+    def test_ignores_empty_records(self) -> None:
+        """Test that runs without timings are not used."""
+        record = estimate.RunRecord(_config("empty"), 0.0, 100.0)
+        assert estimate.CostModel.fit([record]).n_runs == 0
+
+
+class TestLoadRecords:
+    def test_load_records(self, tmp_path: Path) -> None:
+        """Test reading the timings recorded in the run manifests."""
+        cfg = _config("recorded")
+        _record(cfg, tmp_path, 12.5)
+
+        records = estimate.load_records(tmp_path)
+
+        assert len(records) == 1
+        assert records[0].config.physics_hash == cfg.physics_hash
+        assert records[0].wall_time == 12.5
+        assert records[0].simulated_time == pytest.approx(
+            cfg.simulation_duration
+        )
+
+    def test_skips_runs_without_config(self, tmp_path: Path) -> None:
+        """Test that manifests from before configs were recorded are ignored."""
+        cfg = _config("old")
+        swash_dir = cache.link_simulation_dir(cfg, tmp_path) / "swash"
+        swash_dir.mkdir(parents=True)
+        cache.write_manifest(
+            swash_dir,
+            {"status": "completed", "resources": {"wall_time": 10.0}},
+        )
+
+        assert estimate.load_records(tmp_path) == []
+
+    def test_skips_failed_runs(self, tmp_path: Path) -> None:
+        """Test that failed runs are not used."""
+        cfg = _config("failed")
+        _record(cfg, tmp_path, 5.0)
+        swash_dir = tmp_path / cache.STORE_DIR / cfg.physics_hash / "swash"
+        cache.update_manifest(swash_dir, {"status": "failed"})
+
+        assert estimate.load_records(tmp_path) == []
+
+    def test_missing_store(self, tmp_path: Path) -> None:
+        """Test that no records are found without a store."""
+        assert estimate.load_records(tmp_path) == []
+        assert estimate.fit_cost_model(tmp_path).n_runs == 0
+
+
+class TestSchedule:
+    @pytest.fixture
+    def configs(self) -> list[config.Config]:
+        return [
+            _config("a", n_waves=40),
+            _config("b", n_waves=10),
+            _config("c", n_waves=20),
+        ]
+
+    @pytest.fixture
+    def model(self) -> estimate.CostModel:
+        return estimate.CostModel.fit([])
+
+    def test_name(
+        self, configs: list[config.Config], model: estimate.CostModel
+    ) -> None:
+        """Test that the name policy keeps the order."""
+        scheduled, skipped = estimate.schedule(configs, model)
+        assert [c.name for c in scheduled] == ["a", "b", "c"]
+        assert skipped == []
+
+    def test_shortest_and_longest(
+        self, configs: list[config.Config], model: estimate.CostModel
+    ) -> None:
+        """Test ordering by predicted cost."""
+        scheduled, _ = estimate.schedule(configs, model, policy="shortest")
+        assert [c.name for c in scheduled] == ["b", "c", "a"]
+        scheduled, _ = estimate.schedule(configs, model, policy="longest")
+        assert [c.name for c in scheduled] == ["a", "c", "b"]
+
+    def test_budget(
+        self, configs: list[config.Config], model: estimate.CostModel
+    ) -> None:
+        """Test that only the cheapest runs fitting the budget are kept."""
+        costs = {c.name: model.predict(c) for c in configs}
+        budget = (costs["b"] + costs["c"]) / 3600 * 1.01
+
+        scheduled, skipped = estimate.schedule(
+            configs, model, policy="budget", budget=budget
+        )
+
+        assert [c.name for c in scheduled] == ["c", "b"]
+        assert [c.name for c in skipped] == ["a"]
+
+    def test_budget_counts_shared_runs_once(
+        self, model: estimate.CostModel
+    ) -> None:
+        """Test that configs sharing their physics only cost one run."""
+        configs = [_config("a"), _config("a_copy")]
+        budget = model.predict(configs[0]) / 3600 * 1.01
+
+        scheduled, skipped = estimate.schedule(
+            configs, model, policy="budget", budget=budget
+        )
+
+        assert len(scheduled) == 2
+        assert skipped == []
+
+    def test_invalid(
+        self, configs: list[config.Config], model: estimate.CostModel
+    ) -> None:
+        """Test that unknown policies and misused budgets are refused."""
+        with pytest.raises(ValueError, match="Unknown policy"):
+            estimate.schedule(configs, model, policy="random")  # type: ignore
+        with pytest.raises(ValueError, match="budget"):
+            estimate.schedule(configs, model, policy="budget")
+        with pytest.raises(ValueError, match="budget policy"):
+            estimate.schedule(configs, model, policy="longest", budget=1.0)
+
+
+class TestEstimateMakespan:
+    def test_makespan(self) -> None:
+        """Test packing runs on a pool of workers."""
+        assert estimate.estimate_makespan([3.0, 2.0, 2.0, 1.0], 1) == 8.0
+        assert estimate.estimate_makespan([3.0, 2.0, 2.0, 1.0], 2) == 4.0
+        assert estimate.estimate_makespan([], 4) == 0.0
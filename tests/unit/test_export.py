@@ -0,0 +1,80 @@
+import os
+from pathlib import Path
+
+import plotly.graph_objects as go
+
+from src import export
+
+
+def _write_figure(path: Path) -> Path:
+    go.Figure(go.Scatter(x=[0, 1, 2], y=[0, 1, 0])).write_json(path)
+    return path
+
+
+class TestStaleImages:
+    def test_missing_images(self, tmp_path: Path) -> None:
+        """Test that figures without an image are stale."""
+        figures = [
+            _write_figure(tmp_path / file) for file in export.FIGURE_FILES
+        ]
+
+        assert export.stale_images(tmp_path) == figures
+
+    def test_missing_figures(self, tmp_path: Path) -> None:
+        """Test that there is nothing to export without figures."""
+        assert export.stale_images(tmp_path) == []
+
+    def test_image_older_than_figure(self, tmp_path: Path) -> None:
+        """Test that only figures newer than their image are stale."""
+        figures = [
+            _write_figure(tmp_path / file) for file in export.FIGURE_FILES
+        ]
+        for figure in figures:
+            export.image_path(figure).write_bytes(b"png")
+        past = figures[0].stat().st_mtime - 10
+        os.utime(export.image_path(figures[0]), (past, past))
+
+        assert export.stale_images(tmp_path) == [figures[0]]
+
+
+class TestExportImage:
+    def test_export_image(self, tmp_path: Path) -> None:
+        """Test that a figure is exported to a PNG image next to it."""
+        figure = _write_figure(tmp_path / "swash_diagram.json")
+
+        image = export.export_image(figure)
+
+        assert image == tmp_path / "swash_diagram.png"
+        assert image.read_bytes().startswith(b"\x89PNG")
+        assert not list(tmp_path.glob(".*.tmp"))
+
+
+class TestImageExporter:
+    def test_no_figures(self) -> None:
+        """Test that no renderer is started without figures."""
+        with export.ImageExporter() as exporter:
+            exporter.submit([])
+            assert exporter._executor is None
+
+        assert exporter.exported == []
+
+    def test_exports_in_background(self, tmp_path: Path) -> None:
+        """Test that submitted figures are exported, failures being kept."""
+        figures = [
+            _write_figure(tmp_path / file) for file in export.FIGURE_FILES
+        ]
+        missing = tmp_path / "missing.json"
+
+        with export.ImageExporter() as exporter:
+            exporter.submit(figures)
+            exporter.submit([missing])
+
+        assert sorted(exporter.exported) == sorted(
+            export.image_path(figure) for figure in figures
+        )
+        assert exporter.failed == [missing]
+        assert export.stale_images(tmp_path) == []
+
+    def test_invalid_workers(self) -> None:
+        """Test that there is always at least one renderer."""
+        assert export.ImageExporter(workers=0).workers == 1
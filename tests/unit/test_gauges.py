@@ -0,0 +1,201 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+
+from src import compression, gauges
+
+
+def _table(values: np.ndarray) -> bytes:
+    """Gauge output as SWASH writes it (Fortran E15.8)."""
+    lines = []
+    for row in values:
+        fields = []
+        for value in row:
+            mantissa, exponent = f"{abs(value):.7E}".split("E")
+            exponent = int(exponent) + 1 if value else 0
+            digits = mantissa.replace(".", "")
+            sign = "-" if value < 0 else " "
+            fields.append(f"{sign}0.{digits}E{exponent:+03d}")
+        lines.append(" ".join(fields) + " \n")
+    return "".join(lines).encode()
+
+
+@pytest.fixture
+def values() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    values = rng.normal(0, 1, (500, 3)) * 10.0 ** rng.integers(
+        -30, 3, (500, 3)
+    )
+    values[:, 2] = 0.0
+    values[0] = 0.0
+    return values
+
+
+class TestParseGauge:
+    def test_fixed_width(self, values: np.ndarray) -> None:
+        """Test that SWASH tables parse to the values float gives."""
+        content = _table(values)
+        expected = np.array(content.split(), dtype=float).reshape(-1, 3)
+
+        rows = gauges.parse_gauge(content)
+
+        assert rows.shape == (500, len(gauges.GAUGE_COLUMNS))
+        np.testing.assert_array_equal(rows, expected[:, :2])
+
+    def test_fixed_width_is_used(self, values: np.ndarray) -> None:
+        """Test that SWASH tables don't fall back to splitting."""
+        assert gauges._parse_fixed_width(_table(values)) is not None
+
+    def test_free_format(self) -> None:
+        """Test that other layouts are split on whitespace."""
+        rows = gauges.parse_gauge(b"0.1 0.05 0.0\n-0.25 1e-3 0.0\n")
+        np.testing.assert_array_equal(rows, [[0.1, 0.05], [-0.25, 1e-3]])
+
+    def test_missing_column(self) -> None:
+        """Test that a missing velocity column is filled with NaN."""
+        rows = gauges.parse_gauge(b"0.1\n0.2\n")
+        assert rows.shape == (2, 2)
+        assert np.isnan(rows[:, 1]).all()
+
+    def test_overflowing_value(self, values: np.ndarray) -> None:
+        """Test that numbers overflowing their format can't be parsed."""
+        content = _table(values[:2])
+        content = content.replace(content[:15], b"***************", 1)
+        with pytest.raises(ValueError):
+            gauges.parse_gauge(content)
+
+    def test_empty(self) -> None:
+        """Test that no lines give no rows."""
+        assert gauges.parse_gauge(b"").shape == (0, 2)
+
+
+class TestReadGauges:
+    def test_read_gauges_in_order(
+        self, values: np.ndarray, tmp_path: Path
+    ) -> None:
+        """Test that every output is read, compressed or not."""
+        paths = []
+        for i in range(4):
+            path = tmp_path / f"wg{i + 1:02d}.txt"
+            path.write_bytes(_table(values * (i + 1)))
+            paths.append(path)
+        compression.compress_file(paths[1], "gzip")
+
+        rows = gauges.read_gauges(paths, jobs=3)
+
+        assert len(rows) == 4
+        for i, rows_ in enumerate(rows):
+            np.testing.assert_allclose(rows_, values[:, :2] * (i + 1))
+
+    def test_read_empty_gauge(self, tmp_path: Path) -> None:
+        """Test that an empty output is an error."""
+        path = tmp_path / "wg01.txt"
+        path.write_text("")
+        with pytest.raises(ValueError, match="No data"):
+            gauges.read_gauge(path)
+
+
+class TestGaugeStore:
+    def test_round_trip(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test that the store gives back the rows of every gauge."""
+        rows = [values[:, :2], values[:10, :2] * 2, values[:0, :2]]
+
+        gauges.write_store(
+            tmp_path, rows, positions=[20.0, 60.0, 80.0], timestep=0.1
+        )
+        stored = gauges.read_store(tmp_path, [20.0, 60.0, 80.0])
+
+        assert stored is not None
+        assert [len(rows_) for rows_ in stored] == [500, 10, 0]
+        for rows_, expected in zip(stored, rows):
+            assert rows_.dtype == np.float32
+            np.testing.assert_array_equal(rows_, expected.astype(np.float32))
+
+    def test_store_layout(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test the columns and metadata of the store."""
+        path = gauges.write_store(
+            tmp_path, [values[:, :2]] * 2, positions=[20.0, 60.0], timestep=0.1
+        )
+
+        data = pl.read_parquet(path)
+        assert data.schema == {
+            "sample": pl.Int32,
+            "gauge": pl.Enum(["wg01", "wg02"]),
+            "water_level": pl.Float32,
+            "x_velocity": pl.Float32,
+        }
+        assert data["sample"].max() == 499
+        metadata = pl.read_parquet_metadata(path)
+        assert metadata["positions"] == "[20.0, 60.0]"
+        assert metadata["timestep"] == "0.1"
+
+    def test_other_gauges(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test that a store of other gauges isn't used."""
+        gauges.write_store(
+            tmp_path, [values[:, :2]], positions=[20.0], timestep=0.1
+        )
+        assert gauges.read_store(tmp_path, [30.0]) is None
+        assert gauges.read_store(tmp_path / "missing", [20.0]) is None
+
+    def test_newer_outputs(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test that a store older than the outputs isn't used."""
+        path = gauges.write_store(
+            tmp_path, [values[:, :2]], positions=[20.0], timestep=0.1
+        )
+        output = tmp_path / "wg01.txt"
+        output.write_bytes(_table(values))
+        mtime = path.stat().st_mtime + 1
+        os.utime(output, (mtime, mtime))
+
+        assert gauges.read_store(tmp_path, [20.0]) is None
+
+
+class TestGaugeMatrix:
+    def test_layout(self, values: np.ndarray) -> None:
+        """Test that each column is a time x gauge matrix."""
+        rows = [values[:, :2], 2 * values[:, :2]]
+
+        matrix = gauges.gauge_matrix(rows)
+
+        assert matrix.shape == (2, 500, 2)
+        assert matrix.dtype == np.float32
+        np.testing.assert_array_equal(
+            matrix[0][:, 1], (2 * values[:, 0]).astype(np.float32)
+        )
+        np.testing.assert_array_equal(
+            matrix[1][:, 0], values[:, 1].astype(np.float32)
+        )
+
+    def test_common_samples(self, values: np.ndarray) -> None:
+        """Test that only the samples of every gauge are kept."""
+        matrix = gauges.gauge_matrix([values[:, :2], values[:10, :2]])
+        assert matrix.shape == (2, 10, 2)
+
+    def test_load_matrix(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test that the stored matrix is memory-mapped."""
+        rows = [values[:, :2], 2 * values[:, :2]]
+        gauges.write_store(
+            tmp_path, rows, positions=[20.0, 60.0], timestep=0.1
+        )
+
+        matrix = gauges.load_matrix(tmp_path, [20.0, 60.0])
+
+        assert isinstance(matrix, np.memmap)
+        assert not matrix.flags.writeable
+        np.testing.assert_array_equal(matrix, gauges.gauge_matrix(rows))
+        assert gauges.load_matrix(tmp_path, [20.0]) is None
+
+    def test_stale_matrix(self, values: np.ndarray, tmp_path: Path) -> None:
+        """Test that a matrix older than the outputs isn't used."""
+        gauges.write_store(
+            tmp_path, [values[:, :2]], positions=[20.0], timestep=0.1
+        )
+        output = tmp_path / "wg01.txt"
+        output.write_bytes(_table(values))
+        mtime = (tmp_path / gauges.GAUGE_MATRIX).stat().st_mtime + 1
+        os.utime(output, (mtime, mtime))
+
+        assert gauges.load_matrix(tmp_path, [20.0]) is None
@@ -0,0 +1,202 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src import config, geometry
+
+
+def _grid(length: float = 112.0, n_cells: int = 500) -> np.ndarray:
+    return np.linspace(0, length, n_cells + 1)
+
+
+class TestProfile:
+    def test_resample_interpolates(self) -> None:
+        """Test that levels are linear between breakpoints."""
+        profile = geometry.Profile(
+            x=np.array([0.0, 10.0, 20.0]),
+            bed=np.array([0.0, 1.0, 1.0]),
+            structure=np.zeros(3),
+            porosity=np.ones(2),
+        )
+
+        arrays = profile.resample(np.array([-5.0, 0.0, 5.0, 15.0, 30.0]))
+
+        np.testing.assert_allclose(arrays.bed, [0.0, 0.0, 0.5, 1.0, 1.0])
+        np.testing.assert_allclose(arrays.structure, 0.0)
+        np.testing.assert_allclose(arrays.porosity, 1.0)
+
+    def test_breakpoints_belong_to_structures(self) -> None:
+        """Test that points on the toes of a structure take its porosity."""
+        profile = geometry.Profile(
+            x=np.array([0.0, 10.0, 12.0, 20.0]),
+            bed=np.zeros(4),
+            structure=np.array([0.0, 0.0, 0.0, 0.0]),
+            porosity=np.array([1.0, 0.4, 1.0]),
+        )
+
+        arrays = profile.resample(np.array([9.0, 10.0, 11.0, 12.0, 13.0]))
+
+        np.testing.assert_allclose(arrays.porosity, [1.0, 0.4, 0.4, 0.4, 1.0])
+
+
+class TestBuildProfile:
+    def test_flat_floor_without_breakwater(self) -> None:
+        """Test that the default bed is flat."""
+        cfg = config.Config(
+            name="flat", breakwater=config.BreakwaterConfig(enable=False)
+        )
+
+        arrays = geometry.build_profile(cfg).resample(_grid())
+
+        np.testing.assert_allclose(arrays.bottom, 0.0)
+        np.testing.assert_allclose(arrays.porosity, 1.0)
+
+    def test_breakwater(self) -> None:
+        """Test the trapezoidal profile and porosity of the breakwater."""
+        cfg = config.Config(
+            name="breakwater",
+            breakwater=config.BreakwaterConfig(
+                breakwater_start_position=50.0,
+                crest_height=2.0,
+                crest_length=4.0,
+                slope=2.0,
+                porosity=0.3,
+            ),
+        )
+
+        arrays = geometry.build_profile(cfg).resample(
+            np.array([49.0, 50.0, 52.0, 54.0, 56.0, 60.0, 62.0, 63.0])
+        )
+
+        np.testing.assert_allclose(
+            arrays.structure, [0.0, 0.0, 1.0, 2.0, 2.0, 1.0, 0.0, 0.0]
+        )
+        np.testing.assert_allclose(
+            arrays.porosity, [1.0, 0.3, 0.3, 0.3, 0.3, 0.3, 0.3, 1.0]
+        )
+
+    def test_structure_follows_the_bed(self) -> None:
+        """Test that structures sit on a sloping bed."""
+        cfg = config.Config(
+            name="slope",
+            breakwater=config.BreakwaterConfig(enable=False),
+            bathymetry=config.BathymetryConfig(
+                segments=[
+                    config.BedSegment(length=20.0),
+                    config.BedSegment(length=40.0, slope=0.05),
+                    config.BedSegment(length=10.0),
+                ],
+                structures=[
+                    config.StructureConfig(
+                        start_position=30.0,
+                        crest_height=1.0,
+                        slope=1.0,
+                        porosity=0.5,
+                    )
+                ],
+            ),
+        )
+
+        arrays = geometry.build_profile(cfg).resample(
+            np.array([10.0, 30.0, 31.0, 40.0, 60.0, 100.0])
+        )
+
+        np.testing.assert_allclose(arrays.bed, [0.0, 0.5, 0.55, 1.0, 2.0, 2.0])
+        np.testing.assert_allclose(
+            arrays.bottom, [0.0, 0.5, 1.55, 1.0, 2.0, 2.0]
+        )
+        np.testing.assert_allclose(
+            arrays.porosity, [1.0, 0.5, 0.5, 1.0, 1.0, 1.0]
+        )
+
+    def test_survey_then_segments(self, tmp_path: Path) -> None:
+        """Test that segments continue from the end of the survey."""
+        survey = tmp_path / "survey.csv"
+        survey.write_text("x,z\n0,0.0\n10,0.5\n20,0.5\n")
+        cfg = config.Config(
+            name="survey",
+            breakwater=config.BreakwaterConfig(enable=False),
+            bathymetry=config.BathymetryConfig(
+                survey=str(survey),
+                segments=[config.BedSegment(length=10.0, slope=-0.05)],
+            ),
+        )
+
+        arrays = geometry.build_profile(cfg).resample(
+            np.array([5.0, 20.0, 30.0, 50.0])
+        )
+
+        np.testing.assert_allclose(arrays.bed, [0.25, 0.5, 0.0, 0.0])
+
+
+class TestGetGeometry:
+    def test_shared_between_configs(self) -> None:
+        """Test that configs with the same grid and structures share it."""
+        a = config.Config(name="a")
+        b = config.Config(name="b", water=config.WaterConfig(wave_height=0.2))
+        c = config.Config(
+            name="c", breakwater=config.BreakwaterConfig(crest_height=1.0)
+        )
+
+        assert geometry.get_geometry(a) is geometry.get_geometry(b)
+        assert geometry.get_geometry(a) is not geometry.get_geometry(c)
+
+    def test_arrays_are_read_only(self) -> None:
+        """Test that the shared arrays can't be modified by a consumer."""
+        geometry_ = geometry.get_geometry(config.Config(name="a"))
+
+        with pytest.raises(ValueError):
+            geometry_.x[0] = 1.0
+        with pytest.raises(ValueError):
+            geometry_.porosity[0] = 0.0
+
+    def test_masks(self) -> None:
+        """Test the breakwater and crest masks."""
+        cfg = config.Config(name="a")
+        geometry_ = geometry.get_geometry(cfg)
+        x = geometry_.x
+
+        np.testing.assert_array_equal(
+            geometry_.breakwater_mask,
+            (x >= cfg.breakwater.breakwater_start_position)
+            & (x <= cfg.breakwater_end_position),
+        )
+        assert geometry_.crest_mask.sum() > 0
+        assert not (geometry_.crest_mask & ~geometry_.breakwater_mask).any()
+        np.testing.assert_allclose(
+            geometry_.structure[geometry_.crest_mask],
+            cfg.breakwater.crest_height,
+        )
+
+    def test_no_crest_without_breakwater(self) -> None:
+        """Test that there is no crest, and so no vegetation, without breakwater."""
+        cfg = config.Config(
+            name="a",
+            breakwater=config.BreakwaterConfig(enable=False),
+            vegetation=config.VegetationConfig(enable=True),
+        )
+        geometry_ = geometry.get_geometry(cfg)
+
+        assert not geometry_.crest_mask.any()
+        assert not geometry_.vegetation_density(cfg.vegetation).any()
+
+
+class TestReadSurvey:
+    def test_read_survey(self, tmp_path: Path) -> None:
+        """Test that points are sorted and comments skipped."""
+        survey = tmp_path / "survey.csv"
+        survey.write_text("# bed survey\nx,z,note\n10,1.0,b\n0,0.0,a\n")
+
+        x, z = geometry.read_survey(survey)
+
+        np.testing.assert_allclose(x, [0.0, 10.0])
+        np.testing.assert_allclose(z, [0.0, 1.0])
+
+    def test_read_survey_too_short(self, tmp_path: Path) -> None:
+        """Test that a survey needs at least two points."""
+        survey = tmp_path / "survey.csv"
+        survey.write_text("x,z\n0,0.0\n")
+
+        with pytest.raises(ValueError, match="at least two points"):
+            geometry.read_survey(survey)
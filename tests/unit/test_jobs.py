@@ -0,0 +1,270 @@
+import os
+import socket
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src import cache, config, jobs
+
+
+@pytest.fixture
+def queue(tmp_path: Path) -> jobs.JobQueue:
+    return jobs.JobQueue(tmp_path / "simulations" / jobs.QUEUE_FILE)
+
+
+@pytest.fixture
+def configs(tmp_path: Path) -> list[tuple[config.Config, Path]]:
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    configs_ = []
+    for i in range(3):
+        cfg = config.Config(
+            name=f"job_{i}",
+            water=config.WaterConfig(wave_height=0.1 * (i + 1)),
+        )
+        path = config_dir / f"{cfg.name}.yml"
+        config.write_config(cfg, path)
+        configs_.append((cfg, path))
+    return configs_
+
+
+class TestJobQueue:
+    def test_add_and_list(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that added configs are queued in order."""
+        for cfg, path in configs:
+            job = queue.add(cfg, path)
+            assert job is not None
+            assert job.state == "queued"
+            assert job.attempts == 0
+
+        listed = queue.jobs()
+        assert [job.name for job in listed] == ["job_0", "job_1", "job_2"]
+        assert queue.jobs("running") == []
+
+    def test_add_skips_active_duplicates(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that a config already queued isn't queued twice."""
+        cfg, path = configs[0]
+        assert queue.add(cfg, path) is not None
+        assert queue.add(cfg, path) is None
+        assert len(queue.jobs()) == 1
+
+    def test_queue_persists(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that the queue survives reopening the database."""
+        cfg, path = configs[0]
+        queue.add(cfg, path)
+
+        reopened = jobs.JobQueue(queue.path)
+
+        assert [job.name for job in reopened.jobs()] == ["job_0"]
+
+    def test_claim_and_finish(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test the life cycle of a job."""
+        cfg, path = configs[0]
+        queue.add(cfg, path)
+
+        job = queue.claim("worker")
+        assert job is not None
+        assert job.state == "running"
+        assert job.attempts == 1
+        assert job.worker == "worker"
+        assert queue.claim("worker") is None
+
+        queue.finish(job, success=False, exit_code=3, error="boom")
+        (failed,) = queue.jobs()
+        assert failed.state == "failed"
+        assert failed.exit_code == 3
+        assert failed.error == "boom"
+        assert failed.duration is not None and failed.duration >= 0
+
+        assert queue.retry() == 1
+        job = queue.claim("worker")
+        assert job is not None
+        assert job.attempts == 2
+        assert job.error is None
+        queue.finish(job, success=True, exit_code=0)
+        assert queue.jobs()[0].state == "done"
+
+    def test_claims_are_exclusive(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that concurrent workers never claim the same job."""
+        for cfg, path in configs:
+            queue.add(cfg, path)
+        claimed = []
+        barrier = threading.Barrier(6)
+
+        def claim(worker: str) -> None:
+            barrier.wait()
+            job = queue.claim(worker)
+            if job is not None:
+                claimed.append(job.id)
+
+        threads = [
+            threading.Thread(target=claim, args=(f"worker_{i}",))
+            for i in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(claimed) == [job.id for job in queue.jobs()]
+
+    def test_claim_skips_running_physics(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that configs sharing their physics don't run concurrently."""
+        cfg, path = configs[0]
+        renamed = config.Config(**{**cfg.model_dump(), "name": "renamed"})
+        queue.add(cfg, path)
+        queue.add(renamed, path)
+
+        job = queue.claim("worker")
+        assert queue.claim("worker") is None
+
+        queue.finish(job, success=True)
+        assert queue.claim("worker").name == "renamed"
+
+    def test_finish_ignores_taken_over_job(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that a worker can't overwrite a job it doesn't own anymore."""
+        cfg, path = configs[0]
+        queue.add(cfg, path)
+        job = queue.claim("old")
+        queue.release("old")
+        queue.claim("new")
+
+        queue.finish(job, success=False)
+
+        assert queue.jobs()[0].state == "running"
+        assert queue.jobs()[0].worker == "new"
+
+    def test_requeue_stale(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that jobs of dead or silent workers are queued again."""
+        host = socket.gethostname()
+        for cfg, path in configs:
+            queue.add(cfg, path)
+        # a live local worker, a dead local worker, a silent remote worker
+        queue.claim(f"{host}:{os.getpid()}")
+        queue.claim(f"{host}:999999999")
+        queue.claim("elsewhere:1")
+
+        assert queue.requeue_stale() == 1
+        assert queue.requeue_stale(max_age=-1) == 2
+        assert [job.state for job in queue.jobs()] == ["queued"] * 3
+
+    def test_retry_by_name(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+    ) -> None:
+        """Test that only the given failed jobs are retried."""
+        for cfg, path in configs[:2]:
+            queue.add(cfg, path)
+            queue.finish(queue.claim("worker"), success=False)
+
+        assert queue.retry(["job_1"]) == 1
+        assert [job.state for job in queue.jobs()] == ["failed", "queued"]
+
+
+class TestRunWorker:
+    def test_run_worker_drains_queue(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that every queued job is run and its result recorded."""
+        monkeypatch.setattr("src.jobs.root_dir", tmp_path)
+        for cfg, path in configs:
+            queue.add(cfg, path)
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            swash_dir = (
+                tmp_path / "simulations" / f"{cfg.name}_{cfg.hash}" / "swash"
+            )
+            swash_dir.mkdir(parents=True)
+            exit_code = 0 if cfg.name != "job_1" else 2
+            cache.update_manifest(swash_dir, {"exit_code": exit_code})
+            return exit_code == 0
+
+        monkeypatch.setattr("src.jobs.run_simulation", fake_run)
+
+        results = jobs.run_worker(queue, jobs=2)
+
+        assert results == {"job_0": True, "job_1": False, "job_2": True}
+        states = {job.name: job for job in queue.jobs()}
+        assert states["job_0"].state == "done"
+        assert states["job_0"].exit_code == 0
+        assert states["job_1"].state == "failed"
+        assert states["job_1"].exit_code == 2
+
+    def test_run_worker_records_crash(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that an exception fails the job without stopping the worker."""
+        for cfg, path in configs[:2]:
+            queue.add(cfg, path)
+
+        def fake_run(cfg: config.Config, **kwargs) -> bool:
+            if cfg.name == "job_0":
+                raise RuntimeError("crash")
+            return True
+
+        monkeypatch.setattr("src.jobs.run_simulation", fake_run)
+
+        results = jobs.run_worker(queue, jobs=1)
+
+        assert results == {"job_0": False, "job_1": True}
+        assert queue.jobs()[0].error == "crash"
+
+    def test_run_worker_releases_jobs_on_interrupt(
+        self,
+        queue: jobs.JobQueue,
+        configs: list[tuple[config.Config, Path]],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that an interrupted worker puts its jobs back in the queue."""
+        cfg, path = configs[0]
+        queue.add(cfg, path)
+        monkeypatch.setattr(
+            "src.jobs.run_simulation", Mock(side_effect=KeyboardInterrupt)
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            jobs.run_worker(queue, jobs=1)
+
+        assert queue.jobs()[0].state == "queued"
@@ -0,0 +1,193 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from src import monitor
+
+PRINT_LINE = "Time of simulation  ->  {:010.3f}         in sec:     {:12.5f}\n"
+
+
+def _print_line(time_: float) -> bytes:
+    return PRINT_LINE.format(time_, time_).encode()
+
+
+class TestProgressEvent:
+    def test_fraction(self) -> None:
+        """Test the fraction done, capped to 1."""
+        assert monitor.ProgressEvent(25.0, 100.0).fraction == 0.25
+        assert monitor.ProgressEvent(150.0, 100.0).fraction == 1.0
+        assert monitor.ProgressEvent(0.0, 0.0).fraction == 1.0
+
+
+class TestPrintScanner:
+    def test_scanner_reports_last_time(self) -> None:
+        """Test that only the latest time of a chunk is reported."""
+        scanner = monitor.PrintScanner()
+
+        time_ = scanner.feed(
+            b"header\n" + _print_line(0.05) + _print_line(0.1)
+        )
+
+        assert time_ == pytest.approx(0.1)
+        assert scanner.simulation_time == pytest.approx(0.1)
+
+    def test_scanner_counts_time_reports(self) -> None:
+        """Test that every time report is counted, even if not parsed."""
+        scanner = monitor.PrintScanner()
+
+        scanner.feed(_print_line(0.05) + _print_line(0.1))
+        scanner.feed(_print_line(0.15)[:20])
+
+        assert scanner.n_reports == 2
+
+    def test_scanner_waits_for_complete_lines(self) -> None:
+        """Test that a line split between two writes is parsed once whole."""
+        scanner = monitor.PrintScanner()
+        line = _print_line(12.5)
+
+        assert scanner.feed(line[:30]) is None
+        assert scanner.feed(line[30:]) == pytest.approx(12.5)
+
+    def test_scanner_ignores_stale_times(self) -> None:
+        """Test that times not advancing aren't reported."""
+        scanner = monitor.PrintScanner()
+        scanner.feed(_print_line(2.0))
+
+        assert scanner.feed(_print_line(1.0)) is None
+        assert scanner.feed(b"no time here\n") is None
+        assert scanner.simulation_time == pytest.approx(2.0)
+
+
+class TestDirectoryWatcher:
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_watcher_reports_changes(
+        self, tmp_path: Path, use_inotify: bool
+    ) -> None:
+        """Test that writes to watched files are reported, others ignored."""
+        watcher = monitor.DirectoryWatcher(
+            tmp_path, {"PRINT"}, poll_interval=0.01, use_inotify=use_inotify
+        )
+        try:
+            (tmp_path / "other").write_text("ignored")
+            (tmp_path / "PRINT").write_text("content")
+
+            changed = set()
+            for _ in range(100):
+                changed |= watcher.wait(timeout=0.05)
+                if changed:
+                    break
+
+            assert changed == {"PRINT"}
+        finally:
+            watcher.close()
+
+    def test_watcher_wake(self, tmp_path: Path) -> None:
+        """Test that waiting can be interrupted."""
+        watcher = monitor.DirectoryWatcher(tmp_path, {"PRINT"})
+        try:
+            watcher.wake()
+            assert watcher.wait(timeout=5) == set()
+        finally:
+            watcher.close()
+
+    def test_watcher_wake_after_close(self, tmp_path: Path) -> None:
+        """Test that a closed watcher never touches reused descriptors."""
+        watcher = monitor.DirectoryWatcher(tmp_path, {"PRINT"})
+        watcher.close()
+
+        # the freed descriptor numbers are reused by the next files opened
+        with open(tmp_path / "a", "wb") as a, open(tmp_path / "b", "wb") as b:
+            watcher.wake()
+            watcher.close()
+            a.write(b"a")
+            b.write(b"b")
+
+        assert (tmp_path / "a").read_bytes() == b"a"
+        assert (tmp_path / "b").read_bytes() == b"b"
+        assert watcher.closed
+        assert watcher.wait(timeout=0) == set()
+
+
+class TestProgressMonitor:
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_monitor_publishes_events(
+        self, tmp_path: Path, use_inotify: bool
+    ) -> None:
+        """Test that subscribers receive the progress written to PRINT."""
+        print_path = tmp_path / "PRINT"
+        received = []
+        seen = threading.Event()
+
+        def callback(event: monitor.ProgressEvent) -> None:
+            received.append(event)
+            if event.simulation_time >= 2.0:
+                seen.set()
+
+        with monitor.ProgressMonitor(
+            print_path,
+            total=4.0,
+            min_interval=0.0,
+            poll_interval=0.01,
+            use_inotify=use_inotify,
+        ) as monitor_:
+            monitor_.subscribe(callback)
+            with open(print_path, "wb") as f:
+                f.write(_print_line(1.0))
+                f.flush()
+                f.write(_print_line(2.0))
+                f.flush()
+            assert seen.wait(timeout=5)
+
+        assert received[-1] == monitor.ProgressEvent(2.0, 4.0)
+        times = [event.simulation_time for event in received]
+        assert times == sorted(set(times))
+
+    def test_monitor_reads_remaining_progress_on_stop(
+        self, tmp_path: Path
+    ) -> None:
+        """Test that progress written just before stopping isn't lost."""
+        print_path = tmp_path / "PRINT"
+        monitor_ = monitor.ProgressMonitor(print_path, total=10.0)
+        monitor_.start()
+        print_path.write_bytes(_print_line(10.0))
+        monitor_.stop()
+
+        assert monitor_.simulation_time == pytest.approx(10.0)
+
+    def test_monitor_event_stream(self, tmp_path: Path) -> None:
+        """Test that the event stream ends when the monitor stops."""
+        print_path = tmp_path / "PRINT"
+        monitor_ = monitor.ProgressMonitor(print_path, total=10.0)
+        events = []
+
+        def consume() -> None:
+            events.extend(monitor_.events())
+
+        consumer = threading.Thread(target=consume)
+        monitor_.start()
+        consumer.start()
+        while not monitor_._queues:
+            threading.Event().wait(0.01)
+        print_path.write_bytes(_print_line(5.0))
+        monitor_.stop()
+        consumer.join(timeout=5)
+
+        assert not consumer.is_alive()
+        assert events == [monitor.ProgressEvent(5.0, 10.0)]
+
+    def test_monitor_survives_failing_callback(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test that a failing subscriber doesn't stop the others."""
+        print_path = tmp_path / "PRINT"
+        received = []
+        monitor_ = monitor.ProgressMonitor(print_path, total=10.0)
+        monitor_.subscribe(lambda event: 1 / 0)
+        monitor_.subscribe(received.append)
+        monitor_.start()
+        print_path.write_bytes(_print_line(3.0))
+        monitor_.stop()
+
+        assert received == [monitor.ProgressEvent(3.0, 10.0)]
+        assert "Progress callback failed" in capsys.readouterr().err
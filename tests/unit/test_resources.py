@@ -0,0 +1,95 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src import resources
+
+# allocates ~64 MiB, burns CPU for a while and writes a file
+CHILD = """
+import time
+data = bytearray(64 * 1024 * 1024)
+for i in range(0, len(data), 4096):
+    data[i] = 1
+end = time.process_time() + 0.6
+while time.process_time() < end:
+    pass
+with open("output", "wb") as f:
+    f.write(b"x" * 100_000)
+"""
+
+
+class TestResourceUsage:
+    def test_speed(self) -> None:
+        """Test the simulated seconds per wall second."""
+        usage = resources.ResourceUsage(
+            wall_time=10.0,
+            user_time=9.0,
+            system_time=1.0,
+            peak_rss=1024,
+            bytes_written=2048,
+            simulation_time=50.0,
+        )
+        assert usage.speed == 5.0
+        assert usage.to_dict()["speed"] == 5.0
+
+    def test_dict_round_trip(self) -> None:
+        """Test that usage read from a manifest is the one written."""
+        usage = resources.ResourceUsage(1.5, 1.0, 0.25, 10, 20, 3.0)
+
+        assert resources.ResourceUsage.from_dict(usage.to_dict()) == usage
+        assert resources.ResourceUsage.from_dict({}) is None
+
+    def test_summary(self) -> None:
+        """Test the summary shown after a run."""
+        usage = resources.ResourceUsage(2.0, 1.5, 0.5, 3 * 1024**2, 512, 8.0)
+
+        assert usage.summary() == (
+            "wall 2.0s, cpu 1.5s user + 0.5s sys, peak rss 3.0 MiB,"
+            " written 512 B, 4.00 simulated s/s"
+        )
+
+
+class TestResourceMonitor:
+    @pytest.mark.skipif(
+        not Path("/proc/self/stat").exists(), reason="requires /proc"
+    )
+    def test_monitor_measures_child(self, tmp_path: Path) -> None:
+        """Test that the CPU time, memory and output of a child are measured."""
+        process = subprocess.Popen([sys.executable, "-c", CHILD], cwd=tmp_path)
+        with resources.ResourceMonitor(
+            process.pid, directory=tmp_path, interval=0.05
+        ) as monitor:
+            process.wait(timeout=30)
+        usage = monitor.usage(simulation_time=10.0)
+
+        assert usage.wall_time >= 0.6
+        assert usage.user_time + usage.system_time >= 0.3
+        assert usage.peak_rss >= 64 * 1024**2
+        assert usage.bytes_written == 100_000
+        assert usage.simulation_time == 10.0
+
+    def test_monitor_fallback_to_rusage(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that usage is measured without /proc."""
+        monkeypatch.setattr("src.resources._PROC", tmp_path / "no_proc")
+        process = subprocess.Popen([sys.executable, "-c", CHILD], cwd=tmp_path)
+        with resources.ResourceMonitor(
+            process.pid, directory=tmp_path
+        ) as monitor:
+            process.wait(timeout=30)
+        usage = monitor.usage(simulation_time=1.0)
+
+        assert usage.user_time + usage.system_time >= 0.3
+        assert usage.peak_rss >= 64 * 1024**2
+        assert usage.bytes_written == 100_000
+
+    def test_bytes_written_ignores_older_files(self, tmp_path: Path) -> None:
+        """Test that only files written after the start are counted."""
+        (tmp_path / "input").write_bytes(b"x" * 10)
+        since = (tmp_path / "input").stat().st_mtime + 1
+
+        assert resources._bytes_written(tmp_path, since) == 0
+        assert resources._bytes_written(tmp_path, since - 1) == 10
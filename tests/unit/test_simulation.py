@@ -1,15 +1,16 @@
+import json
+import os
 import subprocess
 import sys
-import threading
 import time
 from pathlib import Path
-from unittest.mock import Mock, mock_open, patch
+from unittest.mock import MagicMock, Mock, mock_open, patch
 
 import numpy as np
 import pytest
 import tqdm
 
-from src import config, simulation
+from src import cache, config, simulation, utils
 
 
 class TestRunSimulation:
@@ -72,6 +73,7 @@ class TestRunSimulation:
         monkeypatch.setattr("src.simulation._create_bathymetry_file", mock_create_bathymetry)
         monkeypatch.setattr("src.simulation._create_porosity_file", mock_create_porosity)
         monkeypatch.setattr("src.simulation._create_input_file", mock_create_input)
+        monkeypatch.setattr("src.simulation._render_input", Mock(return_value="INPUT"))
         monkeypatch.setattr("src.simulation._execute_swash", mock_execute_swash)
         
         # Mock analysis module
@@ -99,6 +101,7 @@ class TestRunSimulation:
         monkeypatch.setattr("src.simulation._create_porosity_file", Mock())
         monkeypatch.setattr("src.simulation._create_vegetation_file", Mock())
         monkeypatch.setattr("src.simulation._create_input_file", Mock())
+        monkeypatch.setattr("src.simulation._render_input", Mock(return_value="INPUT"))
         monkeypatch.setattr("src.simulation._execute_swash", Mock(return_value=True))
         
         # Mock failing analysis
@@ -108,6 +111,482 @@ class TestRunSimulation:
             simulation.run_simulation(full_config)
 
 
+class TestRunSimulationCache:
+    @pytest.fixture
+    def mocked_run(
+        self,
+        full_config: config.Config,
+        tmp_simulations_dir: Path,
+        input_template: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> dict:
+        """Mock SWASH execution with a fake run producing every output."""
+        monkeypatch.setattr(
+            "src.simulation.root_dir", tmp_simulations_dir.parent
+        )
+        swash_dir = (
+            tmp_simulations_dir
+            / f"{full_config.name}_{full_config.hash}"
+            / "swash"
+        )
+
+        def fake_execute(cfg, *, simulation_dir, **kwargs):
+            for file in ["PRINT", "norm_end"] + [
+                f"wg{i+1:02d}.txt"
+                for i in range(len(cfg.numeric.wave_gauge_positions))
+            ]:
+                (simulation_dir / file).write_text("output")
+            return True
+
+        def fake_analyze(simulation_dir, cfg, **kwargs):
+            analysis_dir = simulation_dir / "analysis"
+            analysis_dir.mkdir(exist_ok=True)
+            for file in [
+                "wave_statistics.csv",
+                "water_levels_and_x_velocity.json",
+                "swash_diagram.json",
+            ]:
+                (analysis_dir / file).write_text("analysis")
+            cache.record_analysis(
+                analysis_dir, {}, cache.analysis_inputs(cfg, simulation_dir)
+            )
+
+        mocks = {
+            "execute": Mock(side_effect=fake_execute),
+            "analyze": Mock(side_effect=fake_analyze),
+            "swash_dir": swash_dir,
+        }
+        monkeypatch.setattr("src.simulation._execute_swash", mocks["execute"])
+        monkeypatch.setitem(
+            sys.modules,
+            "src.analysis",
+            Mock(analyze_simulation=mocks["analyze"]),
+        )
+        return mocks
+
+    def test_rerun_is_skipped(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that an unchanged, complete run is neither simulated nor analysed again."""
+        assert simulation.run_simulation(full_config) is True
+        assert simulation.run_simulation(full_config) is True
+
+        assert mocked_run["execute"].call_count == 1
+        assert mocked_run["analyze"].call_count == 1
+        manifest = json.loads((mocked_run["swash_dir"] / "run.json").read_text())
+        assert manifest["status"] == "completed"
+        assert manifest["physics_hash"] == full_config.physics_hash
+
+    def test_rerun_skips_to_analysis(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that a complete run with missing analysis only redoes the analysis."""
+        simulation.run_simulation(full_config)
+        analysis_dir = mocked_run["swash_dir"].parent / "analysis"
+        (analysis_dir / "wave_statistics.csv").unlink()
+
+        simulation.run_simulation(full_config)
+
+        assert mocked_run["execute"].call_count == 1
+        assert mocked_run["analyze"].call_count == 2
+
+    def test_rerun_with_force(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that force always executes SWASH again."""
+        simulation.run_simulation(full_config)
+        simulation.run_simulation(full_config, force=True)
+
+        assert mocked_run["execute"].call_count == 2
+        assert mocked_run["analyze"].call_args.kwargs["force"] is True
+
+    def test_rerun_after_template_change(
+        self,
+        full_config: config.Config,
+        mocked_run: dict,
+        input_template: Path,
+    ) -> None:
+        """Test that editing the template invalidates the cached run."""
+        simulation.run_simulation(full_config)
+        input_template.write_text(input_template.read_text() + "\n$ edited\n")
+
+        simulation.run_simulation(full_config)
+
+        assert mocked_run["execute"].call_count == 2
+
+    def test_incomplete_run_is_rerun(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that a run missing a gauge output is executed again."""
+        simulation.run_simulation(full_config)
+        (mocked_run["swash_dir"] / "wg01.txt").unlink()
+
+        simulation.run_simulation(full_config)
+
+        assert mocked_run["execute"].call_count == 2
+
+    def test_failed_run_is_rerun(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that a failed run is never reused."""
+        mocked_run["execute"].side_effect = None
+        mocked_run["execute"].return_value = False
+
+        assert simulation.run_simulation(full_config) is False
+        assert simulation.run_simulation(full_config) is False
+
+        assert mocked_run["execute"].call_count == 2
+        mocked_run["analyze"].assert_not_called()
+
+
+    def test_run_in_scratch(
+        self, full_config: config.Config, mocked_run: dict, tmp_path: Path
+    ) -> None:
+        """Test that a scratch run is published into the simulation at once."""
+        scratch = tmp_path / "scratch"
+
+        assert simulation.run_simulation(full_config, scratch=scratch) is True
+
+        run_dir = mocked_run["execute"].call_args.kwargs["simulation_dir"]
+        assert run_dir.parent == scratch
+        assert list(scratch.iterdir()) == []
+        swash_dir = mocked_run["swash_dir"]
+        assert swash_dir.is_symlink()
+        assert (swash_dir / "INPUT").exists()
+        assert (swash_dir / "wg01.txt").read_text() == "output"
+        assert json.loads((swash_dir / "run.json").read_text())["status"] == (
+            "completed"
+        )
+
+        # reused like a run done in place
+        assert simulation.run_simulation(full_config, scratch=scratch) is True
+        assert mocked_run["execute"].call_count == 1
+
+    def test_scratch_rerun_replaces_results(
+        self, full_config: config.Config, mocked_run: dict, tmp_path: Path
+    ) -> None:
+        """Test that a new scratch run replaces the results done in place."""
+        simulation.run_simulation(full_config)
+        swash_dir = mocked_run["swash_dir"]
+        assert not swash_dir.is_symlink()
+
+        simulation.run_simulation(
+            full_config, force=True, scratch=tmp_path / "scratch"
+        )
+        published = swash_dir.resolve()
+        simulation.run_simulation(
+            full_config, force=True, scratch=tmp_path / "scratch"
+        )
+
+        assert mocked_run["execute"].call_count == 3
+        assert swash_dir.is_symlink()
+        assert not published.exists()
+        assert sorted(path.name for path in swash_dir.parent.iterdir()) == [
+            swash_dir.resolve().name,
+            "analysis",
+            "swash",
+        ]
+
+
+    def test_compressed_outputs(
+        self, full_config: config.Config, mocked_run: dict
+    ) -> None:
+        """Test that compressed outputs are recorded and reused."""
+        assert simulation.run_simulation(full_config, compression="gzip")
+
+        swash_dir = mocked_run["swash_dir"]
+        assert not (swash_dir / "PRINT").exists()
+        assert (swash_dir / "PRINT.gz").exists()
+        assert (swash_dir / "wg01.txt.gz").exists()
+        manifest = json.loads((swash_dir / "run.json").read_text())
+        assert manifest["compression"] == "gzip"
+
+        assert simulation.run_simulation(full_config) is True
+        assert mocked_run["execute"].call_count == 1
+
+
+class TestHotstart:
+    @pytest.fixture
+    def variants(self) -> list[config.Config]:
+        """Hot-started configs only differing by their breakwater and vegetation."""
+        return [
+            config.Config(
+                name="porous",
+                breakwater=config.BreakwaterConfig(porosity=0.3),
+                numeric=config.NumericConfig(hotstart=True),
+            ),
+            config.Config(
+                name="vegetated",
+                breakwater=config.BreakwaterConfig(porosity=0.5),
+                vegetation=config.VegetationConfig(enable=True),
+                numeric=config.NumericConfig(hotstart=True),
+            ),
+        ]
+
+    @pytest.fixture
+    def mocked_run(
+        self,
+        tmp_simulations_dir: Path,
+        tmp_templates_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> Mock:
+        """Mock SWASH execution with a fake run writing its gauges and state."""
+        (tmp_templates_dir / "INPUT").write_text(
+            (Path(__file__).parents[2] / "templates" / "INPUT").read_text()
+        )
+        monkeypatch.setattr(
+            "src.simulation.root_dir", tmp_simulations_dir.parent
+        )
+
+        def fake_execute(cfg, *, simulation_dir, **kwargs):
+            for file in ["PRINT", "norm_end"]:
+                (simulation_dir / file).write_text("output")
+            for i in range(len(cfg.numeric.wave_gauge_positions)):
+                (simulation_dir / f"wg{i+1:02d}.txt").write_text(
+                    f"{cfg.name}\n"
+                )
+            if "HOTFILE" in (simulation_dir / "INPUT").read_text():
+                (simulation_dir / simulation.HOTSTART_FILE).write_text("state")
+            return True
+
+        execute = Mock(side_effect=fake_execute)
+        monkeypatch.setattr("src.simulation._execute_swash", execute)
+        monkeypatch.setitem(sys.modules, "src.analysis", Mock())
+        return execute
+
+    def test_format_time(self) -> None:
+        """Test the SWASH hhmmss.sss time notation."""
+        assert simulation._format_time(0) == "000000.000"
+        assert simulation._format_time(100) == "000140.000"
+        assert simulation._format_time(3725.25) == "010205.250"
+
+    def test_spinup_config(self, variants: list[config.Config]) -> None:
+        """Test that variants share a spin-up without breakwater or vegetation."""
+        spinups = [simulation.spinup_config(cfg) for cfg in variants]
+
+        assert not spinups[0].breakwater.enable
+        assert not spinups[0].vegetation.enable
+        assert not spinups[0].numeric.hotstart
+        assert spinups[0].numeric.convergence_tolerance is None
+        assert spinups[0].simulation_duration == variants[0].spinup_duration
+        assert spinups[0].physics_hash == spinups[1].physics_hash
+        assert simulation.spinup_config(config.Config(name="cold")) is None
+
+    def test_render_input_hotstart(
+        self, variants: list[config.Config]
+    ) -> None:
+        """Test that spin-ups write their state and variants start from it."""
+        template_dir = Path(__file__).parents[2] / "templates"
+        spinup = simulation.spinup_config(variants[0])
+
+        spinup_input = simulation._render_input(
+            spinup, template_dir=template_dir, write_hotstart=True
+        )
+        variant_input = simulation._render_input(
+            variants[0], template_dir=template_dir
+        )
+
+        start = simulation._format_time(variants[0].spinup_duration)
+        end = simulation._format_time(variants[0].simulation_duration)
+        assert "HOTFILE 'hotstart'" in spinup_input
+        assert "INIT HOTSTART" not in spinup_input
+        assert f"COMPUTE 000000.000 0.05 SEC {start}" in spinup_input
+        assert "INIT HOTSTART SINGLE 'hotstart'" in variant_input
+        assert "HOTFILE" not in variant_input
+        assert f"COMPUTE {start} 0.05 SEC {end}" in variant_input
+
+    def test_spinup_is_shared(
+        self, variants: list[config.Config], mocked_run: Mock
+    ) -> None:
+        """Test that the spin-up runs once and its gauges are prepended."""
+        for cfg in variants:
+            assert simulation.run_simulation(cfg, echo=False) is True
+
+        # one spin-up and two variants
+        assert mocked_run.call_count == 3
+        for cfg in variants:
+            swash_dir = (
+                simulation.root_dir
+                / "simulations"
+                / f"{cfg.name}_{cfg.hash}"
+                / "swash"
+            )
+            assert (swash_dir / simulation.HOTSTART_FILE).exists()
+            assert (swash_dir / "wg01.txt").read_text() == (
+                f"porous_spinup\n{cfg.name}\n"
+            )
+
+    def test_spinup_in_scratch(
+        self,
+        variants: list[config.Config],
+        mocked_run: Mock,
+        tmp_path: Path,
+    ) -> None:
+        """Test that spin-ups and variants are published from the scratch."""
+        scratch = tmp_path / "scratch"
+        for cfg in variants:
+            assert (
+                simulation.run_simulation(cfg, echo=False, scratch=scratch)
+                is True
+            )
+
+        assert mocked_run.call_count == 3
+        assert list(scratch.iterdir()) == []
+        spinup_dir = simulation.cache.spinup_dir(
+            simulation.spinup_config(variants[0]),
+            simulation.root_dir / "simulations",
+        )
+        assert (spinup_dir / "swash").is_symlink()
+        assert (spinup_dir / "swash" / simulation.HOTSTART_FILE).exists()
+        swash_dir = (
+            simulation.root_dir
+            / "simulations"
+            / f"{variants[1].name}_{variants[1].hash}"
+            / "swash"
+        )
+        assert (swash_dir / "wg01.txt").read_text() == (
+            "porous_spinup\nvegetated\n"
+        )
+
+    def test_failed_spinup_fails_run(
+        self, variants: list[config.Config], mocked_run: Mock
+    ) -> None:
+        """Test that a variant isn't run if its spin-up fails."""
+        mocked_run.side_effect = None
+        mocked_run.return_value = False
+
+        assert simulation.run_simulation(variants[0], echo=False) is False
+        assert mocked_run.call_count == 1
+
+
+class TestStabilityRetries:
+    @pytest.fixture
+    def mocked_run(
+        self,
+        tmp_simulations_dir: Path,
+        tmp_templates_dir: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> Mock:
+        """Mock SWASH execution going unstable with the default time stepping."""
+        (tmp_templates_dir / "INPUT").write_text(
+            (Path(__file__).parents[2] / "templates" / "INPUT").read_text()
+        )
+        monkeypatch.setattr(
+            "src.simulation.root_dir", tmp_simulations_dir.parent
+        )
+
+        def fake_execute(cfg, *, simulation_dir, **kwargs):
+            for file in ["PRINT", "norm_end"] + [
+                f"wg{i+1:02d}.txt"
+                for i in range(len(cfg.numeric.wave_gauge_positions))
+            ]:
+                (simulation_dir / file).write_text("output")
+            manifest = {"exit_code": -15, "resources": {"wall_time": 2.0}}
+            if "EXPLICIT 0.4 0.8" in (simulation_dir / "INPUT").read_text():
+                manifest["instability"] = {
+                    "reason": "non-finite value in wg01.txt",
+                    "simulation_time": 12.3,
+                }
+                simulation.cache.update_manifest(simulation_dir, manifest)
+                return False
+            simulation.cache.update_manifest(simulation_dir, manifest)
+            return True
+
+        execute = Mock(side_effect=fake_execute)
+        monkeypatch.setattr("src.simulation._execute_swash", execute)
+        monkeypatch.setitem(sys.modules, "src.analysis", Mock())
+        return execute
+
+    def test_render_input_stability_levels(self) -> None:
+        """Test that retries narrow the Courant number and the time step."""
+        template_dir = Path(__file__).parents[2] / "templates"
+        cfg = config.Config(name="levels")
+
+        rendered = [
+            simulation._render_input(
+                cfg, template_dir=template_dir, stability=level
+            )
+            for level in range(len(simulation.STABILITY_LEVELS))
+        ]
+
+        assert "TIMEINT METH EXPLICIT 0.4 0.8" in rendered[0]
+        assert "COMPUTE 000000.000 0.05 SEC" in rendered[0]
+        assert "TIMEINT METH EXPLICIT 0.3 0.6" in rendered[1]
+        assert "COMPUTE 000000.000 0.025 SEC" in rendered[1]
+        assert "TIMEINT METH EXPLICIT 0.2 0.5" in rendered[2]
+
+    def test_render_input_format(self) -> None:
+        """Test that the grid files are read in the format they are written."""
+        template_dir = Path(__file__).parents[2] / "templates"
+        free = config.Config(name="free")
+        unformatted = config.Config(
+            name="unformatted",
+            numeric=config.NumericConfig(input_format="unformatted"),
+        )
+
+        assert (
+            "READINP BOTTOM 1.0 'bathymetry.txt' IDLA=3 FREE"
+            in simulation._render_input(free, template_dir=template_dir)
+        )
+        assert (
+            "READINP BOTTOM 1.0 'bathymetry.bin' IDLA=3 UNFORMATTED"
+            in simulation._render_input(unformatted, template_dir=template_dir)
+        )
+        assert free.physics_hash == unformatted.physics_hash
+
+    def test_unstable_run_is_retried(self, mocked_run: Mock) -> None:
+        """Test that an unstable run is retried and every attempt recorded."""
+        cfg = config.Config(name="unstable")
+
+        assert simulation.run_simulation(cfg, echo=False) is True
+
+        assert mocked_run.call_count == 2
+        swash_dir = (
+            simulation.root_dir / "simulations" / f"{cfg.name}_{cfg.hash}" / "swash"
+        )
+        manifest = json.loads((swash_dir / "run.json").read_text())
+        assert "instability" not in manifest
+        assert manifest["status"] == "completed"
+        assert [attempt["status"] for attempt in manifest["attempts"]] == [
+            "unstable",
+            "completed",
+        ]
+        assert manifest["attempts"][0]["instability"]["simulation_time"] == 12.3
+        assert manifest["attempts"][1]["cfl"] == [0.3, 0.6]
+        assert manifest["attempts"][1]["time_step"] == 0.025
+        assert "EXPLICIT 0.3 0.6" in (swash_dir / "INPUT").read_text()
+        # the watchdog judges each attempt against its own time step
+        assert [
+            call.kwargs["time_step"] for call in mocked_run.call_args_list
+        ] == [0.05, 0.025]
+
+        # the stabilised run is reused
+        assert simulation.run_simulation(cfg, echo=False) is True
+        assert mocked_run.call_count == 2
+
+    def test_run_fails_once_attempts_exhausted(self, mocked_run: Mock) -> None:
+        """Test that a run unstable at every level fails."""
+        def always_unstable(cfg, *, simulation_dir, **kwargs):
+            simulation.cache.update_manifest(
+                simulation_dir,
+                {"instability": {"reason": "NaN", "simulation_time": 1.0}},
+            )
+            return False
+
+        mocked_run.side_effect = always_unstable
+        cfg = config.Config(name="diverging")
+
+        assert simulation.run_simulation(cfg, echo=False) is False
+
+        assert mocked_run.call_count == len(simulation.STABILITY_LEVELS)
+        swash_dir = (
+            simulation.root_dir / "simulations" / f"{cfg.name}_{cfg.hash}" / "swash"
+        )
+        manifest = json.loads((swash_dir / "run.json").read_text())
+        assert manifest["status"] == "failed"
+        assert len(manifest["attempts"]) == len(simulation.STABILITY_LEVELS)
+
+
 class TestCreateBathymetryFile:
     def test_create_bathymetry_file(
         self, full_config: config.Config, tmp_path: Path
@@ -157,6 +636,28 @@ class TestCreatePorosityFile:
         # Outside breakwater should have porosity of 1.0
         assert np.all(data[~breakwater_mask] == 1.0)
 
+    def test_create_porosity_file_unformatted(
+        self, full_config: config.Config, tmp_path: Path
+    ) -> None:
+        """Test that the unformatted file holds the values of the text one."""
+        simulation._create_porosity_file(full_config, simulation_dir=tmp_path)
+        text = np.loadtxt(tmp_path / "porosity.txt")
+        cfg = full_config.model_copy(
+            update={
+                "numeric": full_config.numeric.model_copy(
+                    update={"input_format": "unformatted"}
+                )
+            }
+        )
+
+        simulation._create_porosity_file(cfg, simulation_dir=tmp_path)
+
+        assert not (tmp_path / "porosity.txt").exists()
+        binary = utils.arrays.read_unformatted(tmp_path / "porosity.bin")
+        np.testing.assert_array_equal(
+            binary, text.astype(np.float32).astype(float)
+        )
+
 
 
 
@@ -259,6 +760,151 @@ class TestCreateVegetationFile:
         assert veg_file.exists()
 
 
+class TestPrepareInputs:
+    def test_prepare_inputs_writes_every_file(
+        self, full_config: config.Config, input_template: Path, tmp_path: Path
+    ) -> None:
+        """Test that the inputs are written without running SWASH."""
+        swash_dir = tmp_path / "swash"
+
+        written = simulation.prepare_inputs(
+            full_config, swash_dir, template_dir=input_template.parent
+        )
+
+        assert written
+        for file in ("INPUT", "bathymetry.txt", "porosity.txt"):
+            assert (swash_dir / file).exists()
+        assert not (swash_dir / "run.json").exists()
+
+    def test_prepare_inputs_keeps_complete_runs(
+        self, full_config: config.Config, input_template: Path, tmp_path: Path
+    ) -> None:
+        """Test that a directory holding a complete run is left untouched."""
+        swash_dir = tmp_path / "swash"
+        simulation.prepare_inputs(
+            full_config, swash_dir, template_dir=input_template.parent
+        )
+        rendered = (swash_dir / "INPUT").read_text()
+        run_key = simulation.cache.compute_run_key(
+            full_config, rendered, input_template
+        )
+        for file in simulation.cache.expected_outputs(full_config):
+            (swash_dir / file).write_text("")
+        simulation.cache.record_run(
+            full_config, swash_dir, run_key=run_key, success=True
+        )
+        (swash_dir / "INPUT").write_text("ran")
+
+        written = simulation.prepare_inputs(
+            full_config, swash_dir, template_dir=input_template.parent
+        )
+
+        assert not written
+        assert (swash_dir / "INPUT").read_text() == "ran"
+
+    def test_unchanged_inputs_are_not_rewritten(
+        self, full_config: config.Config, input_template: Path, tmp_path: Path
+    ) -> None:
+        """Test that only the files whose sections changed are written."""
+        template_dir = input_template.parent
+        written = simulation._write_inputs(
+            full_config, simulation_dir=tmp_path, template_dir=template_dir
+        )
+        assert written == [
+            "bathymetry.txt",
+            "porosity.txt",
+            "vegetation_density.txt",
+            "INPUT",
+        ]
+        mtimes = {
+            path.name: path.stat().st_mtime_ns for path in tmp_path.iterdir()
+        }
+
+        assert (
+            simulation._write_inputs(
+                full_config, simulation_dir=tmp_path, template_dir=template_dir
+            )
+            == []
+        )
+        assert {
+            path.name: path.stat().st_mtime_ns for path in tmp_path.iterdir()
+        } == mtimes
+
+        vegetation = full_config.vegetation.model_dump(exclude={"hash"})
+        vegetation["type"]["plant_density"] += 1.0
+        other = config.Config(
+            name=full_config.name,
+            grid=full_config.grid,
+            water=full_config.water,
+            breakwater=full_config.breakwater,
+            vegetation=config.VegetationConfig(**vegetation),
+            numeric=full_config.numeric,
+        )
+        written = simulation._write_inputs(
+            other, simulation_dir=tmp_path, template_dir=template_dir
+        )
+
+        assert written == ["vegetation_density.txt"]
+        assert (tmp_path / "bathymetry.txt").stat().st_mtime_ns == mtimes[
+            "bathymetry.txt"
+        ]
+
+    def test_template_compiled_once(
+        self, full_config: config.Config, input_template: Path
+    ) -> None:
+        """Test that the template is only compiled again once it changed."""
+        environment = simulation._environment(input_template.parent)
+        template = environment.get_template("INPUT")
+        assert environment.get_template("INPUT") is template
+
+        input_template.write_text("PROJECT '{{ name }}'\nSTOP\n")
+        mtime = input_template.stat().st_mtime + 1
+        os.utime(input_template, (mtime, mtime))
+
+        assert environment.get_template("INPUT") is not template
+        assert simulation._render_input(
+            full_config, template_dir=input_template.parent
+        ) == f"PROJECT '{full_config.name}'\nSTOP"
+
+    def test_template_cache_dir(
+        self,
+        input_template: Path,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that compiled templates go to the configured directory."""
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setenv(simulation.TEMPLATE_CACHE_ENV, str(cache_dir))
+
+        simulation._environment(input_template.parent).get_template("INPUT")
+
+        assert list(cache_dir.iterdir())
+
+    def test_template_cache_disabled(
+        self, input_template: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that an empty cache directory disables the cache on disk."""
+        monkeypatch.setenv(simulation.TEMPLATE_CACHE_ENV, "")
+
+        environment = simulation._environment(input_template.parent)
+
+        assert environment.bytecode_cache is None
+
+    def test_render_inputs(
+        self, full_config: config.Config, minimal_config: config.Config
+    ) -> None:
+        """Test rendering many configs against the same template."""
+        rendered = simulation.render_inputs([full_config, minimal_config])
+
+        assert rendered == [
+            simulation._render_input(
+                cfg, template_dir=simulation.root_dir / "templates"
+            )
+            for cfg in (full_config, minimal_config)
+        ]
+        assert full_config.physics_hash in rendered[0]
+
+
 class TestCreateInputFile:
     def test_create_input_file(
         self,
@@ -335,7 +981,6 @@ class TestExecuteSwash:
         monkeypatch.setattr("subprocess.Popen", mock_popen)
         
         # Mock progress monitoring
-        monkeypatch.setattr("src.simulation.threading.Thread", Mock())
         monkeypatch.setattr("src.simulation.tqdm.tqdm", Mock())
         
         # Mock error checking
@@ -346,6 +991,12 @@ class TestExecuteSwash:
         assert result is True
         mock_popen.assert_called_once()
 
+        # the exit code and resources of the run are recorded
+        manifest = json.loads((tmp_path / "run.json").read_text())
+        assert manifest["exit_code"] == 0
+        assert manifest["resources"]["wall_time"] >= 0
+        assert "peak_rss" in manifest["resources"]
+
     def test_execute_swash_failure(
         self,
         full_config: config.Config,
@@ -363,7 +1014,6 @@ class TestExecuteSwash:
         monkeypatch.setattr("subprocess.Popen", mock_popen)
         
         # Mock other dependencies
-        monkeypatch.setattr("src.simulation.threading.Thread", Mock())
         monkeypatch.setattr("src.simulation.tqdm.tqdm", Mock())
         monkeypatch.setattr("src.simulation._check_swash_errors", Mock(return_value=[]))
         
@@ -386,6 +1036,142 @@ class TestExecuteSwash:
         
         assert result is False
 
+    def test_execute_swash_not_found_closes_monitors(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the monitors don't leak their file descriptors."""
+        cfg = config.Config(
+            name="missing",
+            numeric=config.NumericConfig(convergence_tolerance=0.01),
+        )
+        monkeypatch.setattr(
+            "subprocess.Popen", Mock(side_effect=FileNotFoundError("swash"))
+        )
+        n_fds = len(os.listdir("/proc/self/fd"))
+
+        for _ in range(3):
+            simulation._execute_swash(cfg, simulation_dir=tmp_path, echo=False)
+
+        assert len(os.listdir("/proc/self/fd")) == n_fds
+
+    def test_execute_swash_stops_once_converged(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that SWASH is stopped and its outputs cut once converged."""
+        cfg = config.Config(
+            name="converging",
+            numeric=config.NumericConfig(
+                wave_gauge_positions=[20.0, 60.0],
+                convergence_tolerance=0.01,
+                convergence_waves=5,
+            ),
+        )
+        # steady waves written until the process is stopped
+        fake_swash = """
+import math, time
+files = [open(f"wg0{i}.txt", "w") for i in (1, 2)]
+for n in range(10_000_000):
+    level = 0.5 + 0.05 * math.sin(2 * math.pi * n * 0.1 / 6)
+    for f in files:
+        f.write(f"  {level:.6f}  0.000000  0.000000\\n")
+    if n % 300 == 0:
+        for f in files:
+            f.flush()
+        time.sleep(0.01)
+"""
+        popen = subprocess.Popen
+        monkeypatch.setattr(
+            "subprocess.Popen",
+            lambda args, **kwargs: popen(
+                [sys.executable, "-c", fake_swash], **kwargs
+            ),
+        )
+
+        result = simulation._execute_swash(
+            cfg, simulation_dir=tmp_path, echo=False
+        )
+
+        assert result is True
+        manifest = json.loads((tmp_path / "run.json").read_text())
+        truncation = manifest["truncation"]
+        assert manifest["exit_code"] != 0
+        assert truncation["tolerance"] == 0.01
+        assert truncation["simulation_time"] < cfg.simulation_duration
+        for file in ("wg01.txt", "wg02.txt"):
+            lines = (tmp_path / file).read_text().splitlines()
+            assert len(lines) == truncation["n_samples"]
+
+    def test_execute_swash_crash_after_convergence(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that a run failing on its own isn't taken for an early stop."""
+        cfg = config.Config(
+            name="crashing",
+            numeric=config.NumericConfig(
+                wave_gauge_positions=[20.0], convergence_tolerance=0.01
+            ),
+        )
+        mock_process = Mock(returncode=3)
+        mock_process.communicate.return_value = ("", "crashed")
+        monkeypatch.setattr("subprocess.Popen", Mock(return_value=mock_process))
+        # converged, but SWASH exited before being stopped
+        convergence = MagicMock()
+        convergence.__enter__.return_value = convergence
+        convergence.result.simulation_time = 10.0
+        convergence.result.to_dict.return_value = {}
+        monkeypatch.setattr(
+            "src.simulation.ConvergenceMonitor", Mock(return_value=convergence)
+        )
+        monkeypatch.setattr("src.simulation.truncate_outputs", Mock())
+
+        result = simulation._execute_swash(
+            cfg, simulation_dir=tmp_path, echo=False
+        )
+
+        assert result is False
+        mock_process.terminate.assert_not_called()
+
+    def test_execute_swash_stops_once_unstable(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """Test that SWASH is stopped as soon as its solution diverges."""
+        cfg = config.Config(
+            name="diverging",
+            numeric=config.NumericConfig(wave_gauge_positions=[20.0]),
+        )
+        # velocities growing until the process is stopped
+        fake_swash = """
+import math, time
+f = open("wg01.txt", "w")
+for n in range(10_000_000):
+    f.write(f"  0.100000  {0.5 * math.exp(n * 0.001):.6f}\\n")
+    if n % 300 == 0:
+        f.flush()
+        time.sleep(0.01)
+"""
+        popen = subprocess.Popen
+        monkeypatch.setattr(
+            "subprocess.Popen",
+            lambda args, **kwargs: popen(
+                [sys.executable, "-c", fake_swash], **kwargs
+            ),
+        )
+
+        result = simulation._execute_swash(
+            cfg, simulation_dir=tmp_path, echo=False
+        )
+
+        assert result is False
+        manifest = json.loads((tmp_path / "run.json").read_text())
+        assert "velocity" in manifest["instability"]["reason"]
+        assert manifest["exit_code"] != 0
+
     def test_execute_swash_timeout(
         self,
         full_config: config.Config,
@@ -423,7 +1209,6 @@ class TestExecuteSwash:
         monkeypatch.setattr("subprocess.Popen", mock_popen)
         
         # Mock dependencies
-        monkeypatch.setattr("src.simulation.threading.Thread", Mock())
         monkeypatch.setattr("src.simulation.tqdm.tqdm", Mock())
         
         # Mock error checking to return errors
@@ -470,6 +1255,17 @@ Final output
         assert any("PRINT line 2:" in error for error in errors)
         assert any("PRINT line 4:" in error for error in errors)
 
+    def test_check_swash_errors_compressed_print(self, tmp_path: Path) -> None:
+        """Test that errors are found in a compressed PRINT file."""
+        from src.compression import compress_file
+
+        (tmp_path / "PRINT").write_text("line 1\n** Error: bad input\n")
+        compress_file(tmp_path / "PRINT", "gzip")
+
+        errors = simulation._check_swash_errors(tmp_path)
+
+        assert errors == ["PRINT line 2: Error: bad input"]
+
     def test_check_swash_errors_empty_errfile(self, tmp_path: Path) -> None:
         """Test error checking with empty Errfile."""
         errfile = tmp_path / "Errfile"
@@ -0,0 +1,188 @@
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from src import stability
+
+PRINT_LINE = "Time of simulation  ->  {:010.3f}         in sec:     {:12.5f}\n"
+
+
+def _print(times: np.ndarray) -> bytes:
+    return b"".join(PRINT_LINE.format(t, t).encode() for t in times)
+
+
+def _table(rows: np.ndarray) -> bytes:
+    return b"".join(
+        ("  " + "  ".join(f"{value:.6f}" for value in row) + "\n").encode()
+        for row in rows
+    )
+
+
+@pytest.fixture
+def watchdog(tmp_path: Path) -> stability.InstabilityWatchdog:
+    return stability.InstabilityWatchdog(
+        tmp_path,
+        n_gauges=2,
+        water_depth=1.0,
+        wave_height=0.5,
+        time_step=0.05,
+        output_interval=0.1,
+        start_time=0.0,
+        poll_interval=0.05,
+    )
+
+
+class TestCheckGauge:
+    def test_stable_values(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that plausible waves are not taken as an instability."""
+        t = np.arange(0, 60, 0.1)
+        rows = np.column_stack(
+            [0.25 * np.sin(t), 0.8 * np.cos(t), np.zeros_like(t)]
+        )
+
+        assert watchdog.check_gauge("wg01.txt", _table(rows)) is None
+
+    def test_non_finite_value(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that NaN values are detected."""
+        reason = watchdog.check_gauge(
+            "wg01.txt", b"  0.100000  0.200000\n  NaN  NaN\n"
+        )
+        assert reason == "non-finite value in wg01.txt"
+
+    def test_overflowing_value(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that values too large for SWASH's format are detected."""
+        reason = watchdog.check_gauge("wg02.txt", b"  0.100000  **********\n")
+        assert reason == "unreadable value in wg02.txt"
+
+    def test_exploding_values(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that velocities and water levels beyond the limits are detected."""
+        assert "velocity" in watchdog.check_gauge(
+            "wg01.txt", b"  0.100000  45.000000\n"
+        )
+        assert "water level" in watchdog.check_gauge(
+            "wg02.txt", b"  -2.500000  0.100000\n"
+        )
+
+    def test_fortran_notation(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that gauge tables as SWASH writes them are checked."""
+        table = (
+            b"  0.12345678E+00  0.80000000E+00  0.00000000E+00\n"
+            b"  0.12345678E+00  0.45000000E+02  0.00000000E+00\n"
+        )
+
+        assert watchdog.check_gauge("wg01.txt", table[:50]) is None
+        assert "velocity" in watchdog.check_gauge("wg01.txt", table[50:])
+
+    def test_partial_lines_are_kept(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that a value split between reads is checked once complete."""
+        assert watchdog.check_gauge("wg01.txt", b"  0.1  Na") is None
+        assert watchdog.check_gauge("wg01.txt", b"N\n") is not None
+
+
+class TestCheckPrint:
+    def test_steady_time_step(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that a reasonable adaptive time step is accepted."""
+        assert watchdog.check_print(_print(np.arange(1, 501) * 0.0125)) is None
+
+    def test_collapsed_time_step(
+        self, watchdog: stability.InstabilityWatchdog
+    ) -> None:
+        """Test that a time step halved too many times is detected."""
+        watchdog.check_print(_print(np.arange(1, 201) * 0.05))
+
+        reason = watchdog.check_print(_print(10.0 + np.arange(1, 201) * 1e-5))
+
+        assert reason is not None
+        assert reason.startswith("time step collapsed")
+
+
+class TestInstabilityWatchdog:
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_watchdog_detects_divergence(
+        self, tmp_path: Path, use_inotify: bool
+    ) -> None:
+        """Test that a diverging gauge output is detected while written."""
+        watchdog = stability.InstabilityWatchdog(
+            tmp_path,
+            n_gauges=1,
+            water_depth=1.0,
+            wave_height=0.5,
+            time_step=0.05,
+            output_interval=0.1,
+            start_time=0.0,
+            poll_interval=0.05,
+            use_inotify=use_inotify,
+        )
+        callback = Mock()
+        watchdog.on_unstable(callback)
+        stop = threading.Event()
+
+        def write() -> None:
+            t = np.arange(0, 100, 0.1)
+            velocity = 0.5 * np.exp(t / 10)
+            rows = np.column_stack([0.1 * np.sin(t), velocity])
+            with open(tmp_path / "wg01.txt", "wb") as f:
+                for chunk in np.array_split(rows, 50):
+                    if stop.is_set():
+                        break
+                    f.write(_table(chunk))
+                    f.flush()
+                    time.sleep(0.005)
+
+        with watchdog:
+            writer = threading.Thread(target=write)
+            writer.start()
+            deadline = time.monotonic() + 10
+            while watchdog.result is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            stop.set()
+            writer.join()
+
+        result = watchdog.result
+        assert result is not None
+        callback.assert_called_once_with(result)
+        assert "velocity" in result.reason
+        # the velocity exceeds 5 x 3.84 m/s after about 36.5 s
+        assert 36.0 < result.simulation_time < 100.0
+        assert result.to_dict()["reason"] == result.reason
+        assert watchdog._watcher.closed
+
+    def test_stop_after_detection_doesnt_wake(self, tmp_path: Path) -> None:
+        """Test that stopping a watchdog whose thread ended skips the wake."""
+        watchdog = stability.InstabilityWatchdog(
+            tmp_path,
+            n_gauges=1,
+            water_depth=1.0,
+            wave_height=0.5,
+            time_step=0.05,
+            output_interval=0.1,
+            start_time=0.0,
+        )
+        (tmp_path / "wg01.txt").write_bytes(_table(np.array([[np.nan, 0.0]])))
+        watchdog.start()
+        watchdog._thread.join(timeout=10)
+        wake = Mock()
+        watchdog._watcher.wake = wake
+
+        watchdog.stop()
+
+        assert watchdog.result is not None
+        wake.assert_not_called()
@@ -0,0 +1,99 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.utils import arrays as arrays_utils
+
+
+def _savetxt(values: np.ndarray, decimals: int = 3) -> bytes:
+    buffer = io.BytesIO()
+    np.savetxt(buffer, values, fmt=f"%.{decimals}f")
+    return buffer.getvalue()
+
+
+class TestFormatArray:
+    def test_matches_savetxt(self) -> None:
+        """Test that the output is the one of np.savetxt."""
+        rng = np.random.default_rng(0)
+        values = np.concatenate(
+            [rng.random(500) * 3, rng.normal(0, 50, 500), [0.0, 1.0, 1e5]]
+        )
+        assert arrays_utils.format_array(values) == _savetxt(values)
+
+    @pytest.mark.parametrize("decimals", [1, 2, 5])
+    def test_decimals(self, decimals: int) -> None:
+        """Test other numbers of decimals."""
+        values = np.random.default_rng(1).normal(0, 50, 200)
+        assert arrays_utils.format_array(values, decimals) == _savetxt(
+            values, decimals
+        )
+
+    def test_no_decimals(self) -> None:
+        """Test that no decimal point is written without decimals."""
+        values = np.array([0.0, 12.0, -3.0, 1500.0])
+        assert arrays_utils.format_array(values, 0) == b"0\n12\n-3\n1500\n"
+
+    def test_leading_zeros_and_signs(self) -> None:
+        """Test that only the needed digits and signs are written."""
+        values = np.array([0.5, -0.25, 10.0, -123.456, 0.0])
+        assert (
+            arrays_utils.format_array(values)
+            == b"0.500\n-0.250\n10.000\n-123.456\n0.000\n"
+        )
+
+    def test_empty(self) -> None:
+        """Test that nothing is written for no values."""
+        assert arrays_utils.format_array(np.array([])) == b""
+
+    def test_non_finite(self) -> None:
+        """Test that non-finite values are refused."""
+        with pytest.raises(ValueError, match="finite"):
+            arrays_utils.format_array(np.array([1.0, np.nan]))
+
+
+class TestWriteArray:
+    def test_free(self, tmp_path: Path) -> None:
+        """Test that the text file can be read back."""
+        values = np.linspace(-1.0, 2.0, 11)
+
+        path = arrays_utils.write_array(tmp_path / "bathymetry", values)
+
+        assert path == tmp_path / "bathymetry.txt"
+        np.testing.assert_allclose(np.loadtxt(path), values, atol=1e-3)
+
+    def test_unformatted(self, tmp_path: Path) -> None:
+        """Test the Fortran record of the binary file."""
+        values = np.array([0.12345, 1.0, -2.5])
+
+        path = arrays_utils.write_array(
+            tmp_path / "porosity", values, format="unformatted"
+        )
+
+        assert path == tmp_path / "porosity.bin"
+        content = path.read_bytes()
+        assert len(content) == 4 + 3 * 4 + 4
+        assert content[:4] == content[-4:] == np.int32(12).tobytes()
+        np.testing.assert_array_equal(
+            arrays_utils.read_unformatted(path),
+            np.array([0.123, 1.0, -2.5], dtype=np.float32),
+        )
+
+    def test_other_format_removed(self, tmp_path: Path) -> None:
+        """Test that switching format leaves a single file."""
+        values = np.ones(5)
+        arrays_utils.write_array(tmp_path / "porosity", values)
+
+        arrays_utils.write_array(
+            tmp_path / "porosity", values, format="unformatted"
+        )
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["porosity.bin"]
+
+    def test_unknown_format(self, tmp_path: Path) -> None:
+        """Test that an unknown format is refused."""
+        with pytest.raises(ValueError, match="Unknown format"):
+            arrays_utils.write_array(
+                tmp_path / "porosity", np.ones(5), format="binary"  # type: ignore
+            )
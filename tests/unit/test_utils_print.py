@@ -324,6 +324,14 @@ class TestFormatNumber:
         assert print_utils.format_number(1234567.89) == "1 234 567.89"
         assert print_utils.format_number(999.123) == "999.123"
 
+    def test_format_bytes(self) -> None:
+        """Test format_bytes with each unit."""
+        assert print_utils.format_bytes(512) == "512 B"
+        assert print_utils.format_bytes(1536) == "1.5 KiB"
+        assert print_utils.format_bytes(10 * 1024**2) == "10.0 MiB"
+        assert print_utils.format_bytes(3 * 1024**3) == "3.0 GiB"
+        assert print_utils.format_bytes(2048 * 1024**3) == "2048.0 GiB"
+
     def test_format_number_zero(self) -> None:
         """Test format_number with zero."""
         assert print_utils.format_number(0) == "0"
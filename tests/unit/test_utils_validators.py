@@ -117,6 +117,35 @@ class TestHashConfig:
         assert "_suffix" in model.hash
         assert len(model.hash.split("_")[0]) == 8
 
+    def test_hash_config_ignore_default(self) -> None:
+        """Test that fields at their default are only hashed once changed."""
+
+        class Section(pydantic.BaseModel):
+            value: int = 1
+            added: bool = False
+
+        class Model(pydantic.BaseModel):
+            name: str
+            hash: str = ""
+            section: Section = pydantic.Field(default_factory=Section)
+
+            _hash_config = validators_utils.hash_config(
+                ignore_default=["section.added"]
+            )
+
+        class Previous(pydantic.BaseModel):
+            name: str
+            hash: str = ""
+            section: dict = {"value": 1}
+
+            _hash_config = validators_utils.hash_config()
+
+        model = Model(name="test")
+        assert model.hash == Previous(name="test").hash
+        assert Model(name="test", section=Section(added=True)).hash != (
+            model.hash
+        )
+
     def test_hash_config_with_complex_ignore_patterns(self) -> None:
         """Test hash_config ignoring multiple fields."""
         class ModelWithMultipleIgnore(pydantic.BaseModel):
@@ -303,6 +332,25 @@ class TestSetSeedIfMissing:
         assert len(set(seeds)) == 10  # All should be different
 
 
+class TestHashDict:
+    def test_hash_dict_ignores_order_and_hash_fields(self) -> None:
+        """Test that key order and nested hash fields don't change the hash."""
+        a = {"a": 1, "b": {"c": 2, "hash": "x"}}
+        b = {"b": {"hash": "y", "c": 2}, "a": 1}
+        assert validators_utils.hash_dict(a) == validators_utils.hash_dict(b)
+
+    def test_hash_dict_compares_numbers_by_value(self) -> None:
+        """Test that ints and equal floats give the same hash."""
+        assert validators_utils.hash_dict(
+            {"a": 1000, "b": [1, 2.5], "c": True}
+        ) == validators_utils.hash_dict({"a": 1000.0, "b": [1.0, 2.5], "c": True})
+
+    def test_hash_dict_length(self) -> None:
+        """Test the length of the hash."""
+        assert len(validators_utils.hash_dict({"a": 1})) == 8
+        assert len(validators_utils.hash_dict({"a": 1}, length=16)) == 16
+
+
 class TestHashConfigInternal:
     def test_hash_config_internal_basic(self) -> None:
         """Test _hash_config internal function."""
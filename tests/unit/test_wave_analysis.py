@@ -3,8 +3,12 @@ import polars as pl
 import pytest
 
 from src.wave_analysis import (
+    RunningWaveStatistics,
+    ZeroCrossingEstimator,
     calculate_wave_heights,
     calculate_wave_statistics_for_gauges,
+    calculate_wave_statistics_for_matrix,
+    _wave_statistics,
     _zero_crossing_analysis,
 )
 
@@ -381,6 +385,81 @@ class TestZeroCrossingAnalysis:
         assert isinstance(wave_periods, np.ndarray)
 
 
+class TestZeroCrossingEstimator:
+    """Test the incremental zero-crossing analysis."""
+
+    def test_estimator_matches_batch_analysis(self):
+        """Test that the incremental statistics match the batch ones."""
+        timestep = 0.1
+        t = np.arange(0, 300, timestep)
+        water_levels = 0.5 + 0.05 * np.sin(2 * np.pi * t / 6 + 0.3)
+
+        estimator = ZeroCrossingEstimator(timestep)
+        for chunk in np.array_split(water_levels, 37):
+            estimator.update(chunk)
+        result = estimator.statistics()
+        expected = calculate_wave_heights(water_levels, timestep)
+
+        assert estimator.n_samples == len(water_levels)
+        assert abs(result["n_waves"] - expected["n_waves"]) <= 1
+        assert pytest.approx(result["significant_wave_height"], rel=1e-3) == expected["significant_wave_height"]
+        assert pytest.approx(result["mean_period"], rel=1e-2) == expected["mean_period"]
+
+    def test_estimator_is_independent_of_chunks(self):
+        """Test that feeding samples in any chunks gives the same waves."""
+        rng = np.random.default_rng(0)
+        water_levels = np.sin(np.linspace(0, 60 * np.pi, 3000)) + 0.1 * rng.standard_normal(3000)
+
+        whole = ZeroCrossingEstimator(0.1)
+        whole.update(water_levels)
+        chunked = ZeroCrossingEstimator(0.1)
+        for level in water_levels:
+            chunked.update(np.array([level]))
+
+        assert whole.wave_heights == chunked.wave_heights
+        assert whole.wave_periods == chunked.wave_periods
+
+    def test_estimator_returns_new_waves(self):
+        """Test that update returns the number of completed waves."""
+        t = np.arange(0, 20, 0.1)
+        water_levels = np.sin(2 * np.pi * t / 2)
+        estimator = ZeroCrossingEstimator(0.1)
+
+        assert estimator.update(water_levels[:5]) == 0
+        assert estimator.update(water_levels[5:]) == estimator.n_waves
+        assert estimator.statistics(1)["n_waves"] == 1
+        assert ZeroCrossingEstimator(0.1).statistics()["n_waves"] == 0
+
+
+class TestRunningWaveStatistics:
+    """Test the statistics updated one wave at a time."""
+
+    def test_running_statistics_match_batch(self):
+        """Test that every prefix of the waves gives the batch statistics."""
+        rng = np.random.default_rng(0)
+        heights = rng.uniform(0.0, 1.0, 200)
+        periods = rng.uniform(4.0, 8.0, 200)
+        statistics = RunningWaveStatistics()
+
+        for n, (height, period) in enumerate(zip(heights, periods), 1):
+            statistics.add(height, period)
+            expected = _wave_statistics(heights[:n], periods[:n])
+            assert statistics.n_waves == n
+            assert statistics.significant_wave_height == pytest.approx(
+                expected["significant_wave_height"], rel=1e-12
+            )
+            assert statistics.mean_period == pytest.approx(
+                expected["mean_period"], rel=1e-12
+            )
+
+    def test_running_statistics_empty(self):
+        """Test that there are no statistics without waves."""
+        statistics = RunningWaveStatistics()
+
+        assert statistics.significant_wave_height == 0.0
+        assert statistics.mean_period == 0.0
+
+
 class TestCalculateWaveStatisticsForGauges:
     """Test the calculate_wave_statistics_for_gauges function."""
 
@@ -679,6 +758,52 @@ class TestCalculateWaveStatisticsForGauges:
         assert result["position"][0] == 50.0
 
 
+class TestCalculateWaveStatisticsForMatrix:
+    """Test the calculate_wave_statistics_for_matrix function."""
+
+    def test_matches_long_frame(self):
+        """Test that the statistics are those computed from a long frame."""
+        t = np.arange(300) * 0.1
+        positions = [60.0, 20.0, 40.0]
+        water_levels = np.column_stack(
+            [
+                (i + 1) * 0.1 * np.sin(2 * np.pi * 0.25 * t + i)
+                for i in range(len(positions))
+            ]
+        ).astype(np.float32)
+        data = pl.concat(
+            [
+                pl.DataFrame({
+                    "timestep": t,
+                    "water_level": water_levels[:, i],
+                    "position": [position] * len(t),
+                })
+                for i, position in enumerate(positions)
+            ]
+        )
+
+        result = calculate_wave_statistics_for_matrix(
+            water_levels, positions, 0.1
+        )
+
+        assert result["position"].to_list() == [20.0, 40.0, 60.0]
+        assert result.equals(calculate_wave_statistics_for_gauges(data, 0.1))
+
+    def test_memory_mapped_matrix(self, tmp_path):
+        """Test that the gauges of a memory-mapped matrix are used in place."""
+        t = np.arange(200) * 0.1
+        path = tmp_path / "matrix.npy"
+        np.save(path, np.column_stack([np.sin(t), 2 * np.sin(t)]))
+        matrix = np.load(path, mmap_mode="r")
+
+        result = calculate_wave_statistics_for_matrix(matrix, [10.0, 20.0], 0.1)
+
+        assert len(result) == 2
+        assert result["max_wave_height"][1] == pytest.approx(
+            2 * result["max_wave_height"][0]
+        )
+
+
 class TestEdgeCasesAndErrorConditions:
     """Test edge cases and error conditions across all functions."""
 